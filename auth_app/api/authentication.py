@@ -1,5 +1,60 @@
+import copy
+import threading
+import time
+
+from cachetools import TTLCache
+from django.conf import settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_SECONDS)
+_token_cache_lock = threading.Lock()
+
+
+def invalidate_token(raw_token):
+    """
+    Removes a token from the verification cache (used on logout).
+
+    The cache lives per process, so other workers keep a validated
+    token for at most AUTH_TOKEN_CACHE_SECONDS.
+    """
+    if raw_token:
+        with _token_cache_lock:
+            _token_cache.pop(raw_token, None)
+
+
+def invalidate_user(user_id):
+    """
+    Removes all cached tokens of a user (used when the user is
+    deactivated or deleted, see auth_app/signals.py).
+
+    Like invalidate_token, this only affects the current process.
+    """
+    with _token_cache_lock:
+        for raw_token in [token for token, cached in _token_cache.items() if cached[0].pk == user_id]:
+            _token_cache.pop(raw_token, None)
+
+
+def cached_authentication(raw_token):
+    """
+    Returns the cached (user, validated token) for a raw token, or None
+    if it is not cached, expired or the user is inactive. Does no I/O, so
+    async views can call it without a thread.
+
+    Every request gets its own copy of the cached user, so changes to
+    request.user do not leak into concurrent requests.
+    """
+    if not raw_token:
+        return None
+
+    with _token_cache_lock:
+        cached = _token_cache.get(raw_token)
+    if cached is None:
+        return None
+    if cached[2] <= time.time() or not cached[0].is_active:
+        invalidate_token(raw_token)
+        return None
+    return copy.copy(cached[0]), cached[1]
+
 
 class CookieJWTAuthentication(JWTAuthentication):
     """
@@ -7,6 +62,14 @@ class CookieJWTAuthentication(JWTAuthentication):
 
     Authenticates users using the JWT access token
     stored in HTTP-only cookies instead of headers.
+
+    Validated tokens and their users are kept in a small LRU cache with a
+    short TTL (AUTH_TOKEN_CACHE_SIZE / AUTH_TOKEN_CACHE_SECONDS), so hot
+    tokens skip the signature check and the user query.
+
+    The cache lives per process: logout, deactivation and deletion drop
+    the tokens in the process that handles them, other processes accept
+    them for at most AUTH_TOKEN_CACHE_SECONDS longer.
     """
 
     def authenticate(self, request):
@@ -20,7 +83,14 @@ class CookieJWTAuthentication(JWTAuthentication):
         if not raw_token:
             return None
 
+        cached = cached_authentication(raw_token)
+        if cached is not None:
+            return cached
+
         validated_token = self.get_validated_token(raw_token)
         user = self.get_user(validated_token)
 
-        return (user, validated_token)
\ No newline at end of file
+        with _token_cache_lock:
+            _token_cache[raw_token] = (copy.copy(user), validated_token, validated_token["exp"])
+
+        return (user, validated_token)
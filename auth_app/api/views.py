@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .serializers import CustomTokenSerializer
-from .authentication import CookieJWTAuthentication
+from .authentication import CookieJWTAuthentication, invalidate_token
 from rest_framework.permissions import IsAuthenticated
 
 class RegisterView(APIView):
@@ -128,10 +128,13 @@ class LogoutView(APIView):
         """
         Handles POST logout requests.
 
-        Deletes access and refresh tokens from cookies
-        and returns a logout confirmation response.
+        Deletes access and refresh tokens from cookies, drops the
+        access token from the verification cache and returns a
+        logout confirmation response.
         """
 
+        invalidate_token(request.COOKIES.get('access_token'))
+
         response = Response({
             "detail": "Log-Out successfully! All Tokens will be deleted. Refresh token is now invalid."
         })
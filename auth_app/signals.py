@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .api.authentication import invalidate_user
+
+
+@receiver(post_save, sender=User)
+def drop_tokens_of_deactivated_user(sender, instance, **kwargs):
+    """
+    Deactivated users lose their cached tokens right away.
+    """
+    if not instance.is_active:
+        invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def drop_tokens_of_deleted_user(sender, instance, **kwargs):
+    """
+    Deleted users lose their cached tokens right away.
+    """
+    invalidate_user(instance.pk)
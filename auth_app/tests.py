@@ -1,3 +1,59 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .api.authentication import _token_cache, cached_authentication
+
+
+class CookieJWTAuthenticationCacheTests(APITestCase):
+    """
+    Validated access tokens are cached, and dropped again on logout.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="Secret123")
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.cookies["access_token"] = self.token
+
+    def test_hot_token_skips_user_query(self):
+        url = reverse("quizzes-list")
+        self.client.get(url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_logout_invalidates_token(self):
+        self.client.get(reverse("quizzes-list"))
+        self.assertIn(self.token, _token_cache)
+
+        response = self.client.post(reverse("logout"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(self.token, _token_cache)
+
+    def test_deactivated_user_is_rejected(self):
+        url = reverse("quizzes-list")
+        self.client.get(url)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertNotIn(self.token, _token_cache)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        url = reverse("quizzes-list")
+        self.client.get(url)
+
+        self.user.delete()
+        self.assertNotIn(self.token, _token_cache)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_requests_get_their_own_user(self):
+        self.client.get(reverse("quizzes-list"))
+
+        first, _ = cached_authentication(self.token)
+        second, _ = cached_authentication(self.token)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
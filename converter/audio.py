@@ -0,0 +1,272 @@
+import bisect
+import subprocess
+import sys
+import tempfile
+import wave
+
+import numpy as np
+
+from converter.preflight import AudioLimitError
+
+SAMPLE_RATE = 16000
+
+
+def pcm_to_float(pcm: bytes):
+    """
+    Converts raw 16 bit little-endian mono PCM into the
+    float32 array in [-1, 1] that Whisper expects.
+    """
+    return np.frombuffer(pcm, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def load_wav(path):
+    """
+    Reads a 16 bit mono WAV file (as written by convert_audio)
+    into a float32 array without starting another ffmpeg process.
+    """
+    with wave.open(path, "rb") as wav:
+        return pcm_to_float(wav.readframes(wav.getnframes()))
+
+
+def wav_duration(path):
+    """
+    Returns the duration of a WAV file in seconds (reads only the header).
+    """
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def frame_energy(audio, frame_seconds=0.03, sr=SAMPLE_RATE):
+    """
+    Returns the RMS energy of consecutive, non-overlapping frames
+    (vectorized: the audio is reshaped into a frames x samples matrix).
+    """
+    frame_length = max(1, int(frame_seconds * sr))
+    frame_count = len(audio) // frame_length
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32), frame_length
+
+    frames = audio[:frame_count * frame_length].reshape(frame_count, frame_length)
+    return np.sqrt(np.mean(frames ** 2, axis=1)), frame_length
+
+
+class TimestampMap():
+    """
+    Maps times of trimmed audio (see trim_silence) back to the original audio.
+
+    regions: list of kept (start_sample, end_sample) of the original audio,
+    in order; they are concatenated in the trimmed audio.
+    """
+
+    def __init__(self, regions, sr=SAMPLE_RATE):
+        self.regions = regions
+        self.sr = sr
+        self.trimmed_starts = []
+        position = 0
+        for start, end in regions:
+            self.trimmed_starts.append(position)
+            position += end - start
+        self.kept_samples = position
+
+    def to_original(self, seconds):
+        """
+        Converts a time (seconds) in the trimmed audio to the original audio.
+        """
+        if not self.regions:
+            return seconds
+        sample = seconds * self.sr
+        i = max(0, bisect.bisect_right(self.trimmed_starts, sample) - 1)
+        return (self.regions[i][0] + sample - self.trimmed_starts[i]) / self.sr
+
+
+def detect_speech(audio, min_silence_seconds=1.0, padding_seconds=0.2, margin_db=10.0, floor_db=-50.0,
+                  frame_seconds=0.03, sr=SAMPLE_RATE):
+    """
+    Finds the regions of an audio signal that contain speech (energy based).
+
+    - Frames louder than an adaptive threshold count as speech: the noise
+      floor (10th percentile in dB) plus margin_db, capped at margin_db below
+      the loud level (95th percentile) and never below floor_db
+    - Speech runs are widened by padding_seconds on both sides
+    - Pauses shorter than min_silence_seconds are kept
+
+    Music or noise at speech level is not removed. Fully vectorized;
+    returns a list of (start_sample, end_sample) tuples.
+    """
+    energy, frame_length = frame_energy(audio, frame_seconds, sr)
+    if len(energy) == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    level = 20 * np.log10(energy + 1e-10)
+    noise_floor, loud = np.percentile(level, [10, 95])
+    threshold = max(floor_db, min(noise_floor + margin_db, loud - margin_db))
+    speech = (level > threshold).astype(np.int8)
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech, [0]))))
+    if len(edges) == 0:
+        return []
+
+    padding = int(padding_seconds / frame_seconds)
+    starts = np.maximum(edges[::2] - padding, 0)
+    ends = np.minimum(edges[1::2] + padding, len(energy))
+
+    # Merge runs separated by less than min_silence_seconds (or overlapping after padding).
+    separate = starts[1:] - ends[:-1] >= int(min_silence_seconds / frame_seconds)
+    starts = np.concatenate((starts[:1], starts[1:][separate]))
+    ends = np.concatenate((ends[:-1][separate], ends[-1:]))
+
+    regions = [(int(start) * frame_length, int(end) * frame_length) for start, end in zip(starts, ends)]
+    if ends[-1] == len(energy):
+        regions[-1] = (regions[-1][0], len(audio))
+    return regions
+
+
+def trim_silence(audio, sr=SAMPLE_RATE, **kwargs):
+    """
+    Removes the non-speech regions found by detect_speech.
+
+    Returns the trimmed audio and a TimestampMap back to the original.
+    Audio without detected speech is returned unchanged.
+    """
+    regions = detect_speech(audio, sr=sr, **kwargs)
+    if not regions:
+        return audio, TimestampMap([(0, len(audio))], sr)
+
+    trimmed = np.concatenate([audio[start:end] for start, end in regions])
+    return trimmed, TimestampMap(regions, sr)
+
+
+def split_on_silence(audio, chunk_seconds, overlap_seconds, search_seconds=5.0, sr=SAMPLE_RATE):
+    """
+    Splits audio into chunks of roughly chunk_seconds.
+
+    Each cut is moved to the quietest frame within +/- search_seconds of
+    the target position, so cuts fall into pauses instead of words.
+    Every chunk except the first starts overlap_seconds before its cut,
+    so words at the boundary appear in both neighbouring chunks.
+
+    Returns a list of (start_sample, end_sample) tuples.
+    """
+    total = len(audio)
+    chunk_length = int(chunk_seconds * sr)
+    if total <= chunk_length:
+        return [(0, total)]
+
+    energy, frame_length = frame_energy(audio, sr=sr)
+    search = int(search_seconds * sr) // frame_length
+
+    cuts = [0]
+    target = chunk_length
+    while target < total - chunk_length // 4:
+        center = target // frame_length
+        low = max(cuts[-1] // frame_length + 1, center - search)
+        high = min(len(energy), center + search + 1)
+        cut = (low + int(np.argmin(energy[low:high]))) * frame_length if high > low else target
+        cuts.append(cut)
+        target = cut + chunk_length
+    cuts.append(total)
+
+    overlap = int(overlap_seconds * sr)
+    return [
+        (max(0, start - overlap) if i else start, end)
+        for i, (start, end) in enumerate(zip(cuts[:-1], cuts[1:]))
+    ]
+
+
+def stream_audio(url, audio_format="bestaudio/best", time_range=None, max_seconds=None,
+                 expected_seconds=None, on_progress=None):
+    """
+    Downloads and decodes the audio of a video without touching the disk.
+
+    Pipeline:
+    - yt-dlp writes the audio stream to stdout ("-o -"), only the
+      time_range (start, end) in seconds if given
+    - ffmpeg reads it from stdin and emits 16 kHz mono PCM on stdout
+    - the PCM is collected in memory and returned as a numpy array
+
+    Both processes are killed as soon as more than max_seconds of audio
+    arrived (AudioLimitError), e.g. for streams without a known duration.
+    Raises RuntimeError if yt-dlp or ffmpeg fail.
+
+    on_progress (optional) is called with the share of expected_seconds
+    (the preflight duration) that has been decoded so far.
+
+    stderr of both processes goes to temp files: a pipe that nobody reads
+    while the PCM is collected would block the process once it is full.
+    """
+    command = [
+        sys.executable, "-m", "yt_dlp",
+        "--quiet",
+        "--no-progress",
+        "--no-playlist",
+        "-f", audio_format,
+        "-o", "-",
+    ]
+    if time_range is not None:
+        start, end = time_range
+        command += ["--download-sections", f"*{start}-{'inf' if end is None else end}"]
+
+    with tempfile.TemporaryFile() as download_log, tempfile.TemporaryFile() as ffmpeg_log:
+        pcm = _run_stream_pipeline([*command, url], download_log, ffmpeg_log, max_seconds, expected_seconds, on_progress)
+
+    return pcm_to_float(pcm)
+
+
+def _read_log(log, limit=2000):
+    log.seek(0)
+    return log.read().decode(errors="ignore").strip()[-limit:]
+
+
+def _run_stream_pipeline(download_command, download_log, ffmpeg_log, max_seconds, expected_seconds, on_progress):
+    """
+    Runs yt-dlp | ffmpeg (see stream_audio) and returns the raw PCM.
+    """
+    downloader = subprocess.Popen(
+        download_command,
+        stdout=subprocess.PIPE,
+        stderr=download_log,
+    )
+    ffmpeg = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le",
+            "-ac", "1",
+            "-ar", str(SAMPLE_RATE),
+            "pipe:1",
+        ],
+        stdin=downloader.stdout,
+        stdout=subprocess.PIPE,
+        stderr=ffmpeg_log,
+    )
+    # Let yt-dlp receive SIGPIPE if ffmpeg exits early.
+    downloader.stdout.close()
+
+    max_bytes = int(max_seconds * SAMPLE_RATE) * 2 if max_seconds else None
+    chunks = []
+    received = 0
+    while chunk := ffmpeg.stdout.read(1 << 16):
+        chunks.append(chunk)
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            ffmpeg.kill()
+            downloader.kill()
+            ffmpeg.wait()
+            downloader.wait()
+            raise AudioLimitError(f"The audio is longer than {max_seconds / 60:.0f} min.")
+        if on_progress is not None and expected_seconds:
+            on_progress(min(100, 100 * received / (expected_seconds * SAMPLE_RATE * 2)))
+
+    ffmpeg.wait()
+    downloader.wait()
+
+    if downloader.returncode != 0:
+        raise RuntimeError(f"yt-dlp failed: {_read_log(download_log)}")
+    if ffmpeg.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {_read_log(ffmpeg_log)}")
+    if not chunks:
+        raise RuntimeError("No audio data received.")
+
+    return b"".join(chunks)
@@ -0,0 +1,171 @@
+import html
+import re
+import xml.etree.ElementTree as ET
+
+import yt_dlp
+from django.conf import settings
+
+CAPTION_FORMATS = ("vtt", "srv3", "srv2", "srv1")
+TIMING_LINE_REGEX = re.compile(r"^\d{1,2}:\d{2}(?::\d{2})?[.,]\d{3}\s+-->")
+TAG_REGEX = re.compile(r"<[^>]+>")
+NON_SPEECH_REGEX = re.compile(r"\[[^\]]*\]|\([^)]*\)|♪")
+
+
+def clean_caption_line(line):
+    """
+    Removes markup (<c>, inline timestamps, ...) and entities from a caption line.
+    """
+    return " ".join(html.unescape(TAG_REGEX.sub("", line)).split())
+
+
+def join_caption_lines(lines):
+    """
+    Joins caption lines into plain text.
+
+    YouTube auto captions roll: every cue repeats the previous line,
+    so a line equal to the one before it is skipped.
+    """
+    text = []
+    for line in lines:
+        if line and (not text or text[-1] != line):
+            text.append(line)
+    return " ".join(text)
+
+
+def parse_vtt(content):
+    """
+    Converts a WebVTT caption file into plain transcript text.
+    """
+    lines = []
+    in_header = True
+    skip_block = False
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line:
+            in_header = False
+            skip_block = False
+            continue
+        if in_header or skip_block:
+            continue
+        if line.startswith(("NOTE", "STYLE", "REGION")):
+            skip_block = True
+            continue
+        if TIMING_LINE_REGEX.match(line) or line.isdigit():
+            continue
+        lines.append(clean_caption_line(line))
+
+    return join_caption_lines(lines)
+
+
+def parse_srv(content):
+    """
+    Converts YouTube's XML caption formats (srv1: <text>, srv2/srv3: <p>)
+    into plain transcript text.
+    """
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return ""
+
+    lines = [
+        clean_caption_line("".join(element.itertext()))
+        for element in root.iter()
+        if element.tag in ("text", "p")
+    ]
+    return join_caption_lines(lines)
+
+
+def parse_captions(content, ext):
+    return parse_vtt(content) if ext == "vtt" else parse_srv(content)
+
+
+def language_matches(track_language, language):
+    return track_language == language or track_language.startswith(f"{language}-")
+
+
+def select_track(info, languages=None, allow_automatic=None):
+    """
+    Picks the caption track to use from yt_dlp's video info.
+
+    Manual subtitles are preferred over automatic captions; the video's own
+    language comes first (auto captions in other languages are machine
+    translations), then CAPTIONS_LANGUAGES. Returns a dict with url, ext,
+    language and automatic, or None.
+    """
+    if languages is None:
+        languages = settings.CAPTIONS_LANGUAGES
+    if allow_automatic is None:
+        allow_automatic = settings.CAPTIONS_ALLOW_AUTOMATIC
+
+    video_language = info.get("language")
+    preferred = [f"{video_language}-orig", video_language, *languages] if video_language else list(languages)
+
+    sources = [(info.get("subtitles") or {}, False)]
+    if allow_automatic:
+        sources.append((info.get("automatic_captions") or {}, True))
+
+    for tracks, automatic in sources:
+        for language in preferred:
+            for track_language, formats in tracks.items():
+                if track_language == "live_chat" or not language_matches(track_language, language):
+                    continue
+                by_ext = {f.get("ext"): f for f in formats if f.get("url")}
+                for ext in CAPTION_FORMATS:
+                    if ext in by_ext:
+                        return {
+                            "url": by_ext[ext]["url"],
+                            "ext": ext,
+                            "language": track_language,
+                            "automatic": automatic,
+                        }
+    return None
+
+
+def assess_captions(text, duration=None):
+    """
+    Quality heuristics for a caption transcript.
+
+    Returns None if the captions are usable, otherwise the reason:
+    - too few words (CAPTIONS_MIN_WORDS)
+    - too sparse for the video length (CAPTIONS_MIN_WORDS_PER_MINUTE),
+      e.g. captions that only cover the intro
+    - mostly non-speech markers like [Music] (CAPTIONS_MAX_NON_SPEECH_RATIO)
+    """
+    words = text.split()
+    if len(words) < settings.CAPTIONS_MIN_WORDS:
+        return f"only {len(words)} words"
+
+    if duration and len(words) / (duration / 60) < settings.CAPTIONS_MIN_WORDS_PER_MINUTE:
+        return f"{len(words) / (duration / 60):.0f} words per minute"
+
+    non_speech_words = sum(len(marker.split()) for marker in NON_SPEECH_REGEX.findall(text))
+    if non_speech_words / len(words) > settings.CAPTIONS_MAX_NON_SPEECH_RATIO:
+        return "mostly non-speech markers"
+
+    return None
+
+
+def fetch_captions(url):
+    """
+    Returns the transcript of a video from its captions.
+
+    Returns (text, None) for usable captions, otherwise (None, reason),
+    so the caller can fall back to download + Whisper.
+    """
+    options = {"quiet": True, "noplaylist": True, "skip_download": True}
+    try:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+            track = select_track(info)
+            if track is None:
+                return None, "no caption track"
+            content = ydl.urlopen(track["url"]).read().decode("utf-8", errors="replace")
+    except (yt_dlp.utils.DownloadError, OSError) as e:
+        return None, f"caption download failed: {e}"
+
+    text = parse_captions(content, track["ext"])
+    reason = assess_captions(text, info.get("duration"))
+    if reason:
+        return None, reason
+    return text, None
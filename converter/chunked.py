@@ -0,0 +1,144 @@
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+
+from converter.audio import SAMPLE_RATE, split_on_silence
+from converter.transcription import worker_core_share
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def chunk_worker_count():
+    """
+    Number of transcription processes (WHISPER_CHUNK_WORKERS, 0 = the
+    queue worker's share of the cores).
+
+    Every queue worker has its own pool and every pool process loads
+    its own model, so the default keeps QUIZ_WORKER_COUNT pools from
+    oversubscribing the host.
+    """
+    return settings.WHISPER_CHUNK_WORKERS or worker_core_share()
+
+
+def _init_chunk_worker(threads):
+    """
+    Initializer of a chunk worker process.
+
+    Loads the model of the configured transcription backend once, so every
+    chunk handled by this process reuses it, and limits torch to its share
+    of the cores.
+    """
+    import torch
+    from converter.transcription import get_transcription_backend
+
+    get_transcription_backend().load()
+    torch.set_num_threads(threads)
+
+
+def _transcribe_chunk(audio):
+    """
+    Transcribes one chunk inside a worker process.
+    """
+    from converter.transcription import get_transcription_backend
+
+    return get_transcription_backend().transcribe(audio)["text"].strip()
+
+
+def get_executor():
+    """
+    Returns the process pool for chunk transcription (created on first use
+    and kept for the lifetime of the process, like the model pool).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = chunk_worker_count()
+            threads = max(1, worker_core_share() // workers)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(threads,),
+            )
+        return _executor
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def merge_transcripts(texts, max_overlap_words=30):
+    """
+    Joins chunk transcripts and removes words that were transcribed twice
+    because of the chunk overlap.
+
+    For each pair of neighbours, the longest sequence of words that ends
+    the previous text and starts the next one is dropped from the next
+    text. Words are compared ignoring case and punctuation; tokens without
+    letters or digits (dashes, ellipses) are skipped, so they cannot break
+    a match.
+    """
+    merged = []
+    for text in texts:
+        words = text.split()
+        if not words:
+            continue
+
+        tail = [w for w in map(_normalize_word, merged[-max_overlap_words:]) if w]
+        # (normalized word, index of the word after it) of the first words
+        head = [
+            (normalized, i + 1)
+            for i, normalized in enumerate(map(_normalize_word, words[:max_overlap_words]))
+            if normalized
+        ]
+
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == [normalized for normalized, _ in head[:size]]:
+                overlap = head[size - 1][1]
+                break
+
+        merged.extend(words[overlap:])
+    return " ".join(merged)
+
+
+def transcribe_chunked(audio, on_progress=None):
+    """
+    Transcribes long audio in parallel.
+
+    - Splits the audio at silences into overlapping chunks
+    - Transcribes the chunks on the process pool
+    - Stitches the texts together in order, without duplicated words
+
+    on_progress (optional) is called with (done_chunks, total_chunks).
+    """
+    bounds = split_on_silence(
+        audio,
+        chunk_seconds=settings.WHISPER_CHUNK_SECONDS,
+        overlap_seconds=settings.WHISPER_CHUNK_OVERLAP_SECONDS,
+    )
+    logger.info(
+        "Transcribing %.0fs of audio in %d chunks on %d processes",
+        len(audio) / SAMPLE_RATE, len(bounds), chunk_worker_count(),
+    )
+
+    executor = get_executor()
+    futures = {
+        executor.submit(_transcribe_chunk, audio[start:end]): index
+        for index, (start, end) in enumerate(bounds)
+    }
+
+    texts = [""] * len(bounds)
+    for done, future in enumerate(as_completed(futures), start=1):
+        texts[futures[future]] = future.result()
+        if on_progress is not None:
+            on_progress(done, len(bounds))
+
+    return merge_transcripts(texts)
@@ -0,0 +1,134 @@
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+
+import tiktoken
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_REGEX = re.compile(r"(?<=[.!?])\s+")
+WORD_REGEX = re.compile(r"[^\W\d_]{4,}")
+FALLBACK_SENTENCE_WORDS = 40
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name):
+    """
+    Returns the (cached) tiktoken encoding, or None if it cannot be loaded.
+
+    tiktoken downloads the encoding file on first use (pre-cache it with
+    TIKTOKEN_CACHE_DIR); without network access token counts are approximated.
+    """
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning("Tiktoken encoding '%s' not available (%s), approximating token counts", name, e)
+        return None
+
+
+def count_tokens(text):
+    """
+    Counts the tokens of a text with the configured tiktoken encoding
+    (about CHARS_PER_TOKEN characters per token without it).
+    """
+    encoding = get_encoding(settings.TRANSCRIPT_TOKEN_ENCODING)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def split_tokens(text, max_tokens):
+    """
+    Splits a text into pieces of at most max_tokens tokens.
+    """
+    encoding = get_encoding(settings.TRANSCRIPT_TOKEN_ENCODING)
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text)
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def split_sentences(text):
+    """
+    Splits a transcript into sentences.
+
+    Whisper output is usually punctuated; unpunctuated transcripts
+    are split into fixed windows of words instead.
+    """
+    sentences = [s.strip() for s in SENTENCE_REGEX.split(text) if s.strip()]
+    if len(sentences) > 1:
+        return sentences
+
+    words = text.split()
+    return [
+        " ".join(words[i:i + FALLBACK_SENTENCE_WORDS])
+        for i in range(0, len(words), FALLBACK_SENTENCE_WORDS)
+    ]
+
+
+def score_sentences(sentences):
+    """
+    Scores sentences by how many frequent content words they contain
+    (simple term-frequency extractive summarization).
+    """
+    tokenized = [WORD_REGEX.findall(s.lower()) for s in sentences]
+    frequencies = Counter(word for words in tokenized for word in words)
+
+    scores = []
+    for words in tokenized:
+        if not words:
+            scores.append(0.0)
+            continue
+        scores.append(sum(frequencies[w] for w in set(words)) / len(words) ** 0.5)
+    return scores
+
+
+def condense_transcript(text, budget=None):
+    """
+    Shrinks a transcript to at most `budget` tokens.
+
+    Transcripts within the budget are returned unchanged. Longer ones are
+    split into equally sized sections (so every part of the video stays
+    represented) and the highest scoring sentences of each section are
+    kept in their original order until the section's share is used up.
+
+    Sentences larger than a section's share (e.g. unpunctuated text without
+    spaces) are split by tokens first, so every section keeps some text.
+    """
+    budget = budget or settings.TRANSCRIPT_TOKEN_BUDGET
+    total_tokens = count_tokens(text)
+    if total_tokens <= budget:
+        return text
+
+    max_sentence_tokens = max(1, budget // max(1, settings.TRANSCRIPT_CONDENSE_SECTIONS))
+    sentences = [
+        piece
+        for sentence in split_sentences(text)
+        for piece in (
+            split_tokens(sentence, max_sentence_tokens)
+            if count_tokens(sentence) > max_sentence_tokens else [sentence]
+        )
+    ]
+    scores = score_sentences(sentences)
+    token_counts = [count_tokens(s) for s in sentences]
+
+    sections = max(1, min(settings.TRANSCRIPT_CONDENSE_SECTIONS, len(sentences)))
+    section_size = -(-len(sentences) // sections)
+    section_budget = budget // sections
+
+    selected = []
+    for start in range(0, len(sentences), section_size):
+        indices = range(start, min(start + section_size, len(sentences)))
+        used = 0
+        for i in sorted(indices, key=lambda i: scores[i], reverse=True):
+            if used + token_counts[i] <= section_budget:
+                selected.append(i)
+                used += token_counts[i]
+
+    condensed = " ".join(sentences[i] for i in sorted(selected))
+    logger.info("Condensed transcript from %d to %d tokens", total_tokens, count_tokens(condensed))
+    return condensed
@@ -1,11 +1,26 @@
 import json
+import logging
 import yt_dlp
-import whisper
 import subprocess
-from google import genai
-import os
 import re
+import time
 from django.conf import settings
+from converter.captions import fetch_captions
+from converter.audio import SAMPLE_RATE, load_wav, stream_audio, trim_silence, wav_duration
+from converter.chunked import transcribe_chunked
+from converter.condense import condense_transcript, count_tokens
+from converter.llm import get_llm_backend
+from converter.metrics import log_event, metrics, timed
+from converter.preflight import AudioLimitError, check_limits, estimate_size, inspect_video, select_audio_format
+from converter.structured import QUESTION_COUNT, IncrementalQuestionParser, generate_structured_quiz
+from converter.transcript_cache import transcript_cache
+from converter.transcription import get_transcription_backend
+from converter.workspace import scratch_space
+from converter.youtube import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+CAPTIONS_CACHE_MODEL = "captions"
 
 
 class AudioConverter():
@@ -13,75 +28,289 @@ class AudioConverter():
     Converts a YouTube video into a quiz JSON.
 
     Pipeline:
+    - Use the YouTube captions if allowed and usable, otherwise:
+    - Check duration and size limits (metadata only)
     - Download audio from YouTube (yt_dlp)
     - Convert audio to a Whisper-friendly WAV format (ffmpeg)
     - Transcribe speech to text (Whisper)
     - Send transcript to Gemini to generate quiz JSON
     - Clean and parse the JSON
-    - Remove temporary files
+    - Remove temporary files (the job's scratch workspace)
     """
 
-    def __init__(self, url, username):
+    def __init__(self, url, username, on_stage=None, on_progress=None, transcript_source="auto", time_range=None):
         """
         Initializes the converter.
 
         - url: YouTube video URL
-        - username: used to build user-specific temp file paths
+        - username: part of the scratch workspace name (for debugging)
+        - on_stage: optional callback, called with the name of each pipeline stage
+        - on_progress: optional callback, called with the progress (0-100) of the current stage
+        - transcript_source: "captions" (captions first), "whisper" (always
+          transcribe) or "auto" (CAPTIONS_FIRST decides)
+        - time_range: optional (start, end) in seconds (end may be None); only
+          this part is downloaded and transcribed. Defaults to the first
+          AUDIO_CLIP_SECONDS if set. Captions are not used for ranges.
+        - video_id: normalized YouTube video ID (key of the transcript cache)
         - input_audio: path to the downloaded audio file (set later)
-        - TMP_AUDIO: path to the converted WAV file for Whisper
+        - info / audio_format: video metadata and selected format (set by preflight)
+        - expected_seconds: audio length to download (set by preflight, None if unknown)
+        - workspace: private scratch directory of this run (set before downloading)
+        - TMP_AUDIO: path to the converted WAV file for Whisper (inside the workspace)
+        - audio: in-memory 16 kHz audio (streaming mode, set later)
+        - timestamp_map: maps trimmed to original times (WHISPER_VAD, set later)
         """
         self.url = url
         self.username = username
+        self.on_stage = on_stage
+        self.on_progress = on_progress
+        if time_range is None and settings.AUDIO_CLIP_SECONDS:
+            time_range = (0, settings.AUDIO_CLIP_SECONDS)
+        self.time_range = time_range
+        self.use_captions = time_range is None and {"captions": True, "whisper": False}.get(
+            transcript_source, settings.CAPTIONS_FIRST
+        )
+        self.video_id = extract_video_id(url)
         self.input_audio = None
-        self.TMP_AUDIO = f"media/{self.username}/whisper_audio_{self.username}.wav"
+        self.info = None
+        self.audio_format = settings.CONVERTER_AUDIO_FORMAT
+        self.expected_seconds = None
+        self.scratch_bytes = None
+        self.workspace = None
+        self.audio = None
+        self.timestamp_map = None
+        self.TMP_AUDIO = None
 
     def run(self):
         """
         Executes the full conversion process.
 
         Steps:
-        - Download audio from YouTube
-        - Convert audio to WAV (mono, 16kHz)
-        - Transcribe with Whisper
+        - Look up the transcript in the transcript cache, otherwise:
+            - Download audio from YouTube
+            - Convert audio to WAV (mono, 16kHz)
+            - Transcribe with Whisper (and store it in the cache)
+        - Condense the transcript if it exceeds TRANSCRIPT_TOKEN_BUDGET
         - Generate quiz JSON with Gemini
-        - Remove Markdown code fences if present
-        - Parse JSON and return it as a Python dict
+            - LLM_STRUCTURED_OUTPUT: schema-constrained JSON, validated
+              while streaming, invalid questions are re-requested
+            - otherwise: remove Markdown code fences and parse the JSON
+        - Return the quiz as a Python dict
 
         Always runs cleanup at the end (even on errors).
+        Every step is timed (converter/metrics.py).
         """
         try:
-            self.youtube_download()
-            self.convert_audio()
-            text = self.whisper()
-            gemini_respond = self.gemini_api(text)
-            clean_text = self.strip_code_fence(gemini_respond)
-            return json.loads(clean_text)
-
-        except Exception as e:
-            print(f"Fehler in run(): {e}")
+            text = self.get_transcript()
+            self.report_stage("generate")
+            text = self.condense(text)
+            if settings.LLM_STRUCTURED_OUTPUT:
+                with timed("generate", video_id=self.video_id, structured=True):
+                    return self.structured_quiz(text)
+            with timed("generate", video_id=self.video_id):
+                gemini_respond = self.gemini_api(text)
+            metrics.observe("quizly_llm_tokens", count_tokens(gemini_respond), kind="response")
+            with timed("parse", video_id=self.video_id):
+                clean_text = self.strip_code_fence(gemini_respond)
+                return json.loads(clean_text)
+
+        except Exception:
+            logger.exception("Quiz conversion failed for video %s", self.video_id)
             raise
 
         finally:
             self.cleanup()
 
+    def report_stage(self, stage):
+        """
+        Notifies the on_stage callback (if any) about the current stage.
+        """
+        if self.on_stage is not None:
+            self.on_stage(stage)
+
+    def report_progress(self, percent):
+        """
+        Notifies the on_progress callback (if any) about the stage progress.
+        """
+        if self.on_progress is not None:
+            self.on_progress(percent)
+
+    @property
+    def transcript_key(self):
+        """
+        Model name under which the transcript is cached (the transcription
+        backend's cache name; includes the time range, partial transcripts
+        are cached separately).
+        """
+        model = get_transcription_backend().cache_name
+        if self.time_range is None:
+            return model
+        start, end = self.time_range
+        return f"{model}@{start:g}-{'' if end is None else f'{end:g}'}"
+
+    @property
+    def job_key(self):
+        """
+        Identifies the work of this converter for single flight deduplication.
+        """
+        return f"{self.video_id}-{'captions' if self.use_captions else 'whisper'}-{self.transcript_key}"
+
+    def download_hook(self, status):
+        """
+        yt_dlp progress hook: reports the downloaded percentage.
+
+        Aborts downloads that grow beyond AUDIO_MAX_FILESIZE_MB even if
+        their size was unknown up front.
+        """
+        if status.get("downloaded_bytes", 0) > settings.AUDIO_MAX_FILESIZE_MB * 1024 * 1024:
+            raise AudioLimitError(f"The audio is larger than {settings.AUDIO_MAX_FILESIZE_MB} MB.")
+
+        total = status.get("total_bytes") or status.get("total_bytes_estimate")
+        if status.get("status") == "downloading" and total:
+            self.report_progress(100 * status.get("downloaded_bytes", 0) / total)
+
+    def get_transcript(self):
+        """
+        Returns the transcript of the video.
+
+        Uses the cached transcript for (video_id, WHISPER_MODEL) if there is
+        one, otherwise downloads, converts and transcribes the audio and
+        stores the result in the cache.
+
+        With CONVERTER_STREAMING the audio is piped from yt-dlp through
+        ffmpeg into memory, so no temp files are written.
+
+        If captions are enabled (use_captions), usable YouTube captions
+        are returned instead and nothing is downloaded or transcribed.
+        """
+        if self.use_captions:
+            text = self.caption_transcript()
+            if text is not None:
+                metrics.inc("quizly_transcript_source_total", source="captions")
+                return text
+
+        metrics.inc("quizly_transcript_source_total", source="whisper")
+        text = transcript_cache.get(self.video_id, self.transcript_key)
+        metrics.inc("quizly_transcript_cache_total", result="miss" if text is None else "hit")
+        if text is not None:
+            return text
+
+        self.report_stage("download")
+        self.preflight()
+        if settings.CONVERTER_STREAMING:
+            with timed("download", video_id=self.video_id, streaming=True):
+                self.audio = stream_audio(
+                    self.url,
+                    self.audio_format,
+                    time_range=self.time_range,
+                    max_seconds=settings.AUDIO_MAX_DURATION_SECONDS,
+                    expected_seconds=self.expected_seconds,
+                    on_progress=self.report_progress,
+                )
+        else:
+            self.acquire_workspace()
+            with timed("download", video_id=self.video_id):
+                self.youtube_download()
+            self.report_stage("convert")
+            with timed("convert", video_id=self.video_id):
+                self.convert_audio()
+        self.report_stage("transcribe")
+        audio_seconds = self.audio_seconds()
+        metrics.observe("quizly_audio_duration_seconds", audio_seconds)
+        if settings.WHISPER_VAD:
+            self.trim_speech()
+            audio_seconds = self.audio_seconds()
+
+        model = get_transcription_backend().cache_name
+        started = time.perf_counter()
+        with timed("transcribe", video_id=self.video_id, model=model, audio_seconds=audio_seconds):
+            text = self.whisper()
+        elapsed = time.perf_counter() - started
+
+        if audio_seconds:
+            metrics.observe("quizly_whisper_realtime_factor", elapsed / audio_seconds, model=model)
+        metrics.observe("quizly_transcript_chars", len(text))
+
+        transcript_cache.put(self.video_id, self.transcript_key, text)
+        return text
+
+    def preflight(self):
+        """
+        Inspects the video metadata before downloading anything:
+        rejects videos beyond the duration/size limits (AudioLimitError)
+        and picks the lowest bitrate audio format that is good enough
+        for speech (AUDIO_MIN_BITRATE_KBPS).
+        """
+        with timed("preflight", video_id=self.video_id):
+            self.info = inspect_video(self.url)
+
+        audio_format = select_audio_format(self.info)
+        if audio_format is not None:
+            self.audio_format = f"{audio_format['format_id']}/{settings.CONVERTER_AUDIO_FORMAT}"
+        seconds = check_limits(self.info, audio_format, self.time_range)
+        self.expected_seconds = seconds
+        if seconds is not None:
+            download = estimate_size(audio_format, self.info.get("duration"), seconds) or 0
+            self.scratch_bytes = int(download + seconds * SAMPLE_RATE * 2)
+
+    def acquire_workspace(self):
+        """
+        Reserves a private scratch workspace for the temp files of this run
+        (converter/workspace.py), sized by the preflight estimate. Waits while
+        the global scratch budget is used up by other jobs.
+        """
+        reserved = self.scratch_bytes or settings.SCRATCH_DEFAULT_RESERVATION_MB * 1024 * 1024
+        self.workspace = scratch_space.acquire(f"{self.username}-{self.video_id}", reserved)
+        self.TMP_AUDIO = self.workspace.file("whisper_audio.wav")
+
+    def caption_transcript(self):
+        """
+        Returns the transcript from the video's captions (cached like Whisper
+        transcripts), or None if there are no usable captions.
+        """
+        text = transcript_cache.get(self.video_id, CAPTIONS_CACHE_MODEL)
+        if text is not None:
+            return text
+
+        self.report_stage("captions")
+        with timed("captions", video_id=self.video_id):
+            text, reason = fetch_captions(self.url)
+        if text is None:
+            log_event("captions_skipped", video_id=self.video_id, reason=reason)
+            return None
+
+        transcript_cache.put(self.video_id, CAPTIONS_CACHE_MODEL, text)
+        return text
+
     def youtube_download(self):
         """
-        Downloads the best available audio stream from YouTube.
+        Downloads the audio stream selected by preflight from YouTube.
 
-        - Saves it into a user-specific media folder
+        - Saves it into the scratch workspace of this run
+        - Only downloads the time range, if one is set
+        - Reuses the preflight metadata instead of extracting it again
         - Stores the final downloaded filename in self.input_audio
         """
-        tmp_filename = f"media/{self.username}/temp_audio_{self.username}.%(ext)s"
+        tmp_filename = self.workspace.file("download.%(ext)s")
         ydl_opts = {
-            "format": "bestaudio/best",
+            "format": self.audio_format,
             "outtmpl": tmp_filename,
             "quiet": True,
             "noplaylist": True,
+            "max_filesize": settings.AUDIO_MAX_FILESIZE_MB * 1024 * 1024,
+            "progress_hooks": [self.download_hook],
         }
+        if self.time_range is not None:
+            start, end = self.time_range
+            ydl_opts["download_ranges"] = yt_dlp.utils.download_range_func(
+                None, [(start, float("inf") if end is None else end)]
+            )
 
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            print("Download: Beginn")
-            info = ydl.extract_info(self.url, download=True)
+            if self.info is not None:
+                info = ydl.process_ie_result(self.info, download=True)
+            else:
+                info = ydl.extract_info(self.url, download=True)
             self.input_audio = ydl.prepare_filename(info)
 
     def convert_audio(self):
@@ -107,15 +336,73 @@ class AudioConverter():
 
     def whisper(self):
         """
-        Transcribes the WAV file into text using Whisper.
+        Transcribes the WAV file (or the in-memory audio) into text using Whisper.
+
+        Uses the configured transcription backend (TRANSCRIPTION_BACKEND,
+        converter/transcription.py) on top of the process-wide model pool,
+        so the weights are only loaded once per worker.
+
+        With WHISPER_CHUNKED, audio longer than WHISPER_CHUNK_MIN_SECONDS is
+        split at silences and transcribed in parallel on a process pool.
 
-        Loads the Whisper 'turbo' model and returns the transcript text.
+        With WHISPER_VAD, get_transcript removes non-speech regions before
+        (see trim_speech), so the VAD is timed as its own stage.
         """
-        model = whisper.load_model("turbo")
-        result = model.transcribe(self.TMP_AUDIO)
+        if settings.WHISPER_CHUNKED:
+            if self.audio is None:
+                self.audio = load_wav(self.TMP_AUDIO)
+            if len(self.audio) / SAMPLE_RATE >= settings.WHISPER_CHUNK_MIN_SECONDS:
+                return transcribe_chunked(
+                    self.audio,
+                    on_progress=lambda done, total: self.report_progress(100 * done / total)
+                )
+
+        audio = self.audio if self.audio is not None else self.TMP_AUDIO
+        result = get_transcription_backend().transcribe(audio, on_progress=self.report_progress)
         text = result["text"]
         return text
 
+    def audio_seconds(self):
+        """
+        Duration of the audio to transcribe (in memory or the WAV file).
+        """
+        return len(self.audio) / SAMPLE_RATE if self.audio is not None else wav_duration(self.TMP_AUDIO)
+
+    def trim_speech(self):
+        """
+        Cuts silence and dead air out of the 16 kHz audio (energy based VAD,
+        converter/audio.py), so Whisper neither spends time on it nor
+        hallucinates text for it. Keeps the map back to the original times.
+        """
+        if self.audio is None:
+            self.audio = load_wav(self.TMP_AUDIO)
+
+        original_samples = len(self.audio)
+        with timed("vad", video_id=self.video_id):
+            self.audio, self.timestamp_map = trim_silence(
+                self.audio,
+                min_silence_seconds=settings.WHISPER_VAD_MIN_SILENCE_SECONDS,
+                padding_seconds=settings.WHISPER_VAD_PADDING_SECONDS,
+                margin_db=settings.WHISPER_VAD_MARGIN_DB,
+                floor_db=settings.WHISPER_VAD_FLOOR_DB,
+            )
+        if original_samples:
+            metrics.observe("quizly_vad_removed_ratio", 1 - len(self.audio) / original_samples)
+
+    def condense(self, text):
+        """
+        Condenses the transcript (see converter/condense.py) and records
+        the token counts before and after.
+        """
+        with timed("condense", video_id=self.video_id):
+            tokens = count_tokens(text)
+            metrics.observe("quizly_transcript_tokens", tokens, kind="transcript")
+            condensed = condense_transcript(text)
+            if condensed is not text:
+                tokens = count_tokens(condensed)
+            metrics.observe("quizly_transcript_tokens", tokens, kind="condensed")
+        return condensed
+
     def gemini_api(self, text):
         """
         Sends the transcript to Gemini and requests a quiz in strict JSON format.
@@ -125,8 +412,37 @@ class AudioConverter():
         - 10 questions
         - 4 options per question
         - exactly one correct answer matching one of the options
+
+        The request goes through the process-wide LLM backend
+        (LLM_BACKEND), which reuses its client and retries transient errors.
+        The response is streamed, so the stage progress follows the number
+        of completed questions.
+        """
+        prompt = self.build_prompt(text)
+        metrics.observe("quizly_llm_tokens", count_tokens(prompt), kind="prompt")
+
+        parser = IncrementalQuestionParser()
+        chunks = []
+        questions = 0
+        for chunk in get_llm_backend().stream(prompt):
+            chunks.append(chunk)
+            completed = len(parser.feed(chunk))
+            if completed:
+                questions += completed
+                self.report_progress(100 * min(questions, QUESTION_COUNT) / QUESTION_COUNT)
+        return "".join(chunks)
+
+    def structured_quiz(self, text):
+        """
+        Requests the quiz as schema-constrained JSON and validates it
+        question by question while it streams in (see converter/structured.py).
+        """
+        return generate_structured_quiz(get_llm_backend(), self.build_prompt(text), text, on_progress=self.report_progress)
+
+    def build_prompt(self, text):
+        """
+        Builds the quiz generation prompt for a transcript.
         """
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
         promp = f"""{text} --->
                         Based on the following transcript, generate a quiz in valid JSON format.
 
@@ -169,25 +485,19 @@ class AudioConverter():
                     - Do not include explanations, comments, or any text outside the JSON.
                     """
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=promp
-        )
-
-        return response.text
+        return promp
 
     def cleanup(self):
         """
-        Deletes temporary audio files and removes the user folder if empty.
+        Removes the scratch workspace with all temp files of this run.
 
         Runs in 'finally' to ensure temp files are removed even if an error occurs.
+        Never raises, so the original error is not hidden. Workspaces of
+        crashed workers are reclaimed by the scratch janitor.
         """
-        for path in [self.input_audio, self.TMP_AUDIO]:
-            os.remove(path)
-
-        user_dir = f"media/{self.username}"
-        if os.path.isdir(user_dir) and not os.listdir(user_dir):
-            os.rmdir(user_dir)
+        if self.workspace is not None:
+            self.workspace.release()
+            self.workspace = None
 
     def strip_code_fence(self, text: str):
         """
@@ -0,0 +1,182 @@
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+import httpx
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from google import genai
+from google.genai import errors, types
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable_error(error):
+    """
+    Returns True for transient errors (rate limits, server errors,
+    timeouts and connection problems). Client errors such as an
+    invalid API key or a rejected prompt are not retried.
+    """
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+
+class LLMBackend():
+    """
+    Interface of the text generation backends used by AudioConverter.
+
+    The backend is selected with the LLM_BACKEND setting (dotted path).
+    """
+
+    def generate(self, prompt, schema=None):
+        """
+        Sends the prompt and returns the generated text.
+
+        If a schema (pydantic model or list of models) is given,
+        the backend should return JSON matching that schema.
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt, schema=None):
+        """
+        Yields the generated text in chunks.
+
+        Backends without streaming support yield the whole text at once.
+        """
+        yield self.generate(prompt, schema=schema)
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Gemini backend with one long-lived client per process.
+
+    - The genai client keeps its HTTP connection pool, so TLS setup
+      is only paid once per process
+    - Concurrent calls are limited by GEMINI_MAX_CONCURRENCY
+    - Every call has a timeout (GEMINI_TIMEOUT_SECONDS)
+    - Retryable errors are retried with exponential backoff and jitter
+    """
+
+    def __init__(self):
+        if not settings.GEMINI_API_KEY:
+            raise ImproperlyConfigured("GEMINI_API_KEY is not set")
+
+        self.client = genai.Client(
+            api_key=settings.GEMINI_API_KEY,
+            http_options=types.HttpOptions(timeout=int(settings.GEMINI_TIMEOUT_SECONDS * 1000)),
+        )
+        self._semaphore = threading.BoundedSemaphore(settings.GEMINI_MAX_CONCURRENCY)
+        self._retrying = Retrying(
+            retry=retry_if_exception(is_retryable_error),
+            stop=stop_after_attempt(settings.GEMINI_MAX_ATTEMPTS),
+            wait=wait_exponential_jitter(
+                initial=settings.GEMINI_RETRY_INITIAL_SECONDS,
+                max=settings.GEMINI_RETRY_MAX_SECONDS,
+            ),
+            before_sleep=lambda state: logger.warning(
+                "Gemini call failed (attempt %d): %s", state.attempt_number, state.outcome.exception()
+            ),
+            reraise=True,
+        )
+
+    def generate(self, prompt, schema=None):
+        with self._semaphore:
+            return self._retrying.copy()(self._generate_once, prompt, schema)
+
+    def stream(self, prompt, schema=None):
+        """
+        Streams the response. Retries only cover opening the stream
+        (up to the first chunk), chunks already handed out are never repeated.
+        """
+        with self._semaphore:
+            chunks = self._retrying.copy()(self._open_stream, prompt, schema)
+            for chunk in chunks:
+                if chunk.text:
+                    yield chunk.text
+
+    def _config(self, schema):
+        if schema is None:
+            return None
+        return types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=schema,
+        )
+
+    def _generate_once(self, prompt, schema):
+        response = self.client.models.generate_content(
+            model=settings.GEMINI_MODEL,
+            contents=prompt,
+            config=self._config(schema),
+        )
+        return response.text
+
+    def _open_stream(self, prompt, schema):
+        chunks = iter(self.client.models.generate_content_stream(
+            model=settings.GEMINI_MODEL,
+            contents=prompt,
+            config=self._config(schema),
+        ))
+        first = next(chunks, None)
+        return chunks if first is None else itertools.chain([first], chunks)
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Local stand-in for Gemini, for tests and benchmarks.
+
+    Builds a valid quiz JSON from the words of the transcript without any
+    network access. FAKE_LLM_LATENCY_SECONDS simulates the response time.
+    """
+
+    QUESTION_COUNT = 10
+    STREAM_CHUNK_SIZE = 64
+
+    def generate(self, prompt, schema=None):
+        if settings.FAKE_LLM_LATENCY_SECONDS:
+            time.sleep(settings.FAKE_LLM_LATENCY_SECONDS)
+
+        transcript = prompt.split("--->", 1)[0]
+        words = re.findall(r"[^\W\d_]{4,}", transcript) or ["quiz"]
+
+        requested = re.search(r"exactly (\d+) new questions", prompt)
+        if requested:
+            return json.dumps(self._questions(words, int(requested.group(1))))
+
+        return json.dumps({
+            "title": f"Quiz about {words[0]}",
+            "description": " ".join(words[:20])[:150],
+            "questions": self._questions(words, self.QUESTION_COUNT),
+        })
+
+    def stream(self, prompt, schema=None):
+        text = self.generate(prompt, schema=schema)
+        for i in range(0, len(text), self.STREAM_CHUNK_SIZE):
+            yield text[i:i + self.STREAM_CHUNK_SIZE]
+
+    def _questions(self, words, count):
+        questions = []
+        for i in range(count):
+            options = [words[(i * 4 + j) % len(words)] + f" {j + 1}" for j in range(4)]
+            questions.append({
+                "question_title": f"Question {i + 1} about {words[i % len(words)]}?",
+                "question_options": options,
+                "answer": options[i % 4],
+            })
+        return questions
+
+
+@lru_cache(maxsize=None)
+def get_llm_backend():
+    """
+    Returns the process-wide instance of the configured LLM backend.
+    """
+    return import_string(settings.LLM_BACKEND)()
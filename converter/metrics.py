@@ -0,0 +1,233 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager, suppress
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+SIZE_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+
+METRICS = {
+    "quizly_stage_duration_seconds": ("histogram", "Duration of a pipeline stage.", DURATION_BUCKETS),
+    "quizly_job_duration_seconds": ("histogram", "Duration of a quiz generation job.", DURATION_BUCKETS),
+    "quizly_jobs_total": ("counter", "Finished quiz generation jobs.", None),
+    "quizly_audio_duration_seconds": ("histogram", "Duration of the transcribed audio.", DURATION_BUCKETS),
+    "quizly_whisper_realtime_factor": ("histogram", "Transcription time divided by audio duration.", RATIO_BUCKETS),
+    "quizly_whisper_model_load_seconds": ("histogram", "Time to load Whisper weights.", DURATION_BUCKETS),
+    "quizly_whisper_transcribe_seconds": ("histogram", "Duration of one Whisper transcription call.", DURATION_BUCKETS),
+    "quizly_vad_removed_ratio": ("histogram", "Share of the audio removed as non-speech.", RATIO_BUCKETS),
+    "quizly_transcript_chars": ("histogram", "Transcript length in characters.", SIZE_BUCKETS),
+    "quizly_transcript_tokens": ("histogram", "Transcript tokens before and after condensation.", SIZE_BUCKETS),
+    "quizly_llm_tokens": ("histogram", "Prompt and response tokens of the quiz generation.", SIZE_BUCKETS),
+    "quizly_transcript_cache_total": ("counter", "Transcript cache lookups.", None),
+    "quizly_transcript_source_total": ("counter", "Transcripts taken from captions or Whisper.", None),
+}
+
+
+class MetricsRegistry():
+    """
+    Counters and histograms of the quiz pipeline.
+
+    Quiz jobs run in several processes (worker pool, chunk workers, the web
+    server), so every process keeps its own values and writes them to a
+    JSON snapshot in METRICS_DIR (at most every METRICS_FLUSH_SECONDS, after
+    each job and at exit). The /metrics endpoint merges all snapshots.
+    Snapshots that were not updated for METRICS_RETENTION_SECONDS belong
+    to processes that are gone and are removed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        """
+        Starts with empty values and a new snapshot file (also after a fork).
+        """
+        self._pid = os.getpid()
+        self._path = None
+        self._values = {}
+        self._last_flush = 0
+
+    def _ensure_process(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Increments a counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._ensure_process()
+            self._values[key] = self._values.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, value, **labels):
+        """
+        Records a value in a histogram.
+        """
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._ensure_process()
+            histogram = self._values.setdefault(key, {"buckets": [0] * len(buckets), "sum": 0, "count": 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+        self._maybe_flush()
+
+    def snapshot(self):
+        """
+        Returns the values of this process in a JSON-serializable form.
+        """
+        with self._lock:
+            self._ensure_process()
+            return [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._values.items()
+            ]
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the snapshot of this process to METRICS_DIR (atomically).
+
+        Concurrent flushes are serialized and every write goes to its own
+        temp file. Errors are logged, never raised: metrics must not fail
+        a job or a request.
+        """
+        if not settings.METRICS_ENABLED:
+            return
+
+        with self._flush_lock:
+            entries = self.snapshot()
+            if not entries:
+                return
+
+            tmp_path = None
+            try:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                if self._path is None:
+                    self._path = os.path.join(settings.METRICS_DIR, f"metrics-{self._pid}-{uuid.uuid4().hex[:8]}.json")
+                with tempfile.NamedTemporaryFile(
+                    "w", encoding="utf-8", dir=settings.METRICS_DIR, suffix=".tmp", delete=False
+                ) as f:
+                    tmp_path = f.name
+                    json.dump(entries, f)
+                os.replace(tmp_path, self._path)
+            except Exception:
+                logger.warning("Could not write the metrics snapshot", exc_info=True)
+                if tmp_path is not None:
+                    with suppress(OSError):
+                        os.remove(tmp_path)
+            finally:
+                self._last_flush = time.monotonic()
+
+    def collect(self):
+        """
+        Merges the snapshots of all processes.
+
+        Returns a dict {(name, labels): value}.
+        """
+        self.flush()
+        merged = {}
+        cutoff = time.time() - settings.METRICS_RETENTION_SECONDS
+
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "metrics-*.json")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            for entry in entries:
+                key = (entry["name"], tuple(sorted(entry["labels"].items())))
+                value = entry["value"]
+                if isinstance(value, dict):
+                    total = merged.setdefault(key, {"buckets": [0] * len(value["buckets"]), "sum": 0, "count": 0})
+                    total["buckets"] = [a + b for a, b in zip(total["buckets"], value["buckets"])]
+                    total["sum"] += value["sum"]
+                    total["count"] += value["count"]
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        values = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                if kind == "counter":
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                    continue
+                for bound, count in zip(buckets, value["buckets"]):
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {count}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{format_labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def log_event(event, **fields):
+    """
+    Writes one structured (JSON) log line, e.g. for log based dashboards.
+    """
+    logger.info(json.dumps({"event": event, **fields}, default=str))
+
+
+@contextmanager
+def timed(stage, **fields):
+    """
+    Times a pipeline stage: records it in quizly_stage_duration_seconds
+    (labelled with stage and outcome) and logs a "stage_timing" event.
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("quizly_stage_duration_seconds", elapsed, stage=stage, outcome=outcome)
+        log_event("stage_timing", stage=stage, outcome=outcome, duration_seconds=round(elapsed, 3), **fields)
+
+
+metrics = MetricsRegistry()
+atexit.register(metrics.flush)
@@ -0,0 +1,96 @@
+import yt_dlp
+from django.conf import settings
+
+
+class AudioLimitError(Exception):
+    """
+    Raised when a video exceeds the download limits (duration, size).
+    The message is shown to the user as the job error.
+    """
+
+
+def inspect_video(url):
+    """
+    Fetches the video metadata (duration, formats, live status)
+    without downloading any media.
+    """
+    with yt_dlp.YoutubeDL({"quiet": True, "noplaylist": True, "skip_download": True}) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def select_audio_format(info, min_bitrate=None):
+    """
+    Picks the audio-only format with the lowest bitrate that is still
+    good enough for speech (>= AUDIO_MIN_BITRATE_KBPS); if there is none,
+    the best one below. Returns the yt_dlp format dict or None.
+    """
+    if min_bitrate is None:
+        min_bitrate = settings.AUDIO_MIN_BITRATE_KBPS
+
+    formats = [
+        f for f in info.get("formats") or []
+        if f.get("vcodec") == "none" and f.get("acodec") not in (None, "none") and f.get("abr")
+    ]
+    good_enough = [f for f in formats if f["abr"] >= min_bitrate]
+    if good_enough:
+        return min(good_enough, key=lambda f: f["abr"])
+    return max(formats, key=lambda f: f["abr"], default=None)
+
+
+def clip_seconds(duration, time_range):
+    """
+    Returns the length in seconds of the part that will be downloaded
+    (None if unknown, e.g. for live streams).
+    """
+    if time_range is None:
+        return duration
+
+    start, end = time_range
+    if duration is not None:
+        end = duration if end is None else min(end, duration)
+    return None if end is None else max(0, end - start)
+
+
+def check_limits(info, audio_format, time_range=None):
+    """
+    Rejects videos that are too long or too large before any bytes are
+    downloaded (AUDIO_MAX_DURATION_SECONDS, AUDIO_MAX_FILESIZE_MB).
+
+    Only the selected time range counts. Live streams need a range with an
+    end. Returns the expected audio length in seconds (None if unknown).
+    """
+    duration = info.get("duration")
+    if info.get("is_live") and (time_range is None or time_range[1] is None):
+        raise AudioLimitError("Live streams are only supported with a time range.")
+    if time_range is not None and duration is not None and time_range[0] >= duration:
+        raise AudioLimitError(f"The time range starts after the end of the video ({duration:.0f} s).")
+
+    seconds = clip_seconds(duration, time_range)
+    if seconds is not None and seconds > settings.AUDIO_MAX_DURATION_SECONDS:
+        raise AudioLimitError(
+            f"The video is too long ({seconds / 60:.0f} min, limit "
+            f"{settings.AUDIO_MAX_DURATION_SECONDS / 60:.0f} min). Choose a shorter time range."
+        )
+
+    size = estimate_size(audio_format, duration, seconds)
+    if size is not None and size > settings.AUDIO_MAX_FILESIZE_MB * 1024 * 1024:
+        raise AudioLimitError(
+            f"The audio is too large ({size / 1024 / 1024:.0f} MB, limit {settings.AUDIO_MAX_FILESIZE_MB} MB)."
+        )
+    return seconds
+
+
+def estimate_size(audio_format, duration, seconds):
+    """
+    Estimates the download size in bytes from the format's (approximate)
+    file size or its bitrate, scaled to the selected time range.
+    """
+    if audio_format is None or seconds is None:
+        return None
+
+    size = audio_format.get("filesize") or audio_format.get("filesize_approx")
+    if size and duration:
+        return size * seconds / duration
+    if audio_format.get("abr"):
+        return audio_format["abr"] * 1000 / 8 * seconds
+    return None
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from filelock import FileLock, Timeout
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight():
+    """
+    Coalesces concurrent work for the same key across processes on one host.
+
+    - The first caller takes a file lock for the key and does the work
+    - Concurrent callers block on the lock; when it is released they find
+      the shared result file and return a copy of it instead of redoing the work
+    - Results are only shared for SINGLEFLIGHT_RESULT_TTL_SECONDS, so a
+      later request for the same key starts a fresh run
+    - If the first caller fails, no result is written and the next waiter
+      runs the work itself
+    """
+
+    def __init__(self, directory=None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        return Path(self._directory or settings.SINGLEFLIGHT_DIR)
+
+    def run(self, key, fn, on_wait=None):
+        """
+        Returns fn() for this key, shared with concurrent callers.
+        Without a key, fn() is simply called.
+
+        on_wait (optional) is called every SINGLEFLIGHT_HEARTBEAT_SECONDS
+        while waiting for another caller's run (e.g. a job heartbeat).
+        """
+        if not key:
+            return fn()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        result_path = self.directory / f"{key}.json"
+        lock = FileLock(str(self.directory / f"{key}.lock"))
+
+        if not self._acquire(lock, on_wait):
+            logger.warning("Timed out waiting for in-flight work on %s, running it again", key)
+            return fn()
+
+        try:
+            result = self._read_fresh(result_path)
+            if result is not None:
+                logger.info("Reusing in-flight result for %s", key)
+                return result
+
+            result = fn()
+            self._write(result_path, result)
+            return result
+        finally:
+            lock.release()
+
+    def _acquire(self, lock, on_wait):
+        """
+        Waits up to SINGLEFLIGHT_WAIT_SECONDS for the lock, calling on_wait
+        in between. Returns False on timeout.
+        """
+        deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                lock.acquire(timeout=max(0, min(remaining, settings.SINGLEFLIGHT_HEARTBEAT_SECONDS)))
+                return True
+            except Timeout:
+                if remaining <= settings.SINGLEFLIGHT_HEARTBEAT_SECONDS:
+                    return False
+                if on_wait is not None:
+                    on_wait()
+
+    def _read_fresh(self, path):
+        try:
+            if time.time() - path.stat().st_mtime > settings.SINGLEFLIGHT_RESULT_TTL_SECONDS:
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, path, result):
+        """
+        Writes the result atomically and removes expired result files.
+        """
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+        cutoff = time.time() - settings.SINGLEFLIGHT_RESULT_TTL_SECONDS
+        for old in self.directory.glob("*.json"):
+            try:
+                if old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except FileNotFoundError:
+                pass
+
+
+single_flight = SingleFlight()
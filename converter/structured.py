@@ -0,0 +1,215 @@
+import json
+import logging
+import re
+
+from django.conf import settings
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+logger = logging.getLogger(__name__)
+
+QUESTION_COUNT = 10
+QUESTIONS_KEY_REGEX = re.compile(r'(?<!\\)"questions"\s*:\s*\[')
+
+
+class QuestionPayload(BaseModel):
+    """
+    One generated question (mirrors QuizQuestionsSerializer).
+    """
+
+    question_title: str = Field(min_length=1, max_length=255)
+    question_options: list[str] = Field(min_length=4, max_length=4)
+    answer: str = Field(min_length=1, max_length=500)
+
+    @field_validator("question_options")
+    @classmethod
+    def options_are_distinct(cls, value):
+        if len({option.strip().lower() for option in value}) != len(value):
+            raise ValueError("Answer options must be distinct.")
+        return value
+
+    @model_validator(mode="after")
+    def answer_is_option(self):
+        if self.answer not in self.question_options:
+            raise ValueError("The answer must be one of the options.")
+        return self
+
+
+class QuizPayload(BaseModel):
+    """
+    Generated quiz (mirrors QuizCreateSerializer).
+    """
+
+    title: str = Field(min_length=1, max_length=255)
+    description: str = Field(max_length=255)
+    questions: list[QuestionPayload]
+
+
+class IncrementalQuestionParser():
+    """
+    Extracts complete question objects from a partially received quiz JSON.
+
+    Chunks are fed in as they arrive; every call returns the question
+    objects whose closing brace was seen in that chunk, so they can be
+    validated before the rest of the response has been generated.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+        self.closed = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self.position is None:
+            match = QUESTIONS_KEY_REGEX.search(self.buffer)
+            if match is None:
+                return []
+            self.position = match.end()
+
+        completed = []
+        while self.position < len(self.buffer) and not self.closed:
+            char = self.buffer[self.position]
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.object_start = self.position
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    completed.append(self.buffer[self.object_start:self.position + 1])
+            elif char == "]" and self.depth == 0:
+                self.closed = True
+
+            self.position += 1
+
+        return completed
+
+
+def validate_question(raw):
+    """
+    Parses and validates one question. Returns (question, error).
+    """
+    try:
+        data = json.loads(raw) if isinstance(raw, str) else raw
+        return QuestionPayload.model_validate(data), None
+    except (json.JSONDecodeError, ValidationError) as e:
+        return None, str(e)
+
+
+def parse_header(text):
+    """
+    Reads title and description of the quiz, also from a truncated
+    response where the full JSON cannot be parsed anymore.
+    """
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.IGNORECASE)
+    try:
+        data = json.loads(cleaned)
+        return data["title"], data.get("description", "")
+    except (json.JSONDecodeError, KeyError, TypeError):
+        pass
+
+    header = {}
+    for key in ("title", "description"):
+        match = re.search(rf'"{key}"\s*:\s*("(?:[^"\\]|\\.)*")', cleaned)
+        if match:
+            header[key] = json.loads(match.group(1))
+    if "title" not in header:
+        raise ValueError("The generated quiz has no title.")
+    return header["title"], header.get("description", "")
+
+
+def build_repair_prompt(transcript, count, existing, errors):
+    """
+    Asks for replacement questions only (instead of a whole new quiz).
+    """
+    titles = "\n".join(f"- {q.question_title}" for q in existing)
+    problems = "\n".join(f"- {error}" for error in errors[:5])
+    return f"""{transcript} --->
+                    Based on the transcript above, generate exactly {count} new questions as a JSON array.
+
+                    Each item must have "question_title", "question_options" (exactly 4 distinct options)
+                    and "answer" (must be one of the options).
+
+                    Do not repeat these existing questions:
+                    {titles}
+
+                    Previous answers were rejected because of:
+                    {problems}
+                    """
+
+
+def generate_structured_quiz(backend, prompt, transcript, on_progress=None):
+    """
+    Generates a quiz with schema-constrained JSON output.
+
+    - Streams the response and validates every question as soon as it is complete
+    - If some questions are invalid or missing, only those are requested again
+      (up to LLM_REPAIR_ATTEMPTS times) instead of regenerating the whole quiz
+
+    on_progress (optional) is called with the share of valid questions (0-100).
+    Returns the quiz as a dict in the format of QuizCreateSerializer.
+    """
+    parser = IncrementalQuestionParser()
+    chunks, valid, errors = [], [], []
+
+    def report():
+        if on_progress is not None:
+            on_progress(100 * min(len(valid), QUESTION_COUNT) / QUESTION_COUNT)
+
+    for chunk in backend.stream(prompt, schema=QuizPayload):
+        chunks.append(chunk)
+        for raw in parser.feed(chunk):
+            question, error = validate_question(raw)
+            if question is not None:
+                valid.append(question)
+                report()
+            else:
+                errors.append(error)
+
+    title, description = parse_header("".join(chunks))
+    valid = valid[:QUESTION_COUNT]
+
+    for attempt in range(settings.LLM_REPAIR_ATTEMPTS):
+        missing = QUESTION_COUNT - len(valid)
+        if missing <= 0:
+            break
+
+        logger.info("Re-asking for %d invalid question(s), attempt %d", missing, attempt + 1)
+        response = backend.generate(
+            build_repair_prompt(transcript, missing, valid, errors),
+            schema=list[QuestionPayload],
+        )
+        errors = []
+        try:
+            items = json.loads(response)
+        except json.JSONDecodeError as e:
+            errors.append(str(e))
+            continue
+
+        for item in items if isinstance(items, list) else []:
+            question, error = validate_question(item)
+            if question is not None and len(valid) < QUESTION_COUNT:
+                valid.append(question)
+                report()
+            elif error:
+                errors.append(error)
+
+    if len(valid) < QUESTION_COUNT:
+        raise ValueError(f"Only {len(valid)} of {QUESTION_COUNT} generated questions are valid.")
+
+    quiz = QuizPayload(title=title[:255], description=description[:255], questions=valid)
+    return quiz.model_dump()
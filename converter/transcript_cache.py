@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from quiz_app.models import TranscriptCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptCache():
+    """
+    Persistent transcript store keyed by (video id, Whisper model name).
+
+    - A hit lets AudioConverter skip download, ffmpeg and Whisper
+    - Entries older than TRANSCRIPT_CACHE_MAX_AGE_DAYS are evicted
+    - When the total size exceeds TRANSCRIPT_CACHE_MAX_BYTES, the least
+      recently used entries are evicted first
+    - Hits are stored per entry (hit_count); the hit/miss rate is in the
+      pipeline metrics (quizly_transcript_cache_total, see AudioConverter)
+    """
+
+    @property
+    def enabled(self):
+        return settings.TRANSCRIPT_CACHE_ENABLED
+
+    def get(self, video_id, model_name):
+        """
+        Returns the cached transcript text or None on a miss.
+
+        Expired entries count as a miss and are removed.
+        """
+        if not self.enabled or not video_id:
+            return None
+
+        entry = TranscriptCacheEntry.objects.filter(video_id=video_id, model_name=model_name).first()
+        if entry is None or self._is_expired(entry):
+            if entry is not None:
+                entry.delete()
+            return None
+
+        TranscriptCacheEntry.objects.filter(id=entry.id).update(
+            hit_count=F("hit_count") + 1,
+            last_used_at=timezone.now(),
+        )
+        logger.info("Transcript cache hit for %s (%s)", video_id, model_name)
+        return entry.text
+
+    def put(self, video_id, model_name, text):
+        """
+        Stores a transcript and evicts old or oversized entries afterwards.
+        """
+        if not self.enabled or not video_id:
+            return
+
+        size = len(text.encode("utf-8"))
+        if size > settings.TRANSCRIPT_CACHE_MAX_BYTES:
+            return
+
+        TranscriptCacheEntry.objects.update_or_create(
+            video_id=video_id,
+            model_name=model_name,
+            defaults={"text": text, "size_bytes": size, "last_used_at": timezone.now()},
+        )
+        self.evict()
+
+    def _is_expired(self, entry):
+        return entry.created_at < self._expiry_cutoff()
+
+    def _expiry_cutoff(self):
+        return timezone.now() - timedelta(days=settings.TRANSCRIPT_CACHE_MAX_AGE_DAYS)
+
+    def evict(self):
+        """
+        Removes expired entries, then least recently used entries
+        until the total size fits into TRANSCRIPT_CACHE_MAX_BYTES.
+
+        Returns the number of removed entries.
+        """
+        removed, _ = TranscriptCacheEntry.objects.filter(created_at__lt=self._expiry_cutoff()).delete()
+
+        total = TranscriptCacheEntry.objects.aggregate(total=Sum("size_bytes"))["total"] or 0
+        overflow = total - settings.TRANSCRIPT_CACHE_MAX_BYTES
+        if overflow <= 0:
+            return removed
+
+        evict_ids = []
+        for entry_id, size in TranscriptCacheEntry.objects.order_by("last_used_at").values_list("id", "size_bytes").iterator():
+            if overflow <= 0:
+                break
+            evict_ids.append(entry_id)
+            overflow -= size
+
+        deleted, _ = TranscriptCacheEntry.objects.filter(id__in=evict_ids).delete()
+        return removed + deleted
+
+
+transcript_cache = TranscriptCache()
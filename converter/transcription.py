@@ -0,0 +1,186 @@
+import logging
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import torch
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from converter.audio import SAMPLE_RATE, wav_duration
+from converter.whisper_pool import model_pool
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores():
+    """
+    Number of cores this process may run on (respects CPU affinity,
+    e.g. container cpusets), falling back to os.cpu_count().
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_core_share():
+    """
+    Cores per queue worker: the available cores divided by the
+    QUIZ_WORKER_COUNT worker processes (at least 1).
+    """
+    return max(1, available_cores() // max(1, settings.QUIZ_WORKER_COUNT))
+
+
+def cpu_thread_count():
+    """
+    Torch threads per transcribing process (WHISPER_CPU_THREADS,
+    0 = worker_core_share()).
+
+    Every worker transcribes on its own, so more threads than its share
+    of the cores only makes the workers compete for them.
+    """
+    return settings.WHISPER_CPU_THREADS or worker_core_share()
+
+
+class TranscriptionBackend():
+    """
+    Interface of the speech-to-text backends used by AudioConverter.
+
+    The backend is selected with the TRANSCRIPTION_BACKEND setting (dotted path).
+    """
+
+    # Name under which transcripts of this backend are cached
+    cache_name = None
+
+    def load(self):
+        """
+        Loads the model, so the first transcription does not pay for it.
+        """
+
+    def transcribe(self, audio, on_progress=None):
+        """
+        Transcribes audio (file path or 16 kHz float32 array).
+
+        on_progress (optional) is called with the transcribed percentage.
+        Returns a Whisper-style result dict with at least "text".
+        """
+        raise NotImplementedError
+
+    def warmup(self):
+        """
+        Loads the model and transcribes one second of silence.
+        """
+        self.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+
+class WhisperBackend(TranscriptionBackend):
+    """
+    openai-whisper with the pooled model (WHISPER_MODEL on WHISPER_DEVICE),
+    fp16 on GPU and fp32 on CPU.
+    """
+
+    def __init__(self, name=None, device=None):
+        self.name = name or settings.WHISPER_MODEL
+        self.device = device or settings.WHISPER_DEVICE
+
+    @property
+    def cache_name(self):
+        return self.name
+
+    def load(self):
+        model_pool.get_model(self.name, self.device)
+
+    def transcribe(self, audio, on_progress=None):
+        return model_pool.transcribe(audio, name=self.name, device=self.device, on_progress=on_progress)
+
+    def warmup(self):
+        model_pool.warmup(self.name, self.device)
+
+
+class QuantizedCPUBackend(WhisperBackend):
+    """
+    openai-whisper tuned for GPU-less workers.
+
+    - Linear layers are dynamically quantized to int8
+      (see whisper_pool.quantize_linear_layers)
+    - Torch uses the worker's share of the cores (cpu_thread_count)
+    - Decoding runs under torch.inference_mode (no autograd bookkeeping)
+
+    The int8 weights change the output slightly, so its transcripts are
+    cached separately ("<model>-int8").
+    """
+
+    def __init__(self, name=None, threads=None):
+        super().__init__(name, device="cpu")
+        self.threads = threads
+        self._configured = False
+
+    @property
+    def cache_name(self):
+        return f"{self.name}-int8"
+
+    def configure(self):
+        """
+        Sets the torch thread count once per process, so a later
+        explicit torch.set_num_threads (chunk workers) is kept.
+        """
+        if self._configured:
+            return
+        self._configured = True
+        threads = self.threads or cpu_thread_count()
+        torch.set_num_threads(threads)
+        logger.info("Quantized CPU transcription uses %d torch threads", threads)
+
+    def load(self):
+        self.configure()
+        model_pool.get_model(self.name, self.device, quantize=True)
+
+    def transcribe(self, audio, on_progress=None):
+        self.configure()
+        with torch.inference_mode():
+            return model_pool.transcribe(
+                audio, name=self.name, device=self.device, quantize=True, on_progress=on_progress, fp16=False
+            )
+
+    def warmup(self):
+        self.configure()
+        with torch.inference_mode():
+            model_pool.warmup(self.name, self.device, quantize=True, fp16=False)
+
+
+class FakeTranscriptionBackend(TranscriptionBackend):
+    """
+    Local stand-in for Whisper, for tests and benchmarks.
+
+    Sleeps FAKE_TRANSCRIPTION_RTF x the audio duration and returns a
+    synthetic transcript of about 2.5 spoken words per second.
+    """
+
+    cache_name = "fake"
+    WORDS = (
+        "energy", "photosynthesis", "chlorophyll", "sunlight", "glucose", "oxygen", "carbon",
+        "leaves", "plants", "water", "reaction", "light", "molecule", "process", "cells",
+    )
+
+    def __init__(self, name=None):
+        self.name = name
+
+    def transcribe(self, audio, on_progress=None):
+        seconds = len(audio) / SAMPLE_RATE if isinstance(audio, np.ndarray) else wav_duration(audio)
+        time.sleep(seconds * settings.FAKE_TRANSCRIPTION_RTF)
+        if on_progress is not None:
+            on_progress(100)
+        return {"text": self.transcript(seconds)}
+
+    def transcript(self, seconds):
+        words = [self.WORDS[i % len(self.WORDS)] for i in range(max(10, int(seconds * 2.5)))]
+        return ". ".join(" ".join(words[i:i + 12]).capitalize() for i in range(0, len(words), 12)) + "."
+
+
+@lru_cache(maxsize=None)
+def get_transcription_backend():
+    """
+    Returns the process-wide instance of the configured transcription backend.
+    """
+    return import_string(settings.TRANSCRIPTION_BACKEND)()
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+import types
+
+import numpy as np
+import torch
+import tqdm
+import whisper
+import whisper.transcribe
+from django.conf import settings
+
+from converter.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_progress = threading.local()
+
+
+class TranscriptionProgressBar(tqdm.tqdm):
+    """
+    Progress bar of whisper.transcribe (also when it is not shown):
+    forwards the transcribed share of the audio (0-100) to the
+    on_progress callback of the transcription running in this thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.done = 0
+
+    def update(self, n=1):
+        self.done += n
+        callback = getattr(_progress, "callback", None)
+        if callback is not None and self.total:
+            callback(min(100, 100 * self.done / self.total))
+        return super().update(n)
+
+
+# whisper.transcribe only reports progress through its tqdm bar
+whisper.transcribe.tqdm = types.SimpleNamespace(tqdm=TranscriptionProgressBar)
+
+
+def quantize_linear_layers(model):
+    """
+    Replaces the linear layers of a (CPU) Whisper model with dynamically
+    quantized int8 versions: weights are stored as int8, activations are
+    quantized on the fly. Attention and MLP projections make up most of
+    the compute, so this roughly halves the CPU inference time.
+
+    Whisper uses a Linear subclass (casts weights to the input dtype), which
+    quantize_dynamic does not match, so the layers are turned back into
+    plain nn.Linear first (same parameters; on CPU everything is fp32).
+    """
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class WhisperModelPool():
+    """
+    Process-wide registry of loaded Whisper models.
+
+    - Each (model name, device, quantized) combination is loaded at most
+      once per process
+    - Loading is guarded by a per-model lock, so concurrent first requests
+      do not load the same weights twice
+    - Transcription holds the model lock, because Whisper installs
+      decoder hooks on the shared model while it decodes
+    - Load and transcribe timings go to the pipeline metrics
+      (quizly_whisper_model_load_seconds, quizly_whisper_transcribe_seconds)
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty pool.
+
+        - _models: loaded models keyed by (name, device, quantize)
+        - _locks: one lock per model key
+        - _warm: keys that already ran their warmup transcription
+        """
+        self._models = {}
+        self._locks = {}
+        self._warm = set()
+        self._registry_lock = threading.Lock()
+
+    def _key(self, name=None, device=None, quantize=False):
+        """
+        Resolves the model key, falling back to the configured defaults.
+        """
+        return (name or settings.WHISPER_MODEL, device or settings.WHISPER_DEVICE, quantize)
+
+    @staticmethod
+    def _label(key):
+        """
+        Metrics label of a model key (like the backends' cache names).
+        """
+        name, _, quantize = key
+        return f"{name}-int8" if quantize else name
+
+    def _lock_for(self, key):
+        """
+        Returns the lock belonging to a model key (creates it on first use).
+        """
+        with self._registry_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_model(self, name=None, device=None, quantize=False):
+        """
+        Returns the loaded model, loading it on first access.
+        """
+        key = self._key(name, device, quantize)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock_for(key):
+            model = self._models.get(key)
+            if model is None:
+                model = self._load(*key)
+                self._models[key] = model
+        return model
+
+    def _load(self, name, device, quantize=False):
+        """
+        Loads the Whisper weights (int8 quantized on CPU with quantize)
+        and records the load time.
+        """
+        started = time.perf_counter()
+        if quantize:
+            model = quantize_linear_layers(whisper.load_model(name, device="cpu").eval())
+        else:
+            model = whisper.load_model(name, device=device)
+        elapsed = time.perf_counter() - started
+        metrics.observe("quizly_whisper_model_load_seconds", elapsed, model=self._label((name, device, quantize)))
+        logger.info(
+            "Whisper model '%s'%s loaded on %s in %.2fs",
+            name, " (int8)" if quantize else "", model.device, elapsed,
+        )
+        return model
+
+    def transcribe(self, audio, name=None, device=None, quantize=False, on_progress=None, **kwargs):
+        """
+        Transcribes audio (file path or 16 kHz float32 array) with a pooled model.
+
+        on_progress (optional) is called with the transcribed percentage
+        whenever Whisper finishes a 30 second window.
+
+        Returns the raw Whisper result dict.
+        """
+        key = self._key(name, device, quantize)
+        model = self.get_model(*key)
+
+        with self._lock_for(key):
+            _progress.callback = on_progress
+            started = time.perf_counter()
+            try:
+                result = model.transcribe(audio, **kwargs)
+            finally:
+                _progress.callback = None
+            elapsed = time.perf_counter() - started
+
+        metrics.observe("quizly_whisper_transcribe_seconds", elapsed, model=self._label(key))
+        logger.info("Whisper transcription with '%s' took %.2fs", key[0], elapsed)
+        return result
+
+    def warmup(self, name=None, device=None, quantize=False, **kwargs):
+        """
+        Loads the model and runs one short dummy transcription (once per
+        model), so the first real request does not pay the startup cost.
+        """
+        key = self._key(name, device, quantize)
+        with self._registry_lock:
+            if key in self._warm:
+                return
+            self._warm.add(key)
+
+        silence = np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32)
+        try:
+            self.transcribe(silence, *key, **kwargs)
+        except Exception:
+            with self._registry_lock:
+                self._warm.discard(key)
+            raise
+
+
+model_pool = WhisperModelPool()
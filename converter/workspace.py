@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = ".workspace.json"
+WORKSPACE_PREFIX = "job-"
+
+
+class ScratchSpaceExhausted(RuntimeError):
+    """
+    Raised when no scratch space became free within SCRATCH_WAIT_SECONDS.
+    """
+
+
+def default_scratch_dir():
+    """
+    SCRATCH_DIR if set, otherwise /dev/shm (tmpfs, with SCRATCH_TMPFS)
+    or the system temp directory.
+    """
+    if settings.SCRATCH_DIR:
+        return settings.SCRATCH_DIR
+    if settings.SCRATCH_TMPFS and os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm/quizly-scratch"
+    return os.path.join(tempfile.gettempdir(), "quizly-scratch")
+
+
+def directory_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ScratchWorkspace():
+    """
+    A private directory for the temp files of one job.
+
+    Removed with everything in it by release() (or when used as a
+    context manager), whatever happened to the job.
+    """
+
+    def __init__(self, path, reserved_bytes):
+        self.path = Path(path)
+        self.reserved_bytes = reserved_bytes
+
+    def file(self, name):
+        """
+        Returns the path of a file inside the workspace.
+        """
+        return str(self.path / name)
+
+    def release(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class ScratchSpace():
+    """
+    Hands out unique per-job workspaces below one scratch directory.
+
+    - Every workspace is a new directory, so concurrent jobs (also of the
+      same user) never share files
+    - All processes share a disk budget (SCRATCH_MAX_MB): a workspace counts
+      with its reservation or its actual size, whichever is larger. New jobs
+      wait (backpressure) until enough space is free, for at most
+      SCRATCH_WAIT_SECONDS; a job is always admitted when nothing else runs
+    - janitor() removes workspaces of dead processes and ones older than
+      SCRATCH_STALE_SECONDS (run at worker startup and while waiting)
+    """
+
+    def __init__(self, root=None):
+        self._root = root
+
+    @property
+    def root(self):
+        return Path(self._root or default_scratch_dir())
+
+    def _lock(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(self.root / ".budget.lock"))
+
+    def _workspaces(self):
+        """
+        Yields (path, metadata) of all workspaces; workspaces released
+        during the scan are skipped.
+        """
+        if not self.root.is_dir():
+            return
+        for path in self.root.iterdir():
+            if not path.name.startswith(WORKSPACE_PREFIX) or not path.is_dir():
+                continue
+            try:
+                with open(path / METADATA_FILE, encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                try:
+                    metadata = {"created": path.stat().st_mtime, "reserved": 0}
+                except FileNotFoundError:
+                    # released while scanning
+                    continue
+            yield path, metadata
+
+    def usage(self):
+        """
+        Returns the bytes currently accounted to workspaces.
+        """
+        return sum(max(meta.get("reserved", 0), directory_size(path)) for path, meta in self._workspaces())
+
+    def acquire(self, label, reserved_bytes, timeout=None):
+        """
+        Creates a workspace once reserved_bytes fit into the budget.
+
+        Raises ScratchSpaceExhausted after `timeout` (SCRATCH_WAIT_SECONDS) seconds.
+        """
+        budget = settings.SCRATCH_MAX_MB * 1024 * 1024
+        timeout = settings.SCRATCH_WAIT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        cleaned = False
+
+        while True:
+            with self._lock():
+                in_use = self.usage()
+                if in_use == 0 or in_use + reserved_bytes <= budget:
+                    return self._create(label, reserved_bytes)
+
+            if not cleaned:
+                cleaned = True
+                if self.janitor():
+                    continue
+            if time.monotonic() >= deadline:
+                raise ScratchSpaceExhausted(
+                    f"No scratch space available for {reserved_bytes / 1024 / 1024:.0f} MB "
+                    f"({in_use / 1024 / 1024:.0f} of {settings.SCRATCH_MAX_MB} MB in use)."
+                )
+            logger.info("Waiting for %.0f MB of scratch space", reserved_bytes / 1024 / 1024)
+            time.sleep(settings.SCRATCH_POLL_SECONDS)
+
+    def _create(self, label, reserved_bytes):
+        safe_label = re.sub(r"[^A-Za-z0-9_-]", "_", label)[:40]
+        path = self.root / f"{WORKSPACE_PREFIX}{safe_label}-{uuid.uuid4().hex[:12]}"
+        path.mkdir(parents=True)
+        with open(path / METADATA_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "pid": os.getpid(),
+                "host": socket.gethostname(),
+                "created": time.time(),
+                "reserved": reserved_bytes,
+            }, f)
+        return ScratchWorkspace(path, reserved_bytes)
+
+    def janitor(self):
+        """
+        Removes workspaces whose process is gone (on this host) or that are
+        older than SCRATCH_STALE_SECONDS. Returns the number removed.
+        """
+        host = socket.gethostname()
+        cutoff = time.time() - settings.SCRATCH_STALE_SECONDS
+        removed = 0
+
+        with self._lock():
+            for path, metadata in list(self._workspaces()):
+                dead = metadata.get("host") == host and metadata.get("pid") and not process_alive(metadata["pid"])
+                if dead or metadata.get("created", 0) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+
+        if removed:
+            logger.info("Scratch janitor removed %d stale workspace(s)", removed)
+        return removed
+
+
+scratch_space = ScratchSpace()
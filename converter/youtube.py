@@ -0,0 +1,12 @@
+import re
+
+VIDEO_ID_REGEX = re.compile(r"(?:v=|youtu\.be/|embed/|shorts/)([A-Za-z0-9_-]{11})")
+
+
+def extract_video_id(value: str):
+    """
+    Returns the 11 character YouTube video ID of a URL,
+    or None if the URL is not a supported YouTube format.
+    """
+    match = VIDEO_ID_REGEX.search(value)
+    return match.group(1) if match else None
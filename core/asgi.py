@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings
+
+# Jobs only run in this process with inline workers, otherwise in run_quiz_workers.
+if settings.WHISPER_WARMUP and settings.QUIZ_ASYNC_INLINE_WORKERS:
+    from converter.transcription import get_transcription_backend
+    get_transcription_backend().warmup()
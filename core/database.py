@@ -0,0 +1,76 @@
+"""
+Environment driven database configuration.
+
+DB_ENGINE selects the profile:
+
+- "sqlite" (default): WAL journal, busy timeout, synchronous=NORMAL and
+  IMMEDIATE transactions, so concurrent writers wait for the lock instead
+  of failing with "database is locked"
+- "postgres": persistent connections (DB_CONN_MAX_AGE) or, with
+  DB_POOL=True, psycopg's native connection pool
+  (requires `pip install "psycopg[binary,pool]"`)
+"""
+
+import os
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)) == "True"
+
+
+def sqlite_config(base_dir):
+    busy_timeout = float(os.getenv("SQLITE_BUSY_TIMEOUT", "20"))
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(busy_timeout * 1000)}",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', '20000'))}",
+    ]
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv("DB_NAME", base_dir / 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': busy_timeout,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': '; '.join(pragmas),
+        },
+    }
+
+
+def postgres_config():
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv("DB_NAME", "quizly"),
+        'USER': os.getenv("DB_USER", "quizly"),
+        'PASSWORD': os.getenv("DB_PASSWORD", ""),
+        'HOST': os.getenv("DB_HOST", "localhost"),
+        'PORT': os.getenv("DB_PORT", "5432"),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+
+    if env_bool("DB_POOL", False):
+        # Django requires CONN_MAX_AGE = 0 when the native pool is used.
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+    else:
+        config['CONN_MAX_AGE'] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
+    return config
+
+
+def database_config(base_dir):
+    """
+    Returns the 'default' database settings for the DB_ENGINE profile.
+    """
+    engine = os.getenv("DB_ENGINE", "sqlite")
+    if engine == "sqlite":
+        return sqlite_config(base_dir)
+    if engine == "postgres":
+        return postgres_config()
+    raise ValueError(f"Unsupported DB_ENGINE '{engine}' (use 'sqlite' or 'postgres')")
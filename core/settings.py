@@ -14,6 +14,8 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
+from .database import database_config
+import tempfile
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -92,12 +94,10 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# Profiles (DB_ENGINE=sqlite|postgres) are defined in core/database.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR)
 }
 
 
@@ -123,6 +123,11 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
 }
 
+# Validated access token cache (auth_app/api/authentication.py)
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_SECONDS", "60"))
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -142,5 +147,193 @@ STATIC_URL = 'static/'
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_API_KEY:
+# LLM backend (converter/llm.py)
+# LLM_BACKEND: "converter.llm.GeminiBackend" or "converter.llm.FakeLLMBackend" (tests/benchmarks)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "converter.llm.GeminiBackend")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "4"))
+GEMINI_RETRY_INITIAL_SECONDS = float(os.getenv("GEMINI_RETRY_INITIAL_SECONDS", "1"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "30"))
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "False") == "True"
+LLM_REPAIR_ATTEMPTS = int(os.getenv("LLM_REPAIR_ATTEMPTS", "2"))
+FAKE_LLM_LATENCY_SECONDS = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "0"))
+
+# Whisper model pool (converter/whisper_pool.py)
+# WHISPER_MODEL: model size/name, e.g. "tiny", "base", "small", "turbo"
+# WHISPER_DEVICE: "cpu", "cuda" or empty for automatic selection
+# WHISPER_WARMUP: load the model when a quiz worker process starts
+# (and in the ASGI application with QUIZ_ASYNC_INLINE_WORKERS)
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "turbo")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE") or None
+WHISPER_WARMUP = os.getenv("WHISPER_WARMUP", "False") == "True"
+
+# Transcription backend (converter/transcription.py)
+# TRANSCRIPTION_BACKEND: "converter.transcription.WhisperBackend" (fp32 on CPU)
+# or "converter.transcription.QuantizedCPUBackend" (int8 linear layers, for
+# workers without GPU; compare both with manage.py benchmark_transcription)
+# or "converter.transcription.FakeTranscriptionBackend" (tests/benchmarks, sleeps
+# FAKE_TRANSCRIPTION_RTF x the audio duration)
+# WHISPER_CPU_THREADS: torch threads of the quantized backend
+# (0 = available cores / QUIZ_WORKER_COUNT)
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "converter.transcription.WhisperBackend")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+FAKE_TRANSCRIPTION_RTF = float(os.getenv("FAKE_TRANSCRIPTION_RTF", "0"))
+
+# Chunked transcription (converter/chunked.py)
+# Every chunk worker process loads its own copy of the model, so size
+# WHISPER_CHUNK_WORKERS (0 = cores / QUIZ_WORKER_COUNT, per queue worker)
+# with the available RAM in mind.
+
+WHISPER_CHUNKED = os.getenv("WHISPER_CHUNKED", "False") == "True"
+WHISPER_CHUNK_MIN_SECONDS = float(os.getenv("WHISPER_CHUNK_MIN_SECONDS", "600"))
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", "120"))
+WHISPER_CHUNK_OVERLAP_SECONDS = float(os.getenv("WHISPER_CHUNK_OVERLAP_SECONDS", "3"))
+WHISPER_CHUNK_WORKERS = int(os.getenv("WHISPER_CHUNK_WORKERS", "0"))
+
+# Silence trimming before transcription (converter/audio.py: detect_speech)
+# Frames quieter than the noise floor + WHISPER_VAD_MARGIN_DB are non-speech;
+# pauses shorter than WHISPER_VAD_MIN_SILENCE_SECONDS are kept.
+
+WHISPER_VAD = os.getenv("WHISPER_VAD", "False") == "True"
+WHISPER_VAD_MIN_SILENCE_SECONDS = float(os.getenv("WHISPER_VAD_MIN_SILENCE_SECONDS", "1.0"))
+WHISPER_VAD_PADDING_SECONDS = float(os.getenv("WHISPER_VAD_PADDING_SECONDS", "0.2"))
+WHISPER_VAD_MARGIN_DB = float(os.getenv("WHISPER_VAD_MARGIN_DB", "10"))
+WHISPER_VAD_FLOOR_DB = float(os.getenv("WHISPER_VAD_FLOOR_DB", "-50"))
+
+# Quiz generation job queue (quiz_app/jobs.py, manage.py run_quiz_workers)
+# QUIZ_CONVERTER: pipeline class the workers run (the benchmark uses a local-fixture subclass)
+
+QUIZ_CONVERTER = os.getenv("QUIZ_CONVERTER", "converter.converter.AudioConverter")
+QUIZ_WORKER_COUNT = int(os.getenv("QUIZ_WORKER_COUNT", "2"))
+QUIZ_WORKER_POLL_SECONDS = float(os.getenv("QUIZ_WORKER_POLL_SECONDS", "1"))
+# QUIZ_JOB_TIMEOUT_SECONDS: a running job without progress (heartbeat) for this long counts as stale
+# QUIZ_JOB_MAX_ATTEMPTS: stale jobs are requeued until they were claimed this often, then they fail
+QUIZ_JOB_TIMEOUT_SECONDS = int(os.getenv("QUIZ_JOB_TIMEOUT_SECONDS", "900"))
+QUIZ_JOB_MAX_ATTEMPTS = int(os.getenv("QUIZ_JOB_MAX_ATTEMPTS", "3"))
+QUIZ_STALE_CHECK_SECONDS = float(os.getenv("QUIZ_STALE_CHECK_SECONDS", "60"))
+QUIZ_PROGRESS_MIN_INTERVAL_SECONDS = float(os.getenv("QUIZ_PROGRESS_MIN_INTERVAL_SECONDS", "1"))
+
+# Job progress event stream (quiz_app/api/events.py)
+# QUIZ_EVENTS_MAX_SECONDS: stream length of the async view (ASGI)
+# QUIZ_EVENTS_SYNC_MAX_SECONDS: stream length under WSGI, where every open stream holds a worker
+# thread; EventSource reconnects with Last-Event-ID afterwards
+
+QUIZ_EVENTS_POLL_SECONDS = float(os.getenv("QUIZ_EVENTS_POLL_SECONDS", "0.5"))
+QUIZ_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("QUIZ_EVENTS_KEEPALIVE_SECONDS", "15"))
+QUIZ_EVENTS_MAX_SECONDS = float(os.getenv("QUIZ_EVENTS_MAX_SECONDS", "1800"))
+QUIZ_EVENTS_SYNC_MAX_SECONDS = float(os.getenv("QUIZ_EVENTS_SYNC_MAX_SECONDS", "25"))
+
+QUIZ_IMPORT_MAX_ITEMS = int(os.getenv("QUIZ_IMPORT_MAX_ITEMS", "100"))
+
+# Async API (quiz_app/api/async_views.py), for ASGI servers such as uvicorn
+# QUIZ_API_ASYNC: serve createQuiz/, jobs/<id>/ and the quiz reads with async views
+# QUIZ_ASYNC_INLINE_WORKERS: run jobs in a thread pool of the ASGI process (0 = worker pool only)
+
+QUIZ_API_ASYNC = os.getenv("QUIZ_API_ASYNC", "False") == "True"
+QUIZ_ASYNC_INLINE_WORKERS = int(os.getenv("QUIZ_ASYNC_INLINE_WORKERS", "0"))
+
+# Quiz list pagination (quiz_app/api/pagination.py)
+
+QUIZ_PAGE_SIZE = int(os.getenv("QUIZ_PAGE_SIZE", "20"))
+QUIZ_MAX_PAGE_SIZE = int(os.getenv("QUIZ_MAX_PAGE_SIZE", "100"))
+
+# Cached quiz responses (quiz_app/api/caching.py)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quizly',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv("QUIZ_RESPONSE_CACHE_MAX_ENTRIES", "5000"))},
+    }
+}
+
+QUIZ_RESPONSE_CACHE_SECONDS = int(os.getenv("QUIZ_RESPONSE_CACHE_SECONDS", "300"))
+
+# Single-flight deduplication of concurrent jobs for the same video (converter/singleflight.py)
+
+SINGLEFLIGHT_DIR = os.getenv("SINGLEFLIGHT_DIR", os.path.join(tempfile.gettempdir(), "quizly-singleflight"))
+SINGLEFLIGHT_WAIT_SECONDS = float(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", "3600"))
+SINGLEFLIGHT_HEARTBEAT_SECONDS = float(os.getenv("SINGLEFLIGHT_HEARTBEAT_SECONDS", "30"))
+SINGLEFLIGHT_RESULT_TTL_SECONDS = float(os.getenv("SINGLEFLIGHT_RESULT_TTL_SECONDS", "300"))
+
+# Transcript cache (converter/transcript_cache.py)
+
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "True") == "True"
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = int(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+
+# Audio download (converter/converter.py, converter/audio.py)
+# CONVERTER_STREAMING: pipe yt-dlp -> ffmpeg -> memory instead of writing temp files
+# CONVERTER_AUDIO_FORMAT: yt-dlp format selector; webm/opus streams decode well from a pipe
+
+CONVERTER_STREAMING = os.getenv("CONVERTER_STREAMING", "False") == "True"
+CONVERTER_AUDIO_FORMAT = os.getenv("CONVERTER_AUDIO_FORMAT", "bestaudio[ext=webm]/bestaudio/best")
+
+# Pipeline metrics (converter/metrics.py, GET /metrics)
+# Every process writes its values to METRICS_DIR; /metrics merges them.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "quizly-metrics"))
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "10"))
+METRICS_RETENTION_SECONDS = float(os.getenv("METRICS_RETENTION_SECONDS", str(7 * 24 * 3600)))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'converter': {'handlers': ['console'], 'level': os.getenv("PIPELINE_LOG_LEVEL", "INFO")},
+        'quiz_app': {'handlers': ['console'], 'level': os.getenv("PIPELINE_LOG_LEVEL", "INFO")},
+    },
+}
+
+# Download limits (converter/preflight.py), checked from the metadata before downloading
+# AUDIO_CLIP_SECONDS: only fetch and transcribe the first N seconds (0 = whole video)
+# AUDIO_MIN_BITRATE_KBPS: lowest audio bitrate that is still good enough for speech
+
+AUDIO_MAX_DURATION_SECONDS = int(os.getenv("AUDIO_MAX_DURATION_SECONDS", str(3 * 3600)))
+AUDIO_MAX_FILESIZE_MB = int(os.getenv("AUDIO_MAX_FILESIZE_MB", "300"))
+AUDIO_CLIP_SECONDS = int(os.getenv("AUDIO_CLIP_SECONDS", "0"))
+AUDIO_MIN_BITRATE_KBPS = float(os.getenv("AUDIO_MIN_BITRATE_KBPS", "48"))
+
+# Per-job scratch workspaces (converter/workspace.py)
+# SCRATCH_TMPFS: use /dev/shm (RAM) when SCRATCH_DIR is not set
+# SCRATCH_MAX_MB: disk budget of all workspaces; new jobs wait up to SCRATCH_WAIT_SECONDS for space
+
+SCRATCH_DIR = os.getenv("SCRATCH_DIR", "")
+SCRATCH_TMPFS = os.getenv("SCRATCH_TMPFS", "False") == "True"
+SCRATCH_MAX_MB = int(os.getenv("SCRATCH_MAX_MB", "2048"))
+SCRATCH_DEFAULT_RESERVATION_MB = int(os.getenv("SCRATCH_DEFAULT_RESERVATION_MB", "200"))
+SCRATCH_WAIT_SECONDS = float(os.getenv("SCRATCH_WAIT_SECONDS", "600"))
+SCRATCH_POLL_SECONDS = float(os.getenv("SCRATCH_POLL_SECONDS", "2"))
+SCRATCH_STALE_SECONDS = float(os.getenv("SCRATCH_STALE_SECONDS", str(6 * 3600)))
+
+# Captions first (converter/captions.py)
+# CAPTIONS_FIRST: use usable YouTube captions instead of download + Whisper
+# (per request: transcript_source = "auto" | "captions" | "whisper")
+
+CAPTIONS_FIRST = os.getenv("CAPTIONS_FIRST", "False") == "True"
+CAPTIONS_LANGUAGES = [l for l in os.getenv("CAPTIONS_LANGUAGES", "en,de").split(",") if l]
+CAPTIONS_ALLOW_AUTOMATIC = os.getenv("CAPTIONS_ALLOW_AUTOMATIC", "True") == "True"
+CAPTIONS_MIN_WORDS = int(os.getenv("CAPTIONS_MIN_WORDS", "50"))
+CAPTIONS_MIN_WORDS_PER_MINUTE = float(os.getenv("CAPTIONS_MIN_WORDS_PER_MINUTE", "40"))
+CAPTIONS_MAX_NON_SPEECH_RATIO = float(os.getenv("CAPTIONS_MAX_NON_SPEECH_RATIO", "0.3"))
+
+# Transcript condensation before the Gemini prompt (converter/condense.py)
+# tiktoken downloads TRANSCRIPT_TOKEN_ENCODING on first use (set TIKTOKEN_CACHE_DIR to a
+# pre-filled directory for offline hosts); without it token counts are approximated.
+
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "8000"))
+TRANSCRIPT_TOKEN_ENCODING = os.getenv("TRANSCRIPT_TOKEN_ENCODING", "cl100k_base")
+TRANSCRIPT_CONDENSE_SECTIONS = int(os.getenv("TRANSCRIPT_CONDENSE_SECTIONS", "10"))
+
+if not GEMINI_API_KEY and LLM_BACKEND == "converter.llm.GeminiBackend":
     raise RuntimeError("GEMINI_API_KEY is not set")
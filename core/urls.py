@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('api/', include('auth_app.api.urls')),
     path('api/', include('quiz_app.api.urls'))
 ]
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.http import HttpResponse
+
+from converter.metrics import metrics as pipeline_metrics
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint with the quiz pipeline metrics
+    of all processes (see converter/metrics.py).
+
+    With METRICS_TOKEN set, requests need `Authorization: Bearer <token>`.
+    """
+    if settings.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        return HttpResponse(status=401)
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+
+    return HttpResponse(pipeline_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,277 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, ParseError, UnsupportedMediaType
+from rest_framework.request import Request
+
+from auth_app.api.authentication import CookieJWTAuthentication, cached_authentication
+from .events import astream_job_events, event_stream_headers, is_finished, job_state, state_event_id
+from .caching import etag_matches, list_cache_key, list_etag, quiz_cache_key, quiz_etag
+from .pagination import QuizCursorPagination
+from .serializers import QuizCreateURLSerializer, QuizJobSerializer, QuizModelSerializer
+from .views import QUIZ_SUMMARY_FIELDS, QuizzesViewset
+from ..jobs import run_job_inline
+from ..models import Quiz, QuizJob
+
+FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+_inline_executor = None
+_inline_tasks = set()
+
+
+def get_inline_executor():
+    """
+    Thread pool for running quiz jobs inside the ASGI process
+    (only used when QUIZ_ASYNC_INLINE_WORKERS > 0).
+    """
+    global _inline_executor
+    if _inline_executor is None:
+        _inline_executor = ThreadPoolExecutor(
+            max_workers=settings.QUIZ_ASYNC_INLINE_WORKERS,
+            thread_name_prefix="quiz-inline",
+        )
+    return _inline_executor
+
+
+class AsyncAPIView(View):
+    """
+    Base class for the async quiz endpoints (served under ASGI).
+
+    Authenticates with the shared CookieJWTAuthentication; hot tokens are
+    answered from its cache inline, only a miss is offloaded to a thread.
+    """
+
+    authentication = CookieJWTAuthentication()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Cookie JWT auth only, no session: exempt from CSRF like DRF views.
+        """
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        result = cached_authentication(request.COOKIES.get("access_token"))
+        if result is None:
+            try:
+                result = await sync_to_async(self.authentication.authenticate)(request)
+            except AuthenticationFailed as e:
+                return self.unauthorized(str(e.detail))
+
+        if result is None:
+            return self.unauthorized("Authentication credentials were not provided.")
+
+        request.user = result[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+    def unauthorized(self, detail):
+        response = JsonResponse({"detail": detail}, status=401)
+        response["WWW-Authenticate"] = self.authentication.authenticate_header(None)
+        return response
+
+    def parse_body(self, request):
+        """
+        Request data like DRF's default parsers: JSON, form and multipart
+        bodies. Raises ParseError / UnsupportedMediaType.
+        """
+        if request.content_type in FORM_CONTENT_TYPES:
+            return request.POST
+        if request.content_type != "application/json" and request.body:
+            raise UnsupportedMediaType(request.content_type)
+        try:
+            return json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            raise ParseError("Invalid JSON body.")
+
+    def not_found(self):
+        return JsonResponse({"detail": "No Quiz matches the given query."}, status=404)
+
+    async def cached_json(self, request, etag, cache_key, build_data):
+        """
+        Async variant of caching.cached_response: 304 for a matching
+        If-None-Match, otherwise cached (or freshly built) JSON.
+        """
+        if etag_matches(request, etag):
+            response = HttpResponse(status=304)
+        else:
+            data = await cache.aget(cache_key)
+            if data is None:
+                data = await build_data()
+                await cache.aset(cache_key, data, settings.QUIZ_RESPONSE_CACHE_SECONDS)
+            response = JsonResponse(data, safe=False)
+
+        response["ETag"] = etag
+        return response
+
+
+class AsyncCreateQuizView(AsyncAPIView):
+    """
+    Async version of CreateQuizView.
+
+    Enqueues the job with the async ORM and returns 202 right away. With
+    QUIZ_ASYNC_INLINE_WORKERS > 0 the job is also started in a thread pool
+    of this process, otherwise the worker pool picks it up.
+    """
+
+    async def post(self, request):
+        try:
+            payload = self.parse_body(request)
+        except (ParseError, UnsupportedMediaType) as e:
+            return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+
+        serializer = QuizCreateURLSerializer(data=payload)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        data = serializer.validated_data
+        job = await QuizJob.objects.acreate(
+            owner=request.user,
+            video_url=data['url'],
+            transcript_source=data['transcript_source'],
+            start_seconds=data.get('start_seconds'),
+            end_seconds=data.get('end_seconds')
+        )
+
+        if settings.QUIZ_ASYNC_INLINE_WORKERS:
+            future = asyncio.get_running_loop().run_in_executor(get_inline_executor(), run_job_inline, job.id)
+            _inline_tasks.add(future)
+            future.add_done_callback(_inline_tasks.discard)
+
+        return JsonResponse(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": request.build_absolute_uri(reverse("quiz_job", kwargs={"pk": job.id})),
+            },
+            status=202
+        )
+
+
+class AsyncQuizJobView(AsyncAPIView):
+    """
+    Async version of QuizJobView.
+    """
+
+    async def get(self, request, pk):
+        job = await QuizJob.objects.filter(owner=request.user, pk=pk).afirst()
+        if job is None:
+            return JsonResponse({"detail": "No QuizJob matches the given query."}, status=404)
+        return JsonResponse(QuizJobSerializer(job).data)
+
+
+class AsyncQuizJobEventsView(AsyncAPIView):
+    """
+    Async version of QuizJobEventsView: the event stream is an async
+    generator, so waiting clients do not hold a thread.
+    """
+
+    async def get(self, request, pk):
+        state = await job_state(pk, request.user).afirst()
+        if state is None:
+            return JsonResponse({"detail": "No QuizJob matches the given query."}, status=404)
+
+        last_event_id = request.headers.get("Last-Event-ID")
+        if is_finished(state) and state_event_id(state) == last_event_id:
+            return HttpResponse(status=204)
+
+        response = StreamingHttpResponse(
+            astream_job_events(pk, request.user, last_event_id),
+            content_type="text/event-stream"
+        )
+        return event_stream_headers(response)
+
+
+class AsyncQuizListView(AsyncAPIView):
+    """
+    Async version of the quizzes list (same cursor pagination,
+    ?fields= / ?include=questions and ETag handling as QuizzesViewset).
+    """
+
+    async def get(self, request):
+        state = await Quiz.objects.filter(owner=request.user).aaggregate(
+            count=Count('id'),
+            last_updated=Max('updated_at')
+        )
+        etag = list_etag(request.user.id, state['count'], state['last_updated'], request.GET.urlencode())
+
+        return await self.cached_json(
+            request,
+            etag,
+            list_cache_key(request.user.id, etag),
+            lambda: sync_to_async(self.build_page)(request)
+        )
+
+    def build_page(self, request):
+        """
+        Runs the cursor pagination (sync, executed in a worker thread).
+        """
+        drf_request = Request(request)
+        include = 'questions' in request.GET.get('include', '').split(',')
+        requested = request.GET.get('fields')
+        fields = [f for f in (requested.split(',') if requested else QUIZ_SUMMARY_FIELDS) if f in QUIZ_SUMMARY_FIELDS]
+        if include:
+            fields.append('questions')
+
+        qs = Quiz.objects.filter(owner=request.user)
+        if include:
+            qs = qs.prefetch_related('quiz_question')
+
+        paginator = QuizCursorPagination()
+        page = paginator.paginate_queryset(qs, drf_request)
+        return {
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": QuizModelSerializer(page, many=True, fields=fields or ['id']).data,
+        }
+
+
+class AsyncQuizDetailView(AsyncAPIView):
+    """
+    Async quiz detail endpoint.
+
+    GET uses the async ORM with ETag/cache handling; PUT, PATCH and
+    DELETE are delegated to the sync QuizzesViewset in a thread.
+    """
+
+    sync_view = staticmethod(QuizzesViewset.as_view({
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    }))
+
+    async def get(self, request, pk):
+        updated_at = await Quiz.objects.filter(
+            owner=request.user,
+            pk=pk
+        ).values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            return self.not_found()
+
+        etag = quiz_etag(pk, updated_at)
+        return await self.cached_json(request, etag, quiz_cache_key(request.user.id, etag), lambda: self.build(request, pk))
+
+    async def build(self, request, pk):
+        quiz = await Quiz.objects.filter(owner=request.user).prefetch_related('quiz_question').aget(pk=pk)
+        return QuizModelSerializer(quiz).data
+
+    async def put(self, request, pk):
+        return await self.delegate(request, pk)
+
+    async def patch(self, request, pk):
+        return await self.delegate(request, pk)
+
+    async def delete(self, request, pk):
+        return await self.delegate(request, pk)
+
+    async def delegate(self, request, pk):
+        response = await sync_to_async(self.sync_view)(request, pk=pk)
+        return await sync_to_async(response.render)()
@@ -0,0 +1,65 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def quiz_etag(quiz_id, updated_at):
+    """
+    Strong ETag of a single quiz, derived from its last update.
+    """
+    return f'"quiz-{quiz_id}-{updated_at.timestamp():.6f}"'
+
+
+def list_etag(user_id, count, last_updated, query_string):
+    """
+    Strong ETag of a quiz list page.
+
+    Changes when a quiz of the user is created, updated or deleted
+    (count or newest updated_at change) and differs per query string.
+    """
+    stamp = last_updated.timestamp() if last_updated else 0
+    digest = hashlib.sha1(f"{user_id}:{count}:{stamp:.6f}:{query_string}".encode()).hexdigest()
+    return f'"quizzes-{digest}"'
+
+
+def quiz_cache_key(user_id, etag):
+    return f"quiz:{user_id}:{etag}"
+
+
+def list_cache_key(user_id, etag):
+    return f"quizzes:{user_id}:{etag}"
+
+
+def etag_matches(request, etag):
+    """
+    Returns True if the request's If-None-Match header contains the ETag.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def cached_response(request, etag, cache_key, build_data):
+    """
+    Answers 304 if the client already has this version, otherwise
+    returns the cached serialized data (built and stored on a miss).
+    """
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    data = cache.get(cache_key)
+    if data is None:
+        data = build_data()
+        cache.set(cache_key, data, settings.QUIZ_RESPONSE_CACHE_SECONDS)
+
+    return Response(data, headers={"ETag": etag})
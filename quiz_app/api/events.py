@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from ..models import QuizJob
+
+JOB_EVENT_FIELDS = ("status", "stage", "progress", "quiz_id", "error")
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF negotiate `Accept: text/event-stream` (sent by EventSource).
+    Error responses are rendered as JSON text.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+def format_event(event, data, event_id=None):
+    """
+    Formats one Server-Sent Event.
+    """
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def state_event_id(state):
+    """
+    Event id of a job state. EventSource sends the last one back as
+    Last-Event-ID when it reconnects, so unchanged states are not resent.
+    """
+    return f"{state['status']}:{state['stage']}:{state['progress']}"
+
+
+def is_finished(state):
+    return state["status"] in (QuizJob.Status.DONE, QuizJob.Status.FAILED)
+
+
+def job_events(state):
+    """
+    Turns a job state into the events to send:
+    - progress: stage and stage progress while the job runs
+    - done: the resulting quiz id
+    - failed: the error message
+    """
+    event_id = state_event_id(state)
+    if state["status"] == QuizJob.Status.DONE:
+        return [format_event("done", {"quiz_id": state["quiz_id"]}, event_id)], True
+    if state["status"] == QuizJob.Status.FAILED:
+        return [format_event("failed", {"error": state["error"]}, event_id)], True
+    return [format_event("progress", {
+        "status": state["status"],
+        "stage": state["stage"],
+        "progress": state["progress"],
+    }, event_id)], False
+
+
+def job_state(job_id, owner):
+    return QuizJob.objects.filter(id=job_id, owner=owner).values(*JOB_EVENT_FIELDS)
+
+
+def stream_job_events(job_id, owner, last_event_id=None):
+    """
+    Polls the job and yields an event on every change (sync, for WSGI).
+
+    Every open stream holds a server thread, so it ends after
+    QUIZ_EVENTS_SYNC_MAX_SECONDS; EventSource then reconnects with
+    Last-Event-ID and the stream continues from there.
+    Sends a keep-alive comment every QUIZ_EVENTS_KEEPALIVE_SECONDS and
+    stops once the job is finished.
+    """
+    queryset = job_state(job_id, owner)
+    started = last_sent = time.monotonic()
+    previous_id = last_event_id
+
+    while time.monotonic() - started < settings.QUIZ_EVENTS_SYNC_MAX_SECONDS:
+        state = queryset.first()
+        if state is None:
+            return
+
+        if state_event_id(state) != previous_id:
+            previous_id = state_event_id(state)
+            events, finished = job_events(state)
+            yield from events
+            last_sent = time.monotonic()
+            if finished:
+                return
+        elif time.monotonic() - last_sent >= settings.QUIZ_EVENTS_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+
+        time.sleep(settings.QUIZ_EVENTS_POLL_SECONDS)
+
+
+async def astream_job_events(job_id, owner, last_event_id=None):
+    """
+    Async variant of stream_job_events (for ASGI, no thread is blocked
+    while waiting between polls, so streams last up to
+    QUIZ_EVENTS_MAX_SECONDS).
+    """
+    queryset = job_state(job_id, owner)
+    started = last_sent = time.monotonic()
+    previous_id = last_event_id
+
+    while time.monotonic() - started < settings.QUIZ_EVENTS_MAX_SECONDS:
+        state = await queryset.afirst()
+        if state is None:
+            return
+
+        if state_event_id(state) != previous_id:
+            previous_id = state_event_id(state)
+            events, finished = job_events(state)
+            for event in events:
+                yield event
+            last_sent = time.monotonic()
+            if finished:
+                return
+        elif time.monotonic() - last_sent >= settings.QUIZ_EVENTS_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+
+        await asyncio.sleep(settings.QUIZ_EVENTS_POLL_SECONDS)
+
+
+def event_stream_headers(response):
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class QuizCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for the quiz list.
+
+    Orders by newest first, with the id as tie breaker, so every
+    page is a bounded index range scan instead of an OFFSET query.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = settings.QUIZ_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.QUIZ_MAX_PAGE_SIZE
@@ -13,9 +13,8 @@ class IsQuizOwner(BasePermission):
         """
         Checks whether the current user
         matches the object's owner.
-        """
 
-        user = request.user
-        owner = obj.owner
+        Compares the ids, so the owner row is not loaded.
+        """
 
-        return user == owner
+        return obj.owner_id == request.user.id
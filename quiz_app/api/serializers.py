@@ -1,5 +1,7 @@
 from rest_framework import serializers, status
-from ..models import Quiz, Question
+from django.db import transaction
+from converter.youtube import extract_video_id
+from ..models import Quiz, Question, QuizJob
 import re
 
 YOUTUBE_REGEX = re.compile(
@@ -16,6 +18,22 @@ class QuizCreateURLSerializer(serializers.Serializer):
     """
 
     url = serializers.CharField(write_only=True)
+    transcript_source = serializers.ChoiceField(
+        choices=QuizJob.TranscriptSource.choices,
+        default=QuizJob.TranscriptSource.AUTO,
+        write_only=True
+    )
+    start_seconds = serializers.FloatField(min_value=0, required=False, allow_null=True, write_only=True)
+    end_seconds = serializers.FloatField(min_value=0, required=False, allow_null=True, write_only=True)
+
+    def validate(self, attrs):
+        """
+        Checks that the optional time range ends after it starts.
+        """
+        start, end = attrs.get('start_seconds'), attrs.get('end_seconds')
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError({"end_seconds": "Must be greater than start_seconds."})
+        return attrs
 
     def validate_url(self, value):
         """
@@ -29,16 +47,12 @@ class QuizCreateURLSerializer(serializers.Serializer):
         Extracts the video ID from different
         YouTube URL formats.
         """
-        match = re.search(
-            r"(?:v=|youtu\.be/|embed/|shorts/)([A-Za-z0-9_-]{11})",
-            value
-        )
-        if not match:
+        video_id = extract_video_id(value)
+        if not video_id:
             raise serializers.ValidationError(
                 "Enter a valid YouTube video URL."
             )
 
-        video_id = match.group(1)
         return f"https://www.youtube.com/watch?v={video_id}"
 
 
@@ -67,6 +81,9 @@ class QuizModelSerializer(serializers.ModelSerializer):
     """
     Serializer for displaying quiz data
     including related questions.
+
+    Accepts an optional `fields` argument to return only a subset
+    of the fields (sparse fieldsets for the list view).
     """
 
     questions = QuizQuestionsSerializer(
@@ -75,6 +92,16 @@ class QuizModelSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    def __init__(self, *args, fields=None, **kwargs):
+        """
+        Removes all fields that are not listed in `fields`.
+        """
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Quiz
         fields = [
@@ -89,6 +116,45 @@ class QuizModelSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'video_url']
 
 
+class QuizBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    List serializer for importing many quizzes at once.
+
+    Writes all quizzes with one batched INSERT and all their
+    questions with another, inside a single transaction.
+    """
+
+    def create(self, validated_data):
+        """
+        Creates all quizzes and their questions in bulk.
+        """
+        owner = None
+        quizzes = []
+        questions_data = []
+
+        for item in validated_data:
+            item = dict(item)
+            questions_data.append(item.pop('questions'))
+            if 'owner' not in item:
+                owner = owner or self.context['request'].user
+                item['owner'] = owner
+            item['video_id'] = extract_video_id(item.get('video_url', '')) or ''
+            quizzes.append(Quiz(**item))
+
+        with transaction.atomic():
+            quizzes = Quiz.objects.bulk_create(quizzes)
+            Question.objects.bulk_create(
+                [
+                    Question(quiz=quiz, **q)
+                    for quiz, questions in zip(quizzes, questions_data)
+                    for q in questions
+                ],
+                batch_size=500
+            )
+
+        return quizzes
+
+
 class QuizCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating a quiz
@@ -100,13 +166,22 @@ class QuizCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """
         Creates a quiz and its related questions.
+
+        The quiz and all questions are written in one transaction,
+        the questions with a single batched INSERT.
+        The owner is taken from save(owner=...) if given (e.g. by the
+        job worker), otherwise from the request in the context.
         """
         questions_data = validated_data.pop('questions')
-        user = self.context['request'].user
-        quiz = Quiz.objects.create(owner=user, **validated_data)
-
-        for q in questions_data:
-            Question.objects.create(quiz=quiz, **q)
+        if 'owner' not in validated_data:
+            validated_data['owner'] = self.context['request'].user
+        validated_data['video_id'] = extract_video_id(validated_data.get('video_url', '')) or ''
+
+        with transaction.atomic():
+            quiz = Quiz.objects.create(**validated_data)
+            Question.objects.bulk_create(
+                [Question(quiz=quiz, **q) for q in questions_data]
+            )
 
         return quiz
 
@@ -126,3 +201,32 @@ class QuizCreateSerializer(serializers.ModelSerializer):
             'questions': {'read_only': True},
             'owner': {'read_only': True}
         }
+        list_serializer_class = QuizBulkCreateListSerializer
+
+
+class QuizJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the status of a quiz generation job.
+    """
+
+    quiz_id = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = QuizJob
+        fields = [
+            'id',
+            'status',
+            'stage',
+            'progress',
+            'transcript_source',
+            'start_seconds',
+            'end_seconds',
+            'quiz_id',
+            'error',
+            'video_url',
+            'created_at',
+            'updated_at',
+            'started_at',
+            'finished_at'
+        ]
+        read_only_fields = fields
@@ -1,12 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from .views import QuizzesViewset, CreateQuizView
+from .views import QuizzesViewset, CreateQuizView, QuizJobView, QuizJobEventsView
 from rest_framework.routers import SimpleRouter
 
 router = SimpleRouter()
 router.register(r"quizzes", QuizzesViewset, basename="quizzes")
 
-urlpatterns = [
-    path('createQuiz/', CreateQuizView.as_view(), name='create_quiz')
-]
+if settings.QUIZ_API_ASYNC:
+    from .async_views import (
+        AsyncCreateQuizView, AsyncQuizJobView, AsyncQuizJobEventsView, AsyncQuizListView, AsyncQuizDetailView
+    )
+
+    urlpatterns = [
+        path('createQuiz/', AsyncCreateQuizView.as_view(), name='create_quiz'),
+        path('jobs/<int:pk>/', AsyncQuizJobView.as_view(), name='quiz_job'),
+        path('jobs/<int:pk>/events/', AsyncQuizJobEventsView.as_view(), name='quiz_job_events'),
+        path('quizzes/', AsyncQuizListView.as_view(), name='quizzes-list-async'),
+        path('quizzes/<int:pk>/', AsyncQuizDetailView.as_view(), name='quizzes-detail-async')
+    ]
+else:
+    urlpatterns = [
+        path('createQuiz/', CreateQuizView.as_view(), name='create_quiz'),
+        path('jobs/<int:pk>/', QuizJobView.as_view(), name='quiz_job'),
+        path('jobs/<int:pk>/events/', QuizJobEventsView.as_view(), name='quiz_job_events')
+    ]
 
 urlpatterns += router.urls
\ No newline at end of file
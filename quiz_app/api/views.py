@@ -1,21 +1,34 @@
-from converter.converter import AudioConverter
-from rest_framework import viewsets, status, mixins
+from rest_framework import viewsets, status, mixins, generics
 from rest_framework.views import APIView
-from .serializers import QuizCreateURLSerializer, QuizModelSerializer, QuizCreateSerializer
+from rest_framework.reverse import reverse
+from rest_framework.decorators import action
+from django.conf import settings
+from .serializers import QuizCreateURLSerializer, QuizModelSerializer, QuizJobSerializer, QuizCreateSerializer
 from rest_framework.response import Response
-from .authentication import CookieJWTAuthentication
+from auth_app.api.authentication import CookieJWTAuthentication
 from rest_framework.permissions import IsAuthenticated
-from ..models import Quiz
+from ..jobs import enqueue_quiz_job
+from ..models import Quiz, QuizJob
 from .permissions import IsQuizOwner
+from .pagination import QuizCursorPagination
+from .caching import cached_response, list_cache_key, list_etag, quiz_cache_key, quiz_etag
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from .events import EventStreamRenderer, event_stream_headers, is_finished, job_state, state_event_id, stream_job_events
+
+QUIZ_SUMMARY_FIELDS = ['id', 'title', 'description', 'created_at', 'updated_at', 'video_url']
 
 
 class CreateQuizView(APIView):
     """
     API endpoint to create a quiz from a YouTube video URL.
 
-    Requires authentication (JWT from cookies). It validates the URL,
-    converts the video/audio content into quiz data via AudioConverter,
-    saves the quiz + questions, and returns the created quiz.
+    Requires authentication (JWT from cookies). It validates the URL and
+    enqueues a quiz generation job. The actual work (download, Whisper,
+    Gemini) is done by the worker pool (manage.py run_quiz_workers);
+    the job status can be polled at jobs/<id>/.
     """
 
     authentication_classes = [CookieJWTAuthentication]
@@ -27,54 +40,87 @@ class CreateQuizView(APIView):
 
         Steps:
         - Validates and normalizes the YouTube URL
-        - Calls the converter to generate quiz JSON
-        - Creates the quiz in the database using serializers
-        - Returns the created quiz data
+          (optional transcript_source: "auto", "captions" or "whisper",
+          optional time range start_seconds / end_seconds)
+        - Enqueues a quiz generation job
+        - Returns 202 with the job id and the status URL
         """
 
         serilaizer_url = QuizCreateURLSerializer(data=request.data)
         serilaizer_url.is_valid(raise_exception=True)
-        url = serilaizer_url.validated_data['url']
+        data = serilaizer_url.validated_data
 
-        converted_json = self.convert_text(request.user.username, url)
+        job = enqueue_quiz_job(
+            request.user,
+            data['url'],
+            data['transcript_source'],
+            data.get('start_seconds'),
+            data.get('end_seconds')
+        )
 
-        validated_quiz = self.create_quiz(converted_json, url)
-        return Response(validated_quiz, status=status.HTTP_201_CREATED)
+        return Response(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": reverse("quiz_job", kwargs={"pk": job.id}, request=request),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
 
-    def convert_text(self, username, url):
-        """
-        Runs AudioConverter to generate quiz data (JSON) from the given URL.
 
-        If the converter fails or returns invalid JSON, it returns
-        a 422 response describing the issue.
+class QuizJobView(generics.RetrieveAPIView):
+    """
+    API endpoint to poll the status of a quiz generation job.
+
+    Returns state, current pipeline stage and the id of the
+    resulting quiz once the job is done. Only the owner can see a job.
+    """
+
+    serializer_class = QuizJobSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Returns only jobs owned by the current user.
         """
+        return QuizJob.objects.filter(owner=self.request.user)
 
-        try:
-            created_quiz = AudioConverter(url=url, username=username)
-            quiz_json = created_quiz.run()
-            return quiz_json
-        except:
-            return Response(
-                {
-                    "error": "Invalid AI response",
-                    "message": "The generated content could not be parsed as valid JSON."
-                },
-                status=status.HTTP_422_UNPROCESSABLE_ENTITY
-            )
 
-    def create_quiz(self, quiz, url):
+class QuizJobEventsView(APIView):
+    """
+    Server-Sent Events stream of a quiz generation job.
+
+    Pushes stage changes, download/transcription progress and finally
+    the quiz id (or the error), so clients do not have to poll jobs/<id>/.
+
+    Under WSGI a stream holds a worker thread, so it is closed after
+    QUIZ_EVENTS_SYNC_MAX_SECONDS and EventSource reconnects (Last-Event-ID).
+    A reconnect after the final event gets 204, which stops EventSource.
+    Long-lived streams need the async view (QUIZ_API_ASYNC under ASGI).
+    """
+
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request, pk):
         """
-        Adds the video URL to the generated quiz data, validates it with
-        QuizCreateSerializer, saves it (quiz + questions), and returns the
-        final serialized quiz response.
+        Returns the event stream for a job of the current user.
         """
+        state = job_state(pk, request.user).first()
+        if state is None:
+            raise Http404
 
-        quiz["video_url"] = url
-        create_serializer = QuizCreateSerializer(data=quiz, context={"request": self.request})
-        create_serializer.is_valid(raise_exception=True)
-        instance = create_serializer.save()
+        last_event_id = request.headers.get("Last-Event-ID")
+        if is_finished(state) and state_event_id(state) == last_event_id:
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
-        return QuizModelSerializer(instance).data
+        response = StreamingHttpResponse(
+            stream_job_events(pk, request.user, last_event_id),
+            content_type="text/event-stream"
+        )
+        return event_stream_headers(response)
 
 
 class QuizzesViewset(
@@ -88,38 +134,157 @@ class QuizzesViewset(
     ViewSet for managing quizzes.
 
     Supports:
-    - list: list quizzes (filtered to the logged-in user)
-    - retrieve: get a single quiz (intended to be user-owned)
+    - list: list quizzes (filtered to the logged-in user), cursor paginated
+      - ?include=questions adds the nested questions (omitted by default)
+      - ?fields=id,title returns only the listed fields
+    - retrieve: get a single quiz (owner-only)
     - update/partial_update: update a quiz (owner-only)
     - destroy: delete a quiz (owner-only)
+    - bulk_import: create many quizzes from an array of quiz payloads
+
+    list and retrieve send strong ETags and answer conditional requests
+    (If-None-Match) with 304; the serialized data is cached per user.
     """
 
-    queryset = Quiz.objects.all()
     serializer_class = QuizModelSerializer
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = QuizCursorPagination
+
+    def include_questions(self):
+        """
+        Returns True if the list request asks for the nested questions.
+        """
+        include = self.request.query_params.get('include', '')
+        return 'questions' in include.split(',')
+
+    def get_list_fields(self):
+        """
+        Resolves the fields of the list response from ?fields= and ?include=.
+        """
+        requested = self.request.query_params.get('fields')
+        fields = requested.split(',') if requested else list(QUIZ_SUMMARY_FIELDS)
+        fields = [field for field in fields if field in QUIZ_SUMMARY_FIELDS]
+        if self.include_questions():
+            fields.append('questions')
+        return fields or ['id']
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Uses the sparse field selection for the list action.
+        """
+        if self.action == 'list':
+            kwargs.setdefault('fields', self.get_list_fields())
+        return super().get_serializer(*args, **kwargs)
 
     def get_queryset(self):
         """
-        Controls which quizzes are returned depending on the action.
+        Returns only quizzes owned by the current user, for every action.
+
+        Ownership is enforced in SQL, so other users' quizzes answer 404.
+        Questions are prefetched in one extra query where they are
+        serialized (list only with ?include=questions, not for destroy).
+        """
+
+        qs = Quiz.objects.filter(owner=self.request.user)
+
+        if self.action == 'list':
+            if self.include_questions():
+                qs = qs.prefetch_related('quiz_question')
+            return qs
+
+        if self.action in ['retrieve', 'update', 'partial_update']:
+            return qs.prefetch_related('quiz_question')
+
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lists quizzes with an ETag derived from the number of quizzes and
+        the newest update, so unchanged lists cost one aggregate query.
+        """
+        state = Quiz.objects.filter(owner=request.user).aggregate(
+            count=Count('id'),
+            last_updated=Max('updated_at')
+        )
+        etag = list_etag(request.user.id, state['count'], state['last_updated'], request.GET.urlencode())
+
+        return cached_response(
+            request,
+            etag,
+            list_cache_key(request.user.id, etag),
+            lambda: super(QuizzesViewset, self).list(request, *args, **kwargs).data
+        )
 
-        For listing (and intended retrieve), it returns only quizzes
-        owned by the current user and optimizes queries with related loading.
-        Otherwise, it falls back to all quizzes.
+    def retrieve(self, request, *args, **kwargs):
         """
+        Returns a quiz with an ETag derived from its updated_at.
+        Cached or unchanged quizzes are answered without serializing again.
+        """
+        try:
+            updated_at = Quiz.objects.filter(
+                owner=request.user,
+                pk=kwargs['pk']
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            raise Http404
+        if updated_at is None:
+            raise Http404
 
-        if self.action in ['list', 'retrive']:
-            qs = Quiz.objects.filter(owner=self.request.user)
-            return qs.select_related('owner').prefetch_related('quiz_question')
+        etag = quiz_etag(kwargs['pk'], updated_at)
 
-        return Quiz.objects.all()
+        return cached_response(
+            request,
+            etag,
+            quiz_cache_key(request.user.id, etag),
+            lambda: super(QuizzesViewset, self).retrieve(request, *args, **kwargs).data
+        )
+
+    def perform_update(self, serializer):
+        """
+        Saves the quiz and drops the cached version of it.
+        """
+        old_etag = quiz_etag(serializer.instance.pk, serializer.instance.updated_at)
+        cache.delete(quiz_cache_key(self.request.user.id, old_etag))
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        """
+        Deletes the quiz and drops the cached version of it.
+        """
+        cache.delete(quiz_cache_key(self.request.user.id, quiz_etag(instance.pk, instance.updated_at)))
+        instance.delete()
 
     def get_permissions(self):
         """
         Applies object-level permission for destructive or modifying actions.
 
-        Only the quiz owner can update or delete.
+        Only the quiz owner can update or delete. The owner filter in
+        get_queryset already covers this; the permission stays as a guard.
         """
         if self.action in ['destroy', 'partial_update', 'update']:
-            return [IsQuizOwner()]
+            return [IsAuthenticated(), IsQuizOwner()]
         return super().get_permissions()
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Imports an array of quiz payloads (title, description,
+        video_url, questions) for the current user.
+
+        All quizzes and questions are validated first and then written
+        atomically with batched INSERTs. At most QUIZ_IMPORT_MAX_ITEMS
+        quizzes can be imported per request.
+        """
+        serializer = QuizCreateSerializer(
+            data=request.data,
+            many=True,
+            max_length=settings.QUIZ_IMPORT_MAX_ITEMS,
+            context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        quizzes = serializer.save(owner=request.user)
+
+        created = Quiz.objects.filter(id__in=[quiz.id for quiz in quizzes])
+        created = created.prefetch_related('quiz_question').order_by('id')
+        return Response(QuizModelSerializer(created, many=True).data, status=status.HTTP_201_CREATED)
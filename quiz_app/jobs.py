@@ -0,0 +1,251 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from converter.metrics import log_event, metrics, timed
+from converter.preflight import AudioLimitError
+from converter.singleflight import single_flight
+from .api.serializers import QuizCreateSerializer
+from .models import QuizJob
+
+logger = logging.getLogger(__name__)
+
+JOB_ERROR_MESSAGE = "The quiz could not be generated. Please try again later."
+
+
+def enqueue_quiz_job(owner, url, transcript_source=QuizJob.TranscriptSource.AUTO, start_seconds=None, end_seconds=None):
+    """
+    Stores a new quiz generation job in the queue and returns it.
+    """
+    return QuizJob.objects.create(
+        owner=owner,
+        video_url=url,
+        transcript_source=transcript_source,
+        start_seconds=start_seconds,
+        end_seconds=end_seconds,
+    )
+
+
+def claim_next_job(worker_name):
+    """
+    Atomically claims the oldest queued job for this worker.
+
+    The status check in the UPDATE makes sure that only one worker
+    can win a job, even when several workers poll at the same time.
+    Returns the claimed job or None if the queue is empty.
+    """
+    while True:
+        job_id = (
+            QuizJob.objects.filter(status=QuizJob.Status.QUEUED)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        job = claim_job(job_id, worker_name)
+        if job is not None:
+            return job
+
+
+def claim_job(job_id, worker_name):
+    """
+    Claims one specific queued job (counting the attempt). Returns it,
+    or None if another worker was faster.
+    """
+    claimed = QuizJob.objects.filter(id=job_id, status=QuizJob.Status.QUEUED).update(
+        status=QuizJob.Status.RUNNING,
+        worker=worker_name,
+        attempts=F("attempts") + 1,
+        started_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if claimed:
+        return QuizJob.objects.select_related("owner").get(id=job_id)
+    return None
+
+
+def touch_job(job):
+    """
+    Heartbeat of a running job: bumps updated_at, so requeue_stale_jobs
+    knows its worker is alive (stage and progress writes do the same).
+    """
+    QuizJob.objects.filter(id=job.id).update(updated_at=timezone.now())
+
+
+def set_job_stage(job, stage):
+    """
+    Persists the current pipeline stage of a running job.
+    """
+    job.stage = stage
+    job.progress = 0
+    QuizJob.objects.filter(id=job.id).update(stage=stage, progress=0, updated_at=timezone.now())
+
+
+class JobProgressReporter():
+    """
+    Persists the progress of the current stage of a job.
+
+    Writes are throttled (QUIZ_PROGRESS_MIN_INTERVAL_SECONDS), so frequent
+    yt_dlp hook calls do not turn into a database write each.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.last_write = 0
+
+    def __call__(self, percent):
+        now = time.monotonic()
+        if percent < 100 and now - self.last_write < settings.QUIZ_PROGRESS_MIN_INTERVAL_SECONDS:
+            return
+
+        self.last_write = now
+        self.job.progress = round(min(percent, 100), 1)
+        QuizJob.objects.filter(id=self.job.id).update(progress=self.job.progress, updated_at=timezone.now())
+
+
+def save_quiz(quiz_data, url, owner):
+    """
+    Validates the generated quiz JSON with QuizCreateSerializer
+    and saves it (quiz + questions) for the given owner.
+    """
+    quiz_data["video_url"] = url
+    serializer = QuizCreateSerializer(data=quiz_data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(owner=owner)
+
+
+def process_job(job):
+    """
+    Runs the full AudioConverter pipeline (QUIZ_CONVERTER) for a claimed job
+    and stores the result (quiz id or error) on the job.
+
+    Concurrent jobs for the same video share one pipeline run
+    (single flight); each job still gets its own Quiz row.
+
+    Only limit violations (AudioLimitError) are reported to the client
+    as they are; other errors may contain URLs, paths or backend details,
+    so they are logged and the job gets a generic message.
+
+    Records the job duration and outcome in the pipeline metrics.
+    """
+    started = time.perf_counter()
+    try:
+        converter = import_string(settings.QUIZ_CONVERTER)(
+            url=job.video_url,
+            username=job.owner.username,
+            on_stage=lambda stage: set_job_stage(job, stage),
+            on_progress=JobProgressReporter(job),
+            transcript_source=job.transcript_source,
+            time_range=job.time_range,
+        )
+        quiz_data = single_flight.run(converter.job_key, converter.run, on_wait=lambda: touch_job(job))
+
+        set_job_stage(job, QuizJob.Stage.SAVE)
+        with timed("save", job_id=job.id):
+            quiz = save_quiz(quiz_data, job.video_url, job.owner)
+
+        job.quiz = quiz
+        job.status = QuizJob.Status.DONE
+        job.stage = QuizJob.Stage.FINISHED
+        job.progress = 100
+    except Exception as e:
+        logger.exception("Quiz job %s failed", job.id)
+        job.status = QuizJob.Status.FAILED
+        job.error = str(e) if isinstance(e, AudioLimitError) else JOB_ERROR_MESSAGE
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["quiz", "status", "stage", "progress", "error", "finished_at", "updated_at"])
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("quizly_job_duration_seconds", elapsed, status=job.status)
+    metrics.inc("quizly_jobs_total", status=job.status)
+    metrics.flush()
+    log_event("job_finished", job_id=job.id, status=job.status, duration_seconds=round(elapsed, 3))
+    return job
+
+
+def run_job_inline(job_id):
+    """
+    Claims and processes one job in the current process.
+
+    Used by the async API (QUIZ_ASYNC_INLINE_WORKERS), which runs this
+    in a thread pool executor so the event loop is never blocked.
+    """
+    close_old_connections()
+    try:
+        job = claim_job(job_id, f"{socket.gethostname()}:{os.getpid()}:inline")
+        if job is not None:
+            process_job(job)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs():
+    """
+    Puts jobs back into the queue whose worker died while running them.
+
+    A job counts as stale when it has been running without a heartbeat
+    (updated_at: stage, progress or touch_job writes) for longer than
+    QUIZ_JOB_TIMEOUT_SECONDS, so long videos that still make progress
+    are left alone. Stale jobs that were already claimed
+    QUIZ_JOB_MAX_ATTEMPTS times fail instead of being requeued.
+
+    Returns the number of requeued jobs.
+    """
+    stale = QuizJob.objects.filter(
+        status=QuizJob.Status.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=settings.QUIZ_JOB_TIMEOUT_SECONDS),
+    )
+    failed = stale.filter(attempts__gte=settings.QUIZ_JOB_MAX_ATTEMPTS).update(
+        status=QuizJob.Status.FAILED,
+        error=JOB_ERROR_MESSAGE,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if failed:
+        logger.warning("Failed %d stale job(s) after %d attempts", failed, settings.QUIZ_JOB_MAX_ATTEMPTS)
+
+    return stale.update(status=QuizJob.Status.QUEUED, stage=QuizJob.Stage.PENDING, progress=0, worker="")
+
+
+def worker_loop(poll_interval=None, max_jobs=None):
+    """
+    Main loop of a single queue worker.
+
+    Claims and processes jobs one after another and sleeps
+    for poll_interval seconds whenever the queue is empty.
+
+    Every QUIZ_STALE_CHECK_SECONDS it also requeues stale jobs, so the job
+    of a crashed worker is picked up again while the others keep running.
+    """
+    poll_interval = poll_interval or settings.QUIZ_WORKER_POLL_SECONDS
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    last_stale_check = time.monotonic()
+
+    while max_jobs is None or processed < max_jobs:
+        close_old_connections()
+        if time.monotonic() - last_stale_check >= settings.QUIZ_STALE_CHECK_SECONDS:
+            last_stale_check = time.monotonic()
+            requeued = requeue_stale_jobs()
+            if requeued:
+                logger.warning("Worker %s requeued %d stale job(s)", worker_name, requeued)
+
+        job = claim_next_job(worker_name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        logger.info("Worker %s picked up quiz job %s", worker_name, job.id)
+        process_job(job)
+        processed += 1
@@ -0,0 +1,380 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from converter.audio import SAMPLE_RATE, wav_duration
+from converter.converter import AudioConverter
+from converter.preflight import check_limits
+from converter.llm import get_llm_backend
+from converter.transcription import get_transcription_backend
+from quiz_app.jobs import run_job_inline
+from quiz_app.models import Quiz, QuizJob
+
+BENCH_USERNAME_PREFIX = "bench_pipeline_"
+
+
+class LocalAudioConverter(AudioConverter):
+    """
+    AudioConverter that "downloads" a local audio fixture instead of a
+    YouTube video. Without ffmpeg, 16 kHz mono WAV fixtures are used as is.
+    """
+
+    fixtures = {}
+
+    def preflight(self):
+        source = self.fixtures[self.video_id]
+        check_limits({"duration": wav_duration(source)}, None, self.time_range)
+        self.scratch_bytes = 2 * os.path.getsize(source)
+
+    def youtube_download(self):
+        source = self.fixtures[self.video_id]
+        self.input_audio = self.workspace.file(f"download{os.path.splitext(source)[1]}")
+        shutil.copyfile(source, self.input_audio)
+
+    def convert_audio(self):
+        if shutil.which("ffmpeg"):
+            return super().convert_audio()
+        shutil.copyfile(self.input_audio, self.TMP_AUDIO)
+
+
+def write_fixture(path, seconds):
+    """
+    Writes a speech-like 16 kHz mono WAV: tone bursts of varying pitch
+    separated by short pauses (deterministic, so runs are comparable).
+    """
+    rng = np.random.default_rng(int(seconds))
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    position = 0
+    while position < len(audio):
+        burst = int(rng.uniform(0.3, 2.0) * SAMPLE_RATE)
+        t = np.arange(min(burst, len(audio) - position)) / SAMPLE_RATE
+        audio[position:position + len(t)] = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t)
+        position += burst + int(rng.uniform(0.1, 0.6) * SAMPLE_RATE)
+
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+
+@contextmanager
+def settings_overridden(**overrides):
+    """
+    Sets Django settings for the duration of the benchmark and
+    restores the previous values afterwards.
+    """
+    missing = object()
+    previous = {name: getattr(settings, name, missing) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is missing:
+                delattr(settings, name)
+            else:
+                setattr(settings, name, value)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+
+class StageTimingCollector(logging.Handler):
+    """
+    Collects the structured stage_timing / job_finished log events
+    of converter/metrics.py.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            event = json.loads(record.getMessage())
+        except ValueError:
+            return
+        with self._lock:
+            self.events.append(event)
+
+    def reset(self):
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+
+class Command(BaseCommand):
+    """
+    Offline end-to-end benchmark of quiz creation.
+
+    Runs AudioConverter ("converter" mode) and the full API path
+    ("api" mode: POST createQuiz/, job processing, saving the quiz)
+    against local audio fixtures instead of YouTube, with the
+    FakeLLMBackend instead of Gemini. Whisper is replaced by the
+    FakeTranscriptionBackend (sleeping --stub-rtf x audio duration) unless
+    --whisper-model is given. The stand-ins are selected through the
+    QUIZ_CONVERTER / LLM_BACKEND / TRANSCRIPTION_BACKEND settings.
+
+    The quizzes and jobs of the api mode belong to a throwaway user that
+    is deleted (with them) at the end.
+
+    Reports throughput and end-to-end / per-stage latency percentiles for
+    each concurrency level. --save-baseline stores the results as JSON,
+    --baseline compares against such a file and fails on regressions.
+    """
+
+    help = "Benchmarks the quiz creation pipeline offline against local audio fixtures."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=["converter", "api", "both"], default="both")
+        parser.add_argument("--concurrency", default="1,2,4",
+                            help="Comma separated concurrency levels.")
+        parser.add_argument("--requests", type=int, default=8,
+                            help="Requests per concurrency level.")
+        parser.add_argument("--audio", action="append", default=[],
+                            help="Audio fixture file (repeatable). Default: generated WAVs.")
+        parser.add_argument("--durations", default="30,120",
+                            help="Seconds of the generated fixtures (without --audio).")
+        parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "quizly-bench-fixtures"))
+        parser.add_argument("--whisper-model", default="",
+                            help="Use a real Whisper model (e.g. tiny) instead of the stub.")
+        parser.add_argument("--stub-rtf", type=float, default=0.05,
+                            help="Real-time factor of the Whisper stub.")
+        parser.add_argument("--llm-latency", type=float, default=0.0,
+                            help="Simulated LLM latency in seconds.")
+        parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed relative slowdown before a regression is reported.")
+        parser.add_argument("--save-baseline", help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        fixtures = options["audio"] or self.generate_fixtures(options["fixtures_dir"], options["durations"])
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        modes = ["converter", "api"] if options["mode"] == "both" else [options["mode"]]
+        count = options["requests"]
+
+        user = User.objects.create(username=f"{BENCH_USERNAME_PREFIX}{uuid.uuid4().hex[:12]}")
+        collector = StageTimingCollector()
+        results = {}
+
+        with ExitStack() as stack:
+            stack.enter_context(self.offline_environment(options))
+            stack.enter_context(self.collect_events(collector))
+            try:
+                for mode in modes:
+                    results[mode] = {}
+                    for level in levels:
+                        results[mode][str(level)] = self.run_level(mode, level, count, user, fixtures, collector)
+                        self.report(mode, level, results[mode][str(level)])
+            finally:
+                QuizJob.objects.filter(owner=user).delete()
+                Quiz.objects.filter(owner=user).delete()
+                user.delete()
+                get_llm_backend.cache_clear()
+                get_transcription_backend.cache_clear()
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["tolerance"])
+
+    def generate_fixtures(self, directory, durations):
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for seconds in (float(d) for d in durations.split(",")):
+            path = os.path.join(directory, f"fixture_{int(seconds)}s.wav")
+            if not os.path.exists(path):
+                write_fixture(path, seconds)
+            paths.append(path)
+        return paths
+
+    def offline_environment(self, options):
+        """
+        Settings for an offline run: local fixtures (LocalAudioConverter),
+        FakeLLMBackend, no caches, no metrics snapshots and (optionally)
+        the FakeTranscriptionBackend.
+
+        Single flight results, metrics and scratch files go to a temp dir of
+        this run, so results of an earlier run (same video ids) are not reused.
+        """
+        stack = ExitStack()
+        run_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="quizly-bench-"))
+        overrides = {
+            "SINGLEFLIGHT_DIR": os.path.join(run_dir, "singleflight"),
+            "METRICS_DIR": os.path.join(run_dir, "metrics"),
+            "SCRATCH_DIR": os.path.join(run_dir, "scratch"),
+            "QUIZ_CONVERTER": f"{__name__}.LocalAudioConverter",
+            "LLM_BACKEND": "converter.llm.FakeLLMBackend",
+            "FAKE_LLM_LATENCY_SECONDS": options["llm_latency"],
+            "TRANSCRIPT_CACHE_ENABLED": False,
+            "CONVERTER_STREAMING": False,
+            "CAPTIONS_FIRST": False,
+            "METRICS_ENABLED": False,
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        }
+        if options["whisper_model"]:
+            overrides["WHISPER_MODEL"] = options["whisper_model"]
+        else:
+            overrides["TRANSCRIPTION_BACKEND"] = "converter.transcription.FakeTranscriptionBackend"
+            overrides["FAKE_TRANSCRIPTION_RTF"] = options["stub_rtf"]
+            overrides["WHISPER_CHUNKED"] = False
+
+        stack.enter_context(settings_overridden(**overrides))
+        get_llm_backend.cache_clear()
+        get_transcription_backend.cache_clear()
+        return stack
+
+    def collect_events(self, collector):
+        """
+        Routes the structured pipeline logs into the collector
+        (and keeps them off the console while the benchmark runs).
+        """
+        stack = ExitStack()
+        pipeline_logger = logging.getLogger("converter.metrics")
+        stack.callback(setattr, pipeline_logger, "propagate", pipeline_logger.propagate)
+        stack.callback(pipeline_logger.setLevel, pipeline_logger.level)
+        pipeline_logger.propagate = False
+        pipeline_logger.setLevel(logging.INFO)
+        pipeline_logger.addHandler(collector)
+        stack.callback(pipeline_logger.removeHandler, collector)
+        return stack
+
+    def run_level(self, mode, level, count, user, fixtures, collector):
+        """
+        Runs `count` requests with `level` concurrent threads and
+        returns throughput and latency percentiles.
+        """
+        LocalAudioConverter.fixtures = {}
+        requests = []
+        for i in range(count):
+            video_id = f"bench{level:02d}{i:04d}"
+            LocalAudioConverter.fixtures[video_id] = fixtures[i % len(fixtures)]
+            requests.append((user, f"https://youtu.be/{video_id}"))
+
+        run = self.run_converter if mode == "converter" else self.run_api
+        collector.reset()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            latencies = list(executor.map(lambda request: run(*request), requests))
+        elapsed = time.perf_counter() - started
+
+        stages = {}
+        for event in collector.reset():
+            if event.get("event") == "stage_timing":
+                stages.setdefault(event["stage"], []).append(event["duration_seconds"])
+
+        return {
+            "throughput_per_second": count / elapsed,
+            "failed": sum(1 for latency in latencies if latency is None),
+            "latency": self.summarize({"end_to_end": [l for l in latencies if l is not None], **stages}),
+        }
+
+    def run_converter(self, user, url):
+        started = time.perf_counter()
+        try:
+            LocalAudioConverter(url=url, username=user.username).run()
+        except Exception as e:
+            self.stderr.write(f"Converter run for {url} failed: {e}")
+            return None
+        return time.perf_counter() - started
+
+    def run_api(self, user, url):
+        """
+        POSTs to createQuiz/ and processes the job in this thread,
+        like a queue worker would.
+        """
+        close_old_connections()
+        try:
+            client = APIClient()
+            client.cookies["access_token"] = str(AccessToken.for_user(user))
+            started = time.perf_counter()
+            response = client.post(reverse("create_quiz"), {"url": url}, format="json")
+            if response.status_code != 202:
+                self.stderr.write(f"createQuiz returned {response.status_code} for {url}")
+                return None
+            run_job_inline(response.json()["job_id"])
+            if not QuizJob.objects.filter(id=response.json()["job_id"], status=QuizJob.Status.DONE).exists():
+                return None
+            return time.perf_counter() - started
+        finally:
+            close_old_connections()
+
+    def summarize(self, samples):
+        return {
+            name: {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+            }
+            for name, values in samples.items() if values
+        }
+
+    def report(self, mode, level, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{mode} | concurrency {level}: {result['throughput_per_second']:.2f} req/s, {result['failed']} failed"
+        ))
+        for name, stats in result["latency"].items():
+            self.stdout.write(
+                f"  {name:<12} n={stats['count']:<4} p50 {stats['p50'] * 1000:9.1f} ms"
+                f"  p95 {stats['p95'] * 1000:9.1f} ms  p99 {stats['p99'] * 1000:9.1f} ms"
+            )
+
+    def compare(self, results, path, tolerance):
+        """
+        Compares throughput and p50/p95 latencies with a stored baseline.
+        Latency differences below 5 ms are ignored as noise.
+        """
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for mode, levels in results.items():
+            for level, result in levels.items():
+                base = baseline.get(mode, {}).get(level)
+                if base is None:
+                    continue
+                if result["throughput_per_second"] < base["throughput_per_second"] * (1 - tolerance):
+                    regressions.append(
+                        f"{mode}/{level} throughput {result['throughput_per_second']:.2f}"
+                        f" < baseline {base['throughput_per_second']:.2f} req/s"
+                    )
+                for name, stats in result["latency"].items():
+                    base_stats = base["latency"].get(name)
+                    if base_stats is None:
+                        continue
+                    for q in ("p50", "p95"):
+                        if stats[q] > base_stats[q] * (1 + tolerance) and stats[q] - base_stats[q] > 0.005:
+                            regressions.append(
+                                f"{mode}/{level} {name} {q} {stats[q] * 1000:.1f} ms"
+                                f" > baseline {base_stats[q] * 1000:.1f} ms"
+                            )
+
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path} (tolerance {tolerance:.0%})."))
@@ -0,0 +1,113 @@
+import random
+import statistics
+import string
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quiz_app.models import Quiz
+
+BENCH_USER_PREFIX = "bench_quiz_user_"
+
+
+def random_video_id():
+    return "".join(random.choices(string.ascii_letters + string.digits + "-_", k=11))
+
+
+class Command(BaseCommand):
+    """
+    Measures how the quiz list and video lookup queries scale with the
+    number of quizzes (e.g. up to 1M rows).
+
+    Inserts synthetic quizzes in steps and times both queries at each
+    step. The benchmark users and their quizzes are removed afterwards
+    unless --keep is given. Run it against a scratch database.
+    """
+
+    help = "Benchmarks quiz list / video_id lookup latency for growing table sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--steps", default="10000,100000,1000000",
+                            help="Comma separated table sizes to measure at.")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50,
+                            help="Query repetitions per measurement.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--keep", action="store_true",
+                            help="Keep the generated data.")
+
+    def handle(self, *args, **options):
+        steps = sorted(int(step) for step in options["steps"].split(","))
+        users = self.create_users(options["users"])
+        video_ids = []
+        inserted = 0
+
+        try:
+            for target in steps:
+                inserted = self.fill(users, video_ids, inserted, target, options["batch_size"])
+                self.measure(target, users, video_ids, options["repeat"])
+        finally:
+            if not options["keep"]:
+                User.objects.filter(username__startswith=BENCH_USER_PREFIX).delete()
+
+    def create_users(self, count):
+        User.objects.bulk_create(
+            [User(username=f"{BENCH_USER_PREFIX}{i}") for i in range(count)],
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(username__startswith=BENCH_USER_PREFIX).values_list("id", flat=True))
+
+    def fill(self, users, video_ids, inserted, target, batch_size):
+        """
+        Inserts quizzes until the benchmark owns `target` rows.
+        """
+        while inserted < target:
+            size = min(batch_size, target - inserted)
+            batch = []
+            for _ in range(size):
+                video_id = random_video_id()
+                if len(video_ids) < 1000:
+                    video_ids.append(video_id)
+                batch.append(Quiz(
+                    owner_id=random.choice(users),
+                    title="Benchmark quiz",
+                    description="",
+                    video_url=f"https://www.youtube.com/watch?v={video_id}",
+                    video_id=video_id,
+                ))
+            with transaction.atomic():
+                Quiz.objects.bulk_create(batch)
+            inserted += size
+        return inserted
+
+    def measure(self, size, users, video_ids, repeat):
+        """
+        Times the recency-ordered owner list and the video lookup.
+        """
+        owner_id = random.choice(users)
+        queries = {
+            "owner list (page 1)": lambda: list(
+                Quiz.objects.filter(owner_id=owner_id).order_by("-created_at", "-id")[:20]
+            ),
+            "video_id lookup": lambda: list(
+                Quiz.objects.filter(video_id=random.choice(video_ids))[:20]
+            ),
+        }
+
+        self.stdout.write(f"\n{size} quizzes")
+        for name, query in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(
+                f"  {name:<22} median {statistics.median(timings):7.3f} ms"
+                f"  max {max(timings):7.3f} ms"
+            )
+
+        plan = Quiz.objects.filter(owner_id=owner_id).order_by("-created_at", "-id")[:20].explain()
+        self.stdout.write(f"  plan: {plan}")
@@ -0,0 +1,197 @@
+import json
+import os
+import re
+import shutil
+import time
+
+import torch
+import whisper
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from converter.audio import SAMPLE_RATE, load_wav
+from converter.transcription import cpu_thread_count
+
+DEFAULT_BACKENDS = (
+    "converter.transcription.WhisperBackend,"
+    "converter.transcription.QuantizedCPUBackend"
+)
+
+
+def normalize_words(text):
+    """
+    Lower-cased words without punctuation, as usual for WER.
+    """
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Returns (errors, reference words): the word-level edit distance
+    (substitutions + deletions + insertions) and the reference length.
+    WER is errors / reference words.
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_audio(path):
+    """
+    Decodes an audio file to 16 kHz mono float32. Without ffmpeg,
+    only 16 kHz mono WAV files can be read.
+    """
+    if shutil.which("ffmpeg"):
+        return whisper.load_audio(path)
+    return load_wav(path)
+
+
+class Command(BaseCommand):
+    """
+    Compares transcription backends on local audio files.
+
+    Every backend loads its model (load time is reported separately),
+    warms up and transcribes all files --repeat times. All backends run
+    with the same torch thread count (--threads), so only the backend
+    differs. Reports per backend:
+    - RTF: transcription time / audio duration (lower is faster)
+    - WER against a reference transcript (<audio file>.txt next to the
+      audio) or, without one, against the first backend's output
+      (the current path), i.e. how much the output changed
+
+    --json writes the results (including the transcripts) to a file.
+    """
+
+    help = "Benchmarks real-time factor and word error rate of the transcription backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument("audio", nargs="+", help="Local audio files (reference: <file>.txt).")
+        parser.add_argument("--backends", default=DEFAULT_BACKENDS,
+                            help="Comma separated backend classes; the first one is the baseline.")
+        parser.add_argument("--whisper-model", default="",
+                            help="Whisper model (default: WHISPER_MODEL).")
+        parser.add_argument("--repeat", type=int, default=1,
+                            help="Transcriptions per file (the fastest run counts).")
+        parser.add_argument("--threads", type=int, default=0,
+                            help="Torch threads for every backend (default: WHISPER_CPU_THREADS or the worker's core share).")
+        parser.add_argument("--json", help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        missing = [path for path in options["audio"] if not os.path.isfile(path)]
+        if missing:
+            raise CommandError(f"Audio file not found: {', '.join(missing)}")
+
+        samples = []
+        for path in options["audio"]:
+            reference = None
+            if os.path.isfile(f"{path}.txt"):
+                with open(f"{path}.txt", encoding="utf-8") as f:
+                    reference = f.read()
+            audio = load_audio(path)
+            if not len(audio):
+                raise CommandError(f"Audio file contains no samples: {path}")
+            samples.append({"path": path, "audio": audio, "reference": reference})
+
+        model_name = options["whisper_model"] or settings.WHISPER_MODEL
+        threads = options["threads"] or cpu_thread_count()
+        results = []
+        for backend_path in options["backends"].split(","):
+            backend = import_string(backend_path.strip())(name=model_name)
+            if hasattr(backend, "threads"):
+                backend.threads = threads
+            results.append(self.run_backend(backend_path.strip(), backend, samples, options["repeat"], threads))
+
+        baseline = results[0]
+        for result in results:
+            self.score(result, baseline, samples)
+            self.report(result, baseline)
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['json']}")
+
+    def run_backend(self, backend_path, backend, samples, repeat, threads):
+        started = time.perf_counter()
+        backend.load()
+        load_seconds = time.perf_counter() - started
+        # After load: backends may set their own thread count there
+        torch.set_num_threads(threads)
+        backend.warmup()
+
+        files = []
+        for sample in samples:
+            timings = []
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                text = backend.transcribe(sample["audio"])["text"].strip()
+                timings.append(time.perf_counter() - started)
+            files.append({
+                "path": sample["path"],
+                "audio_seconds": len(sample["audio"]) / SAMPLE_RATE,
+                "seconds": min(timings),
+                "text": text,
+            })
+
+        audio_seconds = sum(f["audio_seconds"] for f in files)
+        seconds = sum(f["seconds"] for f in files)
+        return {
+            "backend": backend_path,
+            "model": backend.cache_name,
+            "threads": threads,
+            "load_seconds": load_seconds,
+            "audio_seconds": audio_seconds,
+            "seconds": seconds,
+            "rtf": seconds / audio_seconds if audio_seconds else None,
+            "files": files,
+        }
+
+    def score(self, result, baseline, samples):
+        """
+        Adds the WER (errors / reference words over all files) against the
+        reference transcripts, or against the baseline's output.
+        """
+        errors = words = 0
+        against_reference = all(sample["reference"] is not None for sample in samples)
+        for sample, file, baseline_file in zip(samples, result["files"], baseline["files"]):
+            reference = sample["reference"] if against_reference else baseline_file["text"]
+            file_errors, file_words = word_error_rate(reference, file["text"])
+            file["wer"] = file_errors / file_words if file_words else None
+            errors += file_errors
+            words += file_words
+
+        result["wer"] = errors / words if words else None
+        result["wer_reference"] = "reference" if against_reference else "baseline"
+
+    def report(self, result, baseline):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{result['backend']} ({result['model']}, {result['threads']} threads)"
+        ))
+        self.stdout.write(f"  load:    {result['load_seconds']:.1f} s")
+        self.stdout.write(f"  audio:   {result['audio_seconds']:.1f} s in {result['seconds']:.1f} s")
+        if result["rtf"] is not None:
+            speedup = baseline["rtf"] / result["rtf"] if result["rtf"] else None
+            self.stdout.write(
+                f"  RTF:     {result['rtf']:.3f}"
+                + (f" ({speedup:.2f}x vs baseline)" if speedup and result is not baseline else "")
+            )
+        if result["wer"] is not None:
+            self.stdout.write(f"  WER:     {result['wer']:.1%} (vs {result['wer_reference']})")
+        for file in result["files"]:
+            wer = "-" if file["wer"] is None else f"{file['wer']:.1%}"
+            self.stdout.write(
+                f"    {os.path.basename(file['path'])}: "
+                f"RTF {file['seconds'] / file['audio_seconds']:.3f}, WER {wer}"
+            )
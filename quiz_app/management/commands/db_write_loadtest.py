@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from quiz_app.models import Question, Quiz
+
+LOADTEST_USERNAME = "db_write_loadtest"
+
+
+class Command(BaseCommand):
+    """
+    Measures concurrent quiz write throughput of the configured
+    database profile (DB_ENGINE / core/database.py).
+
+    Several threads create quizzes with 10 questions each, the way
+    QuizCreateSerializer does, for a fixed time. Reports writes per
+    second, latency and the number of "database is locked" errors.
+    """
+
+    help = "Load-tests concurrent quiz writes against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10)
+
+    def handle(self, *args, **options):
+        owner, _ = User.objects.get_or_create(username=LOADTEST_USERNAME)
+        stop_at = time.monotonic() + options["seconds"]
+        results = {"writes": 0, "locked": 0, "errors": 0, "latencies": []}
+        lock = threading.Lock()
+
+        threads = [
+            threading.Thread(target=self.writer, args=(owner, stop_at, results, lock))
+            for _ in range(options["threads"])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        Quiz.objects.filter(owner=owner).delete()
+        owner.delete()
+
+        latencies = sorted(results["latencies"]) or [0]
+        db = settings.DATABASES["default"]
+        self.stdout.write(f"Engine:        {db['ENGINE']}")
+        self.stdout.write(f"Threads:       {options['threads']}")
+        self.stdout.write(f"Writes:        {results['writes']} ({results['writes'] / elapsed:.1f}/s)")
+        self.stdout.write(f"Locked errors: {results['locked']}")
+        self.stdout.write(f"Other errors:  {results['errors']}")
+        self.stdout.write(
+            f"Latency ms:    p50 {latencies[len(latencies) // 2] * 1000:.1f}"
+            f"  p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}"
+            f"  max {latencies[-1] * 1000:.1f}"
+        )
+
+    def writer(self, owner, stop_at, results, lock):
+        """
+        Writes quizzes until the time is up (runs in its own thread
+        and therefore with its own database connection).
+        """
+        try:
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        quiz = Quiz.objects.create(
+                            owner=owner,
+                            title="Load test",
+                            description="",
+                            video_url="",
+                        )
+                        Question.objects.bulk_create([
+                            Question(
+                                quiz=quiz,
+                                question_title=f"Question {i}",
+                                question_options=["A", "B", "C", "D"],
+                                answer="A",
+                            )
+                            for i in range(10)
+                        ])
+                except OperationalError as e:
+                    with lock:
+                        results["locked" if "locked" in str(e) else "errors"] += 1
+                    continue
+
+                with lock:
+                    results["writes"] += 1
+                    results["latencies"].append(time.perf_counter() - started)
+        finally:
+            connection.close()
@@ -0,0 +1,88 @@
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _start_worker(poll_interval):
+    """
+    Entry point of a worker process.
+
+    Sets Django up again (needed where processes are spawned, e.g. on
+    macOS and Windows; harmless after a fork on Linux), loads the Whisper
+    model with WHISPER_WARMUP and runs the queue loop.
+    """
+    import django
+    django.setup()
+
+    if settings.WHISPER_WARMUP:
+        from converter.transcription import get_transcription_backend
+        get_transcription_backend().warmup()
+
+    from quiz_app.jobs import worker_loop
+    worker_loop(poll_interval=poll_interval)
+
+
+class Command(BaseCommand):
+    """
+    Starts a pool of local worker processes that
+    process queued quiz generation jobs.
+    """
+
+    help = "Runs the quiz generation worker pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.QUIZ_WORKER_COUNT,
+            help="Number of worker processes (default: QUIZ_WORKER_COUNT).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.QUIZ_WORKER_POLL_SECONDS,
+            help="Seconds to wait when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Requeues stale jobs, reclaims orphaned scratch workspaces,
+        starts the worker processes and waits until they exit
+        (Ctrl+C stops the pool).
+        """
+        from converter.workspace import scratch_space
+        from quiz_app.jobs import requeue_stale_jobs
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        removed = scratch_space.janitor()
+        if removed:
+            self.stdout.write(f"Removed {removed} stale scratch workspace(s).")
+
+        connections.close_all()
+
+        processes = [
+            multiprocessing.Process(
+                target=_start_worker,
+                args=(options["poll_interval"],),
+                name=f"quiz-worker-{i}",
+            )
+            for i in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+
+        self.stdout.write(self.style.SUCCESS(f"Started {len(processes)} quiz worker(s)."))
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
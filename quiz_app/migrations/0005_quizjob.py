@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0004_quiz_owner_alter_question_answer_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_url', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('stage', models.CharField(choices=[('pending', 'Pending'), ('download', 'Download'), ('convert', 'Convert'), ('transcribe', 'Transcribe'), ('generate', 'Generate'), ('save', 'Save'), ('finished', 'Finished')], default='pending', max_length=20)),
+                ('error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_quiz_job', to=settings.AUTH_USER_MODEL)),
+                ('quiz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quiz_job', to='quiz_app.quiz')),
+            ],
+        ),
+    ]
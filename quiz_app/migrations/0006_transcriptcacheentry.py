@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0005_quizjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=20)),
+                ('model_name', models.CharField(max_length=50)),
+                ('text', models.TextField()),
+                ('size_bytes', models.PositiveIntegerField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video_id', 'model_name'), name='unique_transcript_per_model')],
+            },
+        ),
+    ]
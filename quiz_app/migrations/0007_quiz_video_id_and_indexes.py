@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 14:21
+
+import re
+
+from django.db import migrations, models
+
+VIDEO_ID_REGEX = re.compile(r"(?:v=|youtu\.be/|embed/|shorts/)([A-Za-z0-9_-]{11})")
+
+
+def backfill_video_id(apps, schema_editor):
+    """
+    Fills video_id of existing quizzes from their video_url.
+    """
+    Quiz = apps.get_model('quiz_app', 'Quiz')
+    batch = []
+
+    for quiz in Quiz.objects.only('id', 'video_url').iterator(chunk_size=2000):
+        match = VIDEO_ID_REGEX.search(quiz.video_url or "")
+        if match:
+            quiz.video_id = match.group(1)
+            batch.append(quiz)
+        if len(batch) >= 2000:
+            Quiz.objects.bulk_update(batch, ['video_id'])
+            batch = []
+
+    if batch:
+        Quiz.objects.bulk_update(batch, ['video_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0006_transcriptcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='video_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='quiz_owner_created_idx'),
+        ),
+        migrations.RunPython(backfill_video_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0007_quiz_video_id_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='progress',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0008_quizjob_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='transcript_source',
+            field=models.CharField(choices=[('auto', 'Auto'), ('captions', 'Captions'), ('whisper', 'Whisper')], default='auto', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='quizjob',
+            name='stage',
+            field=models.CharField(choices=[('pending', 'Pending'), ('captions', 'Captions'), ('download', 'Download'), ('convert', 'Convert'), ('transcribe', 'Transcribe'), ('generate', 'Generate'), ('save', 'Save'), ('finished', 'Finished')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0010_quizjob_time_range'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
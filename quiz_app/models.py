@@ -10,8 +10,14 @@ class Quiz(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     video_url = models.CharField(max_length=255)
+    video_id = models.CharField(max_length=20, blank=True, default="", db_index=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user_quiz")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "-created_at", "-id"], name="quiz_owner_created_idx"),
+        ]
+
 
 
 class Question(models.Model):
@@ -20,4 +26,80 @@ class Question(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     answer = models.CharField(max_length=500)
-    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="quiz_question")
\ No newline at end of file
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="quiz_question")
+
+
+class QuizJob(models.Model):
+    """
+    A queued quiz generation request.
+
+    Created by the createQuiz endpoint and processed by the
+    local worker pool (manage.py run_quiz_workers).
+    start_seconds / end_seconds optionally limit the quiz to a part of the video.
+    """
+
+    @property
+    def time_range(self):
+        if self.start_seconds is None and self.end_seconds is None:
+            return None
+        return (self.start_seconds or 0, self.end_seconds)
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    class Stage(models.TextChoices):
+        PENDING = "pending"
+        CAPTIONS = "captions"
+        DOWNLOAD = "download"
+        CONVERT = "convert"
+        TRANSCRIBE = "transcribe"
+        GENERATE = "generate"
+        SAVE = "save"
+        FINISHED = "finished"
+
+    class TranscriptSource(models.TextChoices):
+        AUTO = "auto"
+        CAPTIONS = "captions"
+        WHISPER = "whisper"
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user_quiz_job")
+    video_url = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    stage = models.CharField(max_length=20, choices=Stage.choices, default=Stage.PENDING)
+    progress = models.FloatField(default=0)
+    transcript_source = models.CharField(max_length=20, choices=TranscriptSource.choices, default=TranscriptSource.AUTO)
+    start_seconds = models.FloatField(null=True, blank=True)
+    end_seconds = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    quiz = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, blank=True, related_name="quiz_job")
+    worker = models.CharField(max_length=100, blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+class TranscriptCacheEntry(models.Model):
+    """
+    Cached Whisper transcript of a YouTube video.
+
+    Keyed by the normalized video id and the Whisper model name,
+    used by converter.transcript_cache.TranscriptCache.
+    """
+
+    video_id = models.CharField(max_length=20)
+    model_name = models.CharField(max_length=50)
+    text = models.TextField()
+    size_bytes = models.PositiveIntegerField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["video_id", "model_name"], name="unique_transcript_per_model"),
+        ]
@@ -1,3 +1,1388 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import numpy as np
+import whisper
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import ConnectionHandler
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from google.genai import errors as genai_errors
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from converter import condense
+from core.database import database_config
+from converter.audio import SAMPLE_RATE, split_on_silence, stream_audio, trim_silence
+from converter.chunked import chunk_worker_count, merge_transcripts
+from converter.captions import assess_captions, parse_srv, parse_vtt, select_track
+from converter.converter import AudioConverter
+from converter.llm import FakeLLMBackend, GeminiBackend, is_retryable_error
+from converter.metrics import MetricsRegistry
+from converter.preflight import AudioLimitError, check_limits, select_audio_format
+from converter.singleflight import SingleFlight
+from converter.structured import IncrementalQuestionParser, generate_structured_quiz
+from converter.transcript_cache import TranscriptCache
+from converter.transcription import FakeTranscriptionBackend, QuantizedCPUBackend, cpu_thread_count
+from converter.whisper_pool import WhisperModelPool, quantize_linear_layers
+from converter.workspace import METADATA_FILE, ScratchSpace, ScratchSpaceExhausted
+from . import jobs
+from .api.async_views import AsyncCreateQuizView, AsyncQuizDetailView, AsyncQuizJobEventsView, AsyncQuizListView
+from .management.commands.benchmark_transcription import word_error_rate
+from .models import Quiz, Question, QuizJob, TranscriptCacheEntry
+
+
+AUTO_CAPTIONS_VTT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.350 align:start position:0%
+
+plants<00:00:00.520><c> turn</c><00:00:00.900><c> sunlight</c>
+
+00:00:02.350 --> 00:00:02.360 align:start position:0%
+plants turn sunlight
+
+00:00:02.360 --> 00:00:04.000 align:start position:0%
+plants turn sunlight
+into<00:00:02.800><c> chemical</c><00:00:03.100><c> energy</c>
+"""
+
+SRV3_CAPTIONS = """<?xml version="1.0" encoding="utf-8" ?><timedtext format="3"><body>
+<p t="0" d="2000">Plants turn <s>sunlight</s></p>
+<p t="2000" d="2000">into chemical energy &amp; oxygen</p>
+</body></timedtext>"""
+
+
+def create_quiz(owner, title="Quiz", question_count=10):
+    """
+    Creates a quiz with the given number of questions.
+    """
+    quiz = Quiz.objects.create(
+        owner=owner,
+        title=title,
+        description="Description",
+        video_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    )
+    Question.objects.bulk_create([
+        Question(
+            quiz=quiz,
+            question_title=f"Question {i}",
+            question_options=["A", "B", "C", "D"],
+            answer="A",
+        )
+        for i in range(question_count)
+    ])
+    return quiz
+
+
+class QuizTestCase(APITestCase):
+    """
+    Base class: two users with quizzes, requests authenticated as `user`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="owner", password="Secret123")
+        self.other = User.objects.create_user(username="other", password="Secret123")
+        self.quizzes = [create_quiz(self.user, title=f"Quiz {i}") for i in range(3)]
+        self.foreign_quiz = create_quiz(self.other, title="Foreign")
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+
+
+class QuizQueryCountTests(QuizTestCase):
+    """
+    Locks in the number of SQL statements per endpoint.
+
+    1 query is spent on loading the user in CookieJWTAuthentication
+    (only for the first request with a token), 1 on the ETag lookup
+    of list/retrieve.
+    The counts must not grow with the number of quizzes or questions.
+    """
+
+    def test_list_summary(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("quizzes-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertNotIn("questions", response.data["results"][0])
+
+    def test_list_with_questions(self):
+        create_quiz(self.user, title="Another")
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("quizzes-list"), {"include": "questions"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"][0]["questions"]), 10)
+
+    def test_retrieve(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("quizzes-detail", args=[self.quizzes[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["questions"]), 10)
+
+    def test_retrieve_cached(self):
+        url = reverse("quizzes-detail", args=[self.quizzes[0].id])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["questions"]), 10)
+
+    def test_partial_update(self):
+        with self.assertNumQueries(5):
+            response = self.client.patch(
+                reverse("quizzes-detail", args=[self.quizzes[0].id]),
+                {"title": "Renamed"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_destroy(self):
+        with self.assertNumQueries(5):
+            response = self.client.delete(reverse("quizzes-detail", args=[self.quizzes[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Question.objects.filter(quiz_id=self.quizzes[0].id).exists())
+
+
+class QuizListTests(QuizTestCase):
+    """
+    Cursor pagination and sparse fields of the quiz list.
+    """
+
+    def test_cursor_pagination_with_tied_created_at(self):
+        for i in range(7):
+            create_quiz(self.user, title=f"More {i}")
+        Quiz.objects.filter(owner=self.user).update(created_at=timezone.now())
+
+        ids = []
+        url = reverse("quizzes-list") + "?page_size=3"
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [quiz["id"] for quiz in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+
+        self.assertEqual(pages, 4)
+        self.assertEqual(ids, sorted(Quiz.objects.filter(owner=self.user).values_list("id", flat=True), reverse=True))
+
+    def test_sparse_fields(self):
+        url = reverse("quizzes-list")
+        response = self.client.get(url, {"fields": "id,title"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+
+        response = self.client.get(url, {"fields": "title,owner,questions"})
+        self.assertEqual(set(response.data["results"][0]), {"title"})
+
+        response = self.client.get(url, {"fields": "unknown"})
+        self.assertEqual(set(response.data["results"][0]), {"id"})
+
+        response = self.client.get(url, {"fields": "title", "include": "questions"})
+        self.assertEqual(set(response.data["results"][0]), {"title", "questions"})
+
+
+class QuizConditionalRequestTests(QuizTestCase):
+    """
+    ETags and 304 Not Modified for quiz reads.
+    """
+
+    def test_retrieve_not_modified(self):
+        url = reverse("quizzes-detail", args=[self.quizzes[0].id])
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_changes_etag(self):
+        url = reverse("quizzes-detail", args=[self.quizzes[0].id])
+        etag = self.client.get(url)["ETag"]
+        self.client.patch(url, {"title": "Renamed"}, format="json")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Renamed")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_not_modified_until_destroy(self):
+        url = reverse("quizzes-list")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.delete(reverse("quizzes-detail", args=[self.quizzes[0].id]))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class QuizOwnerScopingTests(QuizTestCase):
+    """
+    Other users' quizzes are filtered in SQL and answer 404 for every action.
+    """
+
+    def test_retrieve_foreign_quiz(self):
+        response = self.client.get(reverse("quizzes-detail", args=[self.foreign_quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_foreign_quiz(self):
+        response = self.client.patch(
+            reverse("quizzes-detail", args=[self.foreign_quiz.id]),
+            {"title": "Hacked"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_destroy_foreign_quiz(self):
+        response = self.client.delete(reverse("quizzes-detail", args=[self.foreign_quiz.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Quiz.objects.filter(id=self.foreign_quiz.id).exists())
+
+    def test_anonymous_destroy(self):
+        self.client.cookies.clear()
+        response = self.client.delete(reverse("quizzes-detail", args=[self.quizzes[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CreateQuizTests(QuizTestCase):
+    """
+    createQuiz/ validates the optional time range.
+    """
+
+    def test_time_range(self):
+        url = reverse("create_quiz")
+        data = {"url": "https://youtu.be/dQw4w9WgXcQ", "start_seconds": 60, "end_seconds": 30}
+        self.assertEqual(self.client.post(url, data, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+
+        data["end_seconds"] = 660
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(QuizJob.objects.get(id=response.data["job_id"]).time_range, (60, 660))
+
+
+class FakeConverter():
+    """
+    Stands in for AudioConverter in job tests: returns a fixed quiz
+    or raises `error`.
+    """
+
+    error = None
+
+    def __init__(self, url, username, **kwargs):
+        self.job_key = None
+
+    def run(self):
+        if self.error is not None:
+            raise self.error
+        return {
+            "title": "Photosynthesis",
+            "description": "How plants make glucose.",
+            "questions": [
+                {"question_title": "What do plants need?", "question_options": ["Light", "Salt"], "answer": "Light"},
+            ],
+        }
+
+
+@override_settings(METRICS_ENABLED=False, QUIZ_JOB_TIMEOUT_SECONDS=60, QUIZ_CONVERTER="quiz_app.tests.FakeConverter")
+class QuizJobQueueTests(TestCase):
+    """
+    Job claiming, processing and recovery of the worker queue.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="Secret123")
+        self.job = jobs.enqueue_quiz_job(self.user, "https://youtu.be/dQw4w9WgXcQ")
+
+    def test_job_is_claimed_once(self):
+        self.assertEqual(jobs.claim_job(self.job.id, "worker-a").worker, "worker-a")
+        self.assertIsNone(jobs.claim_job(self.job.id, "worker-b"))
+        self.assertIsNone(jobs.claim_next_job("worker-b"))
+
+    def test_successful_job(self):
+        job = jobs.process_job(jobs.claim_next_job("worker-a"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, QuizJob.Status.DONE)
+        self.assertEqual(job.stage, QuizJob.Stage.FINISHED)
+        self.assertEqual(job.quiz.quiz_question.count(), 1)
+        self.assertEqual(job.quiz.owner, self.user)
+
+    def test_failed_job_hides_internal_errors(self):
+        with mock.patch.object(FakeConverter, "error", RuntimeError("ERROR: https://rr1.googlevideo.com/videoplayback?sig=x")):
+            job = jobs.process_job(jobs.claim_next_job("worker-a"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, QuizJob.Status.FAILED)
+        self.assertEqual(job.error, jobs.JOB_ERROR_MESSAGE)
+        self.assertIsNone(job.quiz)
+
+    def test_limit_errors_are_shown(self):
+        with mock.patch.object(FakeConverter, "error", AudioLimitError("The video is too long.")):
+            job = jobs.process_job(jobs.claim_next_job("worker-a"))
+        self.assertEqual(job.error, "The video is too long.")
+
+    @override_settings(QUIZ_STALE_CHECK_SECONDS=0)
+    def test_worker_loop_requeues_stale_jobs(self):
+        jobs.claim_job(self.job.id, "crashed-worker")
+        QuizJob.objects.filter(id=self.job.id).update(
+            started_at=timezone.now() - timedelta(minutes=5),
+            updated_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        jobs.worker_loop(max_jobs=1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.DONE)
+        self.assertNotEqual(self.job.worker, "crashed-worker")
+        self.assertEqual(self.job.attempts, 2)
+
+    def test_job_with_recent_progress_is_not_requeued(self):
+        job = jobs.claim_job(self.job.id, "busy-worker")
+        QuizJob.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(hours=2))
+        jobs.JobProgressReporter(job)(40)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (QuizJob.Status.RUNNING, "busy-worker"))
+
+    @override_settings(QUIZ_JOB_MAX_ATTEMPTS=2)
+    def test_stale_job_fails_after_max_attempts(self):
+        for attempt in range(2):
+            jobs.claim_job(self.job.id, f"crashed-worker-{attempt}")
+            QuizJob.objects.filter(id=self.job.id).update(updated_at=timezone.now() - timedelta(minutes=5))
+            jobs.requeue_stale_jobs()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, QuizJob.Status.FAILED)
+        self.assertEqual(self.job.error, jobs.JOB_ERROR_MESSAGE)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    """
+    DB_ENGINE profiles of core/database.py.
+    """
+
+    def config(self, **env):
+        with mock.patch.dict(os.environ, env):
+            for name in ("DB_ENGINE", "DB_POOL", "DB_NAME", "DB_CONN_MAX_AGE"):
+                if name not in env:
+                    os.environ.pop(name, None)
+            return database_config(Path("/srv/quizly"))
+
+    def test_sqlite_profile(self):
+        config = self.config(SQLITE_BUSY_TIMEOUT="5")
+        self.assertEqual(config["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(config["NAME"], Path("/srv/quizly/db.sqlite3"))
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(config["OPTIONS"]["timeout"], 5)
+        self.assertIn("PRAGMA journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertIn("PRAGMA busy_timeout=5000", config["OPTIONS"]["init_command"])
+
+    def test_postgres_persistent_connections(self):
+        config = self.config(DB_ENGINE="postgres", DB_CONN_MAX_AGE="120")
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(config["CONN_MAX_AGE"], 120)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", config["OPTIONS"])
+
+    def test_postgres_pool(self):
+        config = self.config(DB_ENGINE="postgres", DB_POOL="True", DB_POOL_MAX_SIZE="4")
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(config["OPTIONS"]["pool"]["max_size"], 4)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            self.config(DB_ENGINE="mysql")
+
+    def test_sqlite_connection_uses_wal(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        config = self.config(DB_NAME=os.path.join(directory.name, "quizly.sqlite3"))
+
+        connection = ConnectionHandler({"default": {}, "profile": config})["profile"]
+        self.addCleanup(connection.close)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class VideoIdBackfillMigrationTests(TransactionTestCase):
+    """
+    Migration 0007 fills video_id of existing quizzes from their URL.
+    """
+
+    before = [("quiz_app", "0006_transcriptcacheentry")]
+    after = [("quiz_app", "0007_quiz_video_id_and_indexes")]
+
+    def setUp(self):
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_backfill(self):
+        apps = self.migrate(self.before)
+        owner = apps.get_model("auth", "User").objects.create(username="owner")
+        Quiz = apps.get_model("quiz_app", "Quiz")
+        for url in ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "https://youtu.be/9bZkp7q19f0?t=3", "not a video"):
+            Quiz.objects.create(title="Quiz", description="", video_url=url, owner=owner)
+
+        Quiz = self.migrate(self.after).get_model("quiz_app", "Quiz")
+        self.assertEqual(
+            list(Quiz.objects.order_by("id").values_list("video_id", flat=True)),
+            ["dQw4w9WgXcQ", "9bZkp7q19f0", ""],
+        )
+
+
+@override_settings(TRANSCRIPT_CACHE_ENABLED=True, TRANSCRIPT_CACHE_MAX_BYTES=100, TRANSCRIPT_CACHE_MAX_AGE_DAYS=30)
+class TranscriptCacheTests(TestCase):
+    """
+    Transcripts are cached per video and model, expire and are evicted LRU.
+    """
+
+    def setUp(self):
+        self.cache = TranscriptCache()
+
+    def test_hit_and_miss(self):
+        self.assertIsNone(self.cache.get("dQw4w9WgXcQ", "turbo"))
+        self.cache.put("dQw4w9WgXcQ", "turbo", "transcript")
+
+        self.assertEqual(self.cache.get("dQw4w9WgXcQ", "turbo"), "transcript")
+        self.assertIsNone(self.cache.get("dQw4w9WgXcQ", "turbo-int8"))
+        self.assertEqual(TranscriptCacheEntry.objects.get(model_name="turbo").hit_count, 1)
+
+    def test_expired_entries_are_misses(self):
+        self.cache.put("dQw4w9WgXcQ", "turbo", "transcript")
+        TranscriptCacheEntry.objects.update(created_at=timezone.now() - timedelta(days=31))
+
+        self.assertIsNone(self.cache.get("dQw4w9WgXcQ", "turbo"))
+        self.assertFalse(TranscriptCacheEntry.objects.exists())
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.put("video00001", "turbo", "a" * 40)
+        self.cache.put("video00002", "turbo", "b" * 40)
+        TranscriptCacheEntry.objects.filter(video_id="video00001").update(last_used_at=timezone.now() - timedelta(hours=1))
+        self.cache.get("video00001", "turbo")
+
+        self.cache.put("video00003", "turbo", "c" * 40)
+        self.assertEqual(
+            sorted(TranscriptCacheEntry.objects.values_list("video_id", flat=True)),
+            ["video00001", "video00003"],
+        )
+
+    @override_settings(TRANSCRIPT_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.cache.put("dQw4w9WgXcQ", "turbo", "transcript")
+        self.assertIsNone(self.cache.get("dQw4w9WgXcQ", "turbo"))
+        self.assertFalse(TranscriptCacheEntry.objects.exists())
+
+
+# Stand-ins for yt-dlp and ffmpeg: both write more stderr than a pipe buffer holds.
+FAKE_DOWNLOADER = "import sys; sys.stderr.write('progress ' * 50000); sys.stdout.buffer.write(b'\\x00\\x40' * {samples})"
+FAKE_FFMPEG = "import shutil, sys; sys.stderr.write('warning ' * 50000); shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)"
+
+
+def fake_stream_audio(samples, **kwargs):
+    """
+    Runs stream_audio with the fake yt-dlp / ffmpeg processes.
+    """
+    popen = subprocess.Popen
+
+    def fake_popen(command, **popen_kwargs):
+        script = FAKE_FFMPEG if command[0] == "ffmpeg" else FAKE_DOWNLOADER.format(samples=samples)
+        return popen([sys.executable, "-c", script], **popen_kwargs)
+
+    with mock.patch("converter.audio.subprocess.Popen", side_effect=fake_popen):
+        return stream_audio("https://youtu.be/dQw4w9WgXcQ", **kwargs)
+
+
+class StreamAudioTests(SimpleTestCase):
+    """
+    stream_audio pipes yt-dlp into ffmpeg and collects the PCM in memory.
+    """
+
+    def test_collects_pcm_despite_verbose_stderr(self):
+        audio = fake_stream_audio(SAMPLE_RATE)
+        self.assertEqual(len(audio), SAMPLE_RATE)
+        self.assertAlmostEqual(float(audio[0]), 0.5)
+
+    def test_aborts_after_max_seconds(self):
+        with self.assertRaises(AudioLimitError):
+            fake_stream_audio(SAMPLE_RATE * 10, max_seconds=2)
+
+
+class ChunkedTranscriptionTests(SimpleTestCase):
+    """
+    Long audio is cut in pauses and the chunk transcripts are stitched
+    together without the words of the overlap.
+    """
+
+    def test_cuts_fall_into_pauses(self):
+        t = np.arange(10 * SAMPLE_RATE) / SAMPLE_RATE
+        audio = (0.5 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+        audio[int(4.5 * SAMPLE_RATE):int(5.5 * SAMPLE_RATE)] = 0
+
+        bounds = split_on_silence(audio, chunk_seconds=4, overlap_seconds=0.5, search_seconds=2)
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], len(audio))
+        cut = bounds[1][0] + int(0.5 * SAMPLE_RATE)
+        self.assertTrue(4.5 * SAMPLE_RATE <= cut <= 5.5 * SAMPLE_RATE)
+        self.assertEqual(bounds[0][1], cut)
+
+    def test_merge_removes_overlap_ignoring_case_and_punctuation(self):
+        merged = merge_transcripts([
+            "Plants need light - to make Glucose.",
+            "light to make glucose, and oxygen is released.",
+            "",
+            "Released! Then the cycle starts again.",
+        ])
+        self.assertEqual(merged, "Plants need light - to make Glucose. and oxygen is released. Then the cycle starts again.")
+
+    def test_merge_keeps_texts_without_overlap(self):
+        self.assertEqual(merge_transcripts(["First part.", "Second part."]), "First part. Second part.")
+
+    @override_settings(WHISPER_CHUNK_WORKERS=0, QUIZ_WORKER_COUNT=1000)
+    def test_worker_count_is_the_queue_worker_share(self):
+        self.assertEqual(chunk_worker_count(), 1)
+        with override_settings(WHISPER_CHUNK_WORKERS=3):
+            self.assertEqual(chunk_worker_count(), 3)
+
+
+@override_settings(GEMINI_API_KEY="test-key", GEMINI_MAX_ATTEMPTS=3, GEMINI_RETRY_INITIAL_SECONDS=0, GEMINI_RETRY_MAX_SECONDS=0)
+class GeminiRetryTests(SimpleTestCase):
+    """
+    Only transient Gemini errors are retried.
+    """
+
+    def test_retry_classification(self):
+        self.assertTrue(is_retryable_error(genai_errors.APIError(429, {})))
+        self.assertTrue(is_retryable_error(genai_errors.APIError(503, {})))
+        self.assertTrue(is_retryable_error(httpx.ReadTimeout("timed out")))
+        self.assertTrue(is_retryable_error(httpx.ConnectError("connection refused")))
+        self.assertFalse(is_retryable_error(genai_errors.APIError(400, {})))
+        self.assertFalse(is_retryable_error(genai_errors.APIError(403, {})))
+        self.assertFalse(is_retryable_error(ValueError("bad prompt")))
+
+    def backend(self, *outcomes):
+        with mock.patch("converter.llm.genai.Client") as client:
+            backend = GeminiBackend()
+        client.return_value.models.generate_content.side_effect = outcomes
+        return backend, client.return_value.models.generate_content
+
+    def test_transient_errors_are_retried(self):
+        backend, generate = self.backend(genai_errors.APIError(503, {}), mock.Mock(text="{}"))
+        self.assertEqual(backend.generate("prompt"), "{}")
+        self.assertEqual(generate.call_count, 2)
+
+    def test_client_errors_are_not_retried(self):
+        backend, generate = self.backend(genai_errors.APIError(400, {}), mock.Mock(text="{}"))
+        with self.assertRaises(genai_errors.APIError):
+            backend.generate("prompt")
+        self.assertEqual(generate.call_count, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        backend, generate = self.backend(*[httpx.ReadTimeout("timed out")] * 3)
+        with self.assertRaises(httpx.ReadTimeout):
+            backend.generate("prompt")
+        self.assertEqual(generate.call_count, 3)
+
+
+def question_data(i, answer=None):
+    options = [f"Option {i}{letter}" for letter in "ABCD"]
+    return {"question_title": f"Question {i}?", "question_options": options, "answer": answer or options[0]}
+
+
+class ScriptedLLMBackend():
+    """
+    LLM backend that streams a fixed quiz and answers repair
+    prompts with the given responses in order.
+    """
+
+    def __init__(self, quiz, repairs=()):
+        self.quiz = quiz
+        self.repairs = list(repairs)
+        self.prompts = []
+
+    def stream(self, prompt, schema=None):
+        text = json.dumps(self.quiz)
+        for i in range(0, len(text), 7):
+            yield text[i:i + 7]
+
+    def generate(self, prompt, schema=None):
+        self.prompts.append(prompt)
+        return self.repairs.pop(0)
+
+
+@override_settings(LLM_REPAIR_ATTEMPTS=2)
+class StructuredQuizTests(SimpleTestCase):
+    """
+    Questions are validated while streaming; only invalid ones are requested again.
+    """
+
+    def test_parser_yields_questions_as_they_complete(self):
+        text = json.dumps({
+            "title": "Braces { in } strings",
+            "questions": [question_data(1, answer="Option 1A"), {"question_title": 'Quote \\" and } brace'}],
+        })
+        parser = IncrementalQuestionParser()
+        completed = [question for char in text for question in parser.feed(char)]
+
+        self.assertEqual(len(completed), 2)
+        self.assertEqual(json.loads(completed[0])["answer"], "Option 1A")
+        self.assertEqual(json.loads(completed[1])["question_title"], 'Quote \\" and } brace')
+        self.assertTrue(parser.closed)
+
+    def test_only_invalid_questions_are_repaired(self):
+        questions = [question_data(i) for i in range(9)] + [question_data(9, answer="Not an option")]
+        backend = ScriptedLLMBackend(
+            {"title": "Photosynthesis", "description": "Plants", "questions": questions},
+            repairs=["not json", json.dumps([question_data(10)])],
+        )
+
+        quiz = generate_structured_quiz(backend, "prompt", "transcript")
+        self.assertEqual(len(quiz["questions"]), 10)
+        self.assertEqual(quiz["questions"][-1]["question_title"], "Question 10?")
+        self.assertEqual(len(backend.prompts), 2)
+        self.assertIn("exactly 1 new questions", backend.prompts[0])
+
+    def test_fails_when_repairs_are_exhausted(self):
+        backend = ScriptedLLMBackend(
+            {"title": "Photosynthesis", "description": "Plants", "questions": [question_data(i) for i in range(8)]},
+            repairs=[json.dumps([question_data(8)]), json.dumps([question_data(9, answer="Wrong")])],
+        )
+        with self.assertRaises(ValueError):
+            generate_structured_quiz(backend, "prompt", "transcript")
+
+
+@override_settings(SINGLEFLIGHT_RESULT_TTL_SECONDS=60, SINGLEFLIGHT_WAIT_SECONDS=10)
+class SingleFlightTests(SimpleTestCase):
+    """
+    Concurrent work for the same key runs once; results expire.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.flight = SingleFlight(directory.name)
+        self.calls = 0
+
+    def work(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return {"run": self.calls}
+
+    def test_concurrent_callers_share_one_run(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.flight.run("video", self.work))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{"run": 1}] * 3)
+
+    def test_expired_results_are_not_reused(self):
+        self.flight.run("video", self.work)
+        with override_settings(SINGLEFLIGHT_RESULT_TTL_SECONDS=0):
+            self.assertEqual(self.flight.run("video", self.work), {"run": 2})
+        self.assertEqual(self.flight.run("other", self.work), {"run": 3})
+
+    def test_failures_are_not_shared(self):
+        with self.assertRaises(RuntimeError):
+            self.flight.run("video", mock.Mock(side_effect=RuntimeError("download failed")))
+        self.assertEqual(self.flight.run("video", self.work), {"run": 1})
+
+    @override_settings(SINGLEFLIGHT_HEARTBEAT_SECONDS=0.05)
+    def test_waiting_callers_get_heartbeats(self):
+        heartbeats = []
+        leader = threading.Thread(target=self.flight.run, args=("video", self.work))
+        leader.start()
+        time.sleep(0.05)
+        result = self.flight.run("video", self.work, on_wait=lambda: heartbeats.append(1))
+        leader.join()
+
+        self.assertEqual(result, {"run": 1})
+        self.assertTrue(heartbeats)
+
+    def test_without_key(self):
+        self.flight.run(None, self.work)
+        self.assertEqual(self.flight.run(None, self.work), {"run": 2})
+
+
+class QuizImportTests(QuizTestCase):
+    """
+    quizzes/import/ validates everything first and writes in batches.
+    """
+
+    def payload(self, count):
+        return [
+            {
+                "title": f"Imported {i}",
+                "description": "Imported quiz",
+                "video_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+                "questions": [question_data(j) for j in range(3)],
+            }
+            for i in range(count)
+        ]
+
+    def test_import(self):
+        # user, savepoint, one INSERT for the quizzes and one for all questions,
+        # release, reading back (quizzes + questions)
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse("quizzes-bulk-import"), self.payload(5), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([quiz["title"] for quiz in response.data], [f"Imported {i}" for i in range(5)])
+        self.assertEqual(Question.objects.filter(quiz__title__startswith="Imported", quiz__owner=self.user).count(), 15)
+
+    def test_invalid_item_imports_nothing(self):
+        data = self.payload(3)
+        data[2]["questions"][0].pop("answer")
+        response = self.client.post(reverse("quizzes-bulk-import"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Quiz.objects.filter(title__startswith="Imported").exists())
+
+    @override_settings(QUIZ_IMPORT_MAX_ITEMS=2)
+    def test_item_limit(self):
+        response = self.client.post(reverse("quizzes-bulk-import"), self.payload(3), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(QUIZ_EVENTS_POLL_SECONDS=0)
+class QuizJobEventsTests(QuizTestCase):
+    """
+    jobs/<id>/events/ streams the job state as Server-Sent Events.
+    """
+
+    def test_done_job(self):
+        job = QuizJob.objects.create(
+            owner=self.user,
+            video_url=self.quizzes[0].video_url,
+            status=QuizJob.Status.DONE,
+            quiz=self.quizzes[0],
+        )
+        response = self.client.get(
+            reverse("quiz_job_events", args=[job.id]),
+            headers={"Accept": "text/event-stream"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(body, f'id: done:pending:0.0\nevent: done\ndata: {{"quiz_id": {self.quizzes[0].id}}}\n\n')
+
+    @override_settings(QUIZ_EVENTS_SYNC_MAX_SECONDS=0.2, QUIZ_EVENTS_POLL_SECONDS=0.01)
+    def test_sync_stream_ends_early_and_resumes(self):
+        job = QuizJob.objects.create(
+            owner=self.user,
+            video_url=self.quizzes[0].video_url,
+            status=QuizJob.Status.RUNNING,
+            stage=QuizJob.Stage.TRANSCRIBE,
+            progress=40,
+        )
+        url = reverse("quiz_job_events", args=[job.id])
+        body = b"".join(self.client.get(url).streaming_content).decode()
+        self.assertEqual(body.count("event: progress"), 1)
+        self.assertIn("id: running:transcribe:40.0\n", body)
+
+        response = self.client.get(url, headers={"Last-Event-ID": "running:transcribe:40.0"})
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+        QuizJob.objects.filter(id=job.id).update(status=QuizJob.Status.FAILED, error="Video unavailable")
+        response = self.client.get(url, headers={"Last-Event-ID": "running:transcribe:40.0"})
+        self.assertIn("event: failed", b"".join(response.streaming_content).decode())
+
+    def test_reconnect_after_final_event(self):
+        job = QuizJob.objects.create(
+            owner=self.user,
+            video_url=self.quizzes[0].video_url,
+            status=QuizJob.Status.FAILED,
+            error="Video unavailable",
+        )
+        response = self.client.get(
+            reverse("quiz_job_events", args=[job.id]),
+            headers={"Last-Event-ID": "failed:pending:0.0"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_foreign_job(self):
+        job = QuizJob.objects.create(owner=self.other, video_url=self.foreign_quiz.video_url)
+        response = self.client.get(reverse("quiz_job_events", args=[job.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FakeWhisperModel():
+    """
+    Reports progress through whisper.transcribe's progress bar like the
+    real model: once per decoded 30 second window.
+    """
+
+    def transcribe(self, audio, **kwargs):
+        with whisper.transcribe.tqdm.tqdm(total=9000, disable=True) as bar:
+            for _ in range(3):
+                bar.update(3000)
+        return {"text": "transcribed"}
+
+
+class WhisperModelPoolTests(SimpleTestCase):
+    """
+    Models are loaded and warmed up once per key; timings go to the metrics.
+    """
+
+    def setUp(self):
+        self.pool = WhisperModelPool()
+        patcher = mock.patch("converter.whisper_pool.whisper.load_model", side_effect=self.load_model)
+        self.load_model_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load_model(self, name, device=None):
+        time.sleep(0.05)
+        model = mock.Mock(device=device)
+        model.transcribe.return_value = {"text": "transcribed"}
+        return model
+
+    def test_model_is_loaded_once_per_key(self):
+        first = self.pool.get_model("tiny", "cpu")
+        self.assertIs(self.pool.get_model("tiny", "cpu"), first)
+        self.assertIsNot(self.pool.get_model("base", "cpu"), first)
+        self.assertEqual(self.load_model_mock.call_count, 2)
+
+    def test_concurrent_first_calls_load_once(self):
+        models = []
+        threads = [threading.Thread(target=lambda: models.append(self.pool.get_model("tiny", "cpu"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.load_model_mock.call_count, 1)
+        self.assertTrue(all(model is models[0] for model in models))
+
+    def test_warmup_runs_once(self):
+        self.pool.warmup("tiny", "cpu")
+        self.pool.warmup("tiny", "cpu")
+        self.assertEqual(self.pool.get_model("tiny", "cpu").transcribe.call_count, 1)
+
+    def test_timings_are_recorded(self):
+        with mock.patch("converter.whisper_pool.metrics.observe") as observe:
+            self.pool.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), "tiny", "cpu")
+
+        observe.assert_any_call("quizly_whisper_model_load_seconds", mock.ANY, model="tiny")
+        observe.assert_any_call("quizly_whisper_transcribe_seconds", mock.ANY, model="tiny")
+
+
+class StageProgressTests(SimpleTestCase):
+    """
+    Download, transcription and quiz generation report their progress.
+    """
+
+    def test_transcription_progress(self):
+        pool = WhisperModelPool()
+        progress = []
+        with mock.patch.object(pool, "get_model", return_value=FakeWhisperModel()):
+            pool.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), on_progress=progress.append)
+            pool.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+        self.assertEqual([round(p) for p in progress], [33, 67, 100])
+
+    def test_streaming_download_progress(self):
+        progress = []
+        fake_stream_audio(SAMPLE_RATE * 4, expected_seconds=4, on_progress=progress.append)
+        self.assertTrue(progress)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 100)
+
+    @override_settings(LLM_BACKEND="converter.llm.FakeLLMBackend")
+    def test_generation_progress(self):
+        progress = []
+        converter = AudioConverter("https://youtu.be/dQw4w9WgXcQ", "owner", on_progress=progress.append)
+        with mock.patch("converter.converter.get_llm_backend", return_value=FakeLLMBackend()):
+            quiz = json.loads(converter.gemini_api("Plants turn sunlight into chemical energy."))
+
+        self.assertEqual(len(quiz["questions"]), 10)
+        self.assertEqual(progress, [10 * (i + 1) for i in range(10)])
+
+
+class MetricsEndpointTests(APITestCase):
+    """
+    /metrics merges the snapshots of all processes into Prometheus text.
+    """
+
+    def setUp(self):
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+        override = override_settings(METRICS_DIR=self.metrics_dir.name, METRICS_TOKEN="")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_merges_process_snapshots(self):
+        for seconds in (0.3, 20):
+            registry = MetricsRegistry()
+            registry.observe("quizly_stage_duration_seconds", seconds, stage="transcribe", outcome="ok")
+            registry.inc("quizly_jobs_total", status="done")
+            registry.flush()
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('quizly_jobs_total{status="done"} 2', body)
+        self.assertIn('quizly_stage_duration_seconds_bucket{outcome="ok",stage="transcribe",le="0.5"} 1', body)
+        self.assertIn('quizly_stage_duration_seconds_bucket{outcome="ok",stage="transcribe",le="+Inf"} 2', body)
+        self.assertIn('quizly_stage_duration_seconds_count{outcome="ok",stage="transcribe"} 2', body)
+
+    def test_concurrent_flushes(self):
+        registry = MetricsRegistry()
+        registry.inc("quizly_jobs_total", status="done")
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(20):
+                    registry.flush()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=flush) for _ in range(4)]
+        with mock.patch("converter.metrics.logger.warning") as warning:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        warning.assert_not_called()
+        self.assertEqual(os.listdir(self.metrics_dir.name), [os.path.basename(registry._path)])
+
+    def test_flush_errors_are_logged(self):
+        registry = MetricsRegistry()
+        registry.inc("quizly_jobs_total", status="done")
+        with override_settings(METRICS_DIR=os.path.join(self.metrics_dir.name, "missing")), \
+                mock.patch("converter.metrics.os.replace", side_effect=OSError("disk full")), \
+                self.assertLogs("converter.metrics", "WARNING"):
+            registry.flush()
+        self.assertEqual(os.listdir(os.path.join(self.metrics_dir.name, "missing")), [])
+
+    def test_token_required(self):
+        with override_settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer secret"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(TRANSCRIPT_CONDENSE_SECTIONS=4)
+class TranscriptCondenseTests(SimpleTestCase):
+    """
+    Transcript condensation works offline (approximate token counts)
+    and never drops all of the text.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(condense, "get_encoding", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_short_transcript_is_unchanged(self):
+        text = "Plants use sunlight. They make glucose."
+        self.assertEqual(condense.condense_transcript(text, budget=100), text)
+
+    def test_long_transcript_fits_the_budget(self):
+        text = " ".join(f"Sentence number {i} talks about photosynthesis and chlorophyll." for i in range(200))
+        condensed = condense.condense_transcript(text, budget=200)
+        self.assertTrue(condensed)
+        self.assertLessEqual(condense.count_tokens(condensed), 200)
+
+    def test_unpunctuated_transcript_is_split_by_tokens(self):
+        text = "光合成" * 2000
+        condensed = condense.condense_transcript(text, budget=100)
+        self.assertTrue(condensed)
+        # the budget covers the pieces, the joining spaces come on top
+        self.assertLessEqual(condense.count_tokens(condensed), 100 + 4)
+
+
+class SilenceTrimmingTests(SimpleTestCase):
+    """
+    The energy based VAD removes long silences and maps times back.
+    """
+
+    def test_trim_silence(self):
+        rng = np.random.default_rng(0)
+        tone = 0.3 * np.sin(2 * np.pi * 200 * np.arange(3 * SAMPLE_RATE) / SAMPLE_RATE).astype(np.float32)
+        silence = (0.001 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)
+        audio = np.concatenate([silence, tone, silence, tone, silence])
+
+        trimmed, timestamps = trim_silence(audio, padding_seconds=0.2)
+
+        self.assertEqual(len(timestamps.regions), 2)
+        self.assertLess(len(trimmed), 7 * SAMPLE_RATE)
+        self.assertAlmostEqual(timestamps.to_original(1.0), 10.8, delta=0.05)
+        self.assertAlmostEqual(timestamps.to_original(4.5), 23.9, delta=0.05)
+
+    def test_digital_silence_is_kept(self):
+        audio = np.zeros(2 * SAMPLE_RATE, dtype=np.float32)
+        trimmed, _ = trim_silence(audio)
+        self.assertEqual(len(trimmed), len(audio))
+
+
+@override_settings(CAPTIONS_MIN_WORDS=5, CAPTIONS_MIN_WORDS_PER_MINUTE=40, CAPTIONS_MAX_NON_SPEECH_RATIO=0.3)
+class CaptionTests(SimpleTestCase):
+    """
+    Caption parsing, track selection and quality heuristics (converter/captions.py).
+    """
+
+    def test_parse_vtt_removes_markup_and_rolling_lines(self):
+        self.assertEqual(parse_vtt(AUTO_CAPTIONS_VTT), "plants turn sunlight into chemical energy")
+
+    def test_parse_srv3(self):
+        self.assertEqual(parse_srv(SRV3_CAPTIONS), "Plants turn sunlight into chemical energy & oxygen")
+
+    def test_select_track_prefers_manual_subtitles(self):
+        info = {
+            "language": "en",
+            "subtitles": {"en-GB": [{"ext": "srv3", "url": "manual"}]},
+            "automatic_captions": {"en": [{"ext": "vtt", "url": "auto"}]},
+        }
+        track = select_track(info, languages=["de"], allow_automatic=True)
+        self.assertEqual((track["url"], track["automatic"]), ("manual", False))
+
+        del info["subtitles"]
+        self.assertIsNone(select_track(info, languages=["de"], allow_automatic=False))
+        self.assertEqual(select_track(info, languages=["de"], allow_automatic=True)["url"], "auto")
+
+    def test_assess_captions(self):
+        self.assertIsNone(assess_captions("plants turn sunlight into chemical energy", duration=6))
+        self.assertIsNotNone(assess_captions("plants turn sunlight into chemical energy", duration=600))
+        self.assertIsNotNone(assess_captions("[Music] [Music] [Applause] [Music] thanks for watching"))
+
+
+class CaptionsFirstTests(TestCase):
+    """
+    With usable captions the converter skips download and Whisper.
+    """
+
+    def converter(self, transcript_source):
+        converter = AudioConverter("https://youtu.be/dQw4w9WgXcQ", "owner", transcript_source=transcript_source)
+        self.addCleanup(converter.cleanup)
+        return converter
+
+    @mock.patch("converter.converter.fetch_captions", return_value=("plants turn sunlight into energy", None))
+    def test_captions_are_used(self, fetch_captions):
+        converter = self.converter("captions")
+        with mock.patch.object(converter, "youtube_download") as download:
+            self.assertEqual(converter.get_transcript(), "plants turn sunlight into energy")
+        download.assert_not_called()
+
+    @mock.patch("converter.converter.fetch_captions", return_value=(None, "no caption track"))
+    def test_falls_back_to_whisper(self, fetch_captions):
+        converter = self.converter("captions")
+        with mock.patch.object(converter, "youtube_download"), \
+                mock.patch.object(converter, "preflight"), \
+                mock.patch.object(converter, "convert_audio"), \
+                mock.patch("converter.converter.wav_duration", return_value=60), \
+                mock.patch.object(converter, "whisper", return_value="transcribed") as whisper:
+            self.assertEqual(converter.get_transcript(), "transcribed")
+        whisper.assert_called_once()
+
+    @mock.patch("converter.converter.fetch_captions")
+    def test_whisper_override(self, fetch_captions):
+        converter = self.converter("whisper")
+        with override_settings(CAPTIONS_FIRST=True), \
+                mock.patch.object(converter, "youtube_download"), \
+                mock.patch.object(converter, "preflight"), \
+                mock.patch.object(converter, "convert_audio"), \
+                mock.patch("converter.converter.wav_duration", return_value=60), \
+                mock.patch.object(converter, "whisper", return_value="transcribed"):
+            converter.get_transcript()
+        fetch_captions.assert_not_called()
+
+
+@override_settings(AUDIO_MAX_DURATION_SECONDS=3600, AUDIO_MAX_FILESIZE_MB=100, AUDIO_MIN_BITRATE_KBPS=48)
+class PreflightTests(SimpleTestCase):
+    """
+    Oversized videos are rejected from their metadata, before downloading.
+    """
+
+    FORMATS = [
+        {"format_id": "139", "vcodec": "none", "acodec": "mp4a", "abr": 32},
+        {"format_id": "250", "vcodec": "none", "acodec": "opus", "abr": 64},
+        {"format_id": "251", "vcodec": "none", "acodec": "opus", "abr": 128},
+        {"format_id": "18", "vcodec": "avc1", "acodec": "mp4a", "abr": 96},
+    ]
+
+    def test_select_lowest_bitrate_good_enough_for_speech(self):
+        self.assertEqual(select_audio_format({"formats": self.FORMATS})["format_id"], "250")
+        self.assertEqual(select_audio_format({"formats": self.FORMATS[:1]})["format_id"], "139")
+
+    def test_duration_limit(self):
+        with self.assertRaises(AudioLimitError):
+            check_limits({"duration": 10 * 3600}, None)
+        self.assertEqual(check_limits({"duration": 10 * 3600}, None, (0, 600)), 600)
+
+    def test_size_limit(self):
+        audio_format = {"abr": 128, "filesize": 500 * 1024 * 1024}
+        with self.assertRaises(AudioLimitError):
+            check_limits({"duration": 3000}, audio_format)
+        check_limits({"duration": 3000}, audio_format, (0, 300))
+
+    def test_live_stream_needs_time_range(self):
+        with self.assertRaises(AudioLimitError):
+            check_limits({"is_live": True}, None)
+        self.assertEqual(check_limits({"is_live": True}, None, (0, 900)), 900)
+
+
+@override_settings(SCRATCH_MAX_MB=1, SCRATCH_POLL_SECONDS=0, SCRATCH_STALE_SECONDS=3600)
+class ScratchSpaceTests(SimpleTestCase):
+    """
+    Per-job workspaces are unique, share a disk budget and are reclaimed.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.space = ScratchSpace(directory.name)
+
+    def test_unique_workspaces_and_release(self):
+        first = self.space.acquire("owner-video", 1000)
+        second = self.space.acquire("owner-video", 1000)
+        self.assertNotEqual(first.path, second.path)
+
+        first.release()
+        self.assertFalse(first.path.exists())
+        self.assertTrue(second.path.exists())
+
+    def test_budget_backpressure(self):
+        self.space.acquire("first", 800 * 1024)
+        with self.assertRaises(ScratchSpaceExhausted):
+            self.space.acquire("second", 800 * 1024, timeout=0)
+
+    def test_janitor_removes_workspaces_of_dead_processes(self):
+        workspace = self.space.acquire("crashed", 800 * 1024)
+        metadata = json.loads((workspace.path / METADATA_FILE).read_text())
+        metadata["pid"] = 2 ** 22 + 1
+        (workspace.path / METADATA_FILE).write_text(json.dumps(metadata))
+
+        second = self.space.acquire("second", 800 * 1024, timeout=0)
+        self.assertFalse(workspace.path.exists())
+        self.assertTrue(second.path.exists())
+
+    def test_workspace_released_during_scan_is_skipped(self):
+        workspace = self.space.acquire("released", 1000)
+
+        def release_while_reading(path, *args, **kwargs):
+            workspace.release()
+            raise FileNotFoundError(path)
+
+        with mock.patch("converter.workspace.open", side_effect=release_while_reading, create=True):
+            self.assertEqual(self.space.usage(), 0)
+
+
+class TranscriptionBackendTests(SimpleTestCase):
+    """
+    The quantized CPU backend and the word error rate of its benchmark.
+    """
+
+    def test_linear_layers_are_quantized(self):
+        import torch
+        from whisper.model import ModelDimensions, Whisper
+
+        dims = ModelDimensions(
+            n_mels=80, n_audio_ctx=100, n_audio_state=64, n_audio_head=2, n_audio_layer=1,
+            n_vocab=100, n_text_ctx=16, n_text_state=64, n_text_head=2, n_text_layer=1,
+        )
+        model = Whisper(dims).eval()
+        mel = torch.randn(1, 80, 200)
+        with torch.inference_mode():
+            expected = model.encoder(mel)
+            quantized = quantize_linear_layers(model)
+            actual = quantized.encoder(mel)
+
+        self.assertIsInstance(quantized.encoder.blocks[0].attn.query, torch.ao.nn.quantized.dynamic.Linear)
+        self.assertEqual(actual.shape, expected.shape)
+        self.assertLess((actual - expected).abs().mean().item(), 0.1)
+
+    @override_settings(WHISPER_CPU_THREADS=0, QUIZ_WORKER_COUNT=1000)
+    def test_thread_count_is_the_worker_share(self):
+        self.assertEqual(cpu_thread_count(), 1)
+        with override_settings(WHISPER_CPU_THREADS=3):
+            self.assertEqual(cpu_thread_count(), 3)
+
+    @override_settings(FAKE_TRANSCRIPTION_RTF=0)
+    def test_fake_backend(self):
+        text = FakeTranscriptionBackend().transcribe(np.zeros(10 * SAMPLE_RATE, dtype=np.float32))["text"]
+        self.assertEqual(len(text.split()), 25)
+
+    def test_quantized_transcripts_are_cached_separately(self):
+        self.assertEqual(QuantizedCPUBackend(name="turbo").cache_name, "turbo-int8")
+
+    def test_benchmark_rejects_empty_audio(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "empty.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+
+        with self.assertRaisesMessage(CommandError, "contains no samples"):
+            call_command("benchmark_transcription", path, backends="converter.transcription.FakeTranscriptionBackend")
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate("The cat sat on the mat.", "the cat sat on the mat"), (0, 6))
+        # one substitution, one deletion, one insertion
+        self.assertEqual(word_error_rate("the cat sat on the mat", "the dog sat on mat today"), (3, 6))
+        self.assertEqual(word_error_rate("", "anything"), (1, 0))
+
+
+@override_settings(CONVERTER_STREAMING=True, WHISPER_CHUNKED=False, WHISPER_VAD=False, TRANSCRIPT_CACHE_ENABLED=False)
+class TranscribeStageTests(SimpleTestCase):
+    """
+    The transcribe stage and the real-time factor are recorded per
+    transcription backend.
+    """
+
+    def transcribe(self, audio):
+        """
+        Runs get_transcript on in-memory audio with a stubbed backend;
+        returns the metrics.observe and log_event mocks.
+        """
+        converter = AudioConverter("https://youtu.be/dQw4w9WgXcQ", "owner", transcript_source="whisper")
+        backend = QuantizedCPUBackend(name="turbo")
+        with mock.patch.object(converter, "preflight"), \
+                mock.patch("converter.converter.stream_audio", return_value=audio), \
+                mock.patch("converter.converter.get_transcription_backend", return_value=backend), \
+                mock.patch.object(backend, "transcribe", return_value={"text": "transcribed"}), \
+                mock.patch("converter.metrics.metrics.observe") as observe, \
+                mock.patch("converter.metrics.log_event") as log_event:
+            self.assertEqual(converter.get_transcript(), "transcribed")
+        return observe, log_event
+
+    def stage_fields(self, log_event, stage):
+        return [c.kwargs for c in log_event.call_args_list if c.kwargs.get("stage") == stage]
+
+    def test_labelled_with_the_backend(self):
+        observe, log_event = self.transcribe(np.zeros(2 * SAMPLE_RATE, dtype=np.float32))
+
+        self.assertEqual(self.stage_fields(log_event, "transcribe")[0]["model"], "turbo-int8")
+        observe.assert_any_call("quizly_whisper_realtime_factor", mock.ANY, model="turbo-int8")
+
+    @override_settings(WHISPER_VAD=True)
+    def test_vad_is_timed_separately(self):
+        rng = np.random.default_rng(0)
+        tone = 0.3 * np.sin(2 * np.pi * 200 * np.arange(3 * SAMPLE_RATE) / SAMPLE_RATE).astype(np.float32)
+        silence = (0.001 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)
+        observe, log_event = self.transcribe(np.concatenate([silence, tone, silence]))
+
+        stages = [c.kwargs["stage"] for c in log_event.call_args_list if "stage" in c.kwargs]
+        self.assertEqual(stages, ["download", "vad", "transcribe"])
+        observe.assert_any_call("quizly_audio_duration_seconds", 23)
+        self.assertLess(self.stage_fields(log_event, "transcribe")[0]["audio_seconds"], 23)
+
+
+class AsyncQuizViewTests(QuizTestCase):
+    """
+    The ASGI views (QUIZ_API_ASYNC) behave like the sync endpoints.
+    """
+
+    def async_request(self, method, path, **kwargs):
+        request = getattr(AsyncRequestFactory(), method)(path, **kwargs)
+        request.COOKIES["access_token"] = self.client.cookies["access_token"].value
+        return request
+
+    async def test_create_enqueues_job(self):
+        request = self.async_request(
+            "post",
+            "/api/createQuiz/",
+            data={"url": "https://youtu.be/dQw4w9WgXcQ", "transcript_source": "captions"},
+            content_type="application/json",
+        )
+        response = await AsyncCreateQuizView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = await QuizJob.objects.aget(owner=self.user)
+        self.assertEqual(job.transcript_source, QuizJob.TranscriptSource.CAPTIONS)
+
+    async def test_create_accepts_form_data(self):
+        request = self.async_request(
+            "post",
+            "/api/createQuiz/",
+            data="url=https%3A%2F%2Fyoutu.be%2FdQw4w9WgXcQ&transcript_source=captions",
+            content_type="application/x-www-form-urlencoded",
+        )
+        response = await AsyncCreateQuizView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = await QuizJob.objects.aget(owner=self.user)
+        self.assertEqual(job.transcript_source, QuizJob.TranscriptSource.CAPTIONS)
+
+    async def test_create_rejects_unsupported_media_type(self):
+        request = self.async_request("post", "/api/createQuiz/", data="url", content_type="text/plain")
+        response = await AsyncCreateQuizView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    async def test_cached_token_is_not_offloaded(self):
+        await AsyncQuizListView.as_view()(self.async_request("get", "/api/quizzes/"))
+
+        with mock.patch("quiz_app.api.async_views.sync_to_async", side_effect=AssertionError) as offload:
+            response = await AsyncCreateQuizView.as_view()(self.async_request(
+                "post", "/api/createQuiz/", data={"url": "https://youtu.be/dQw4w9WgXcQ"}, content_type="application/json"
+            ))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        offload.assert_not_called()
+
+    async def test_retrieve_and_not_modified(self):
+        pk = self.quizzes[0].id
+        response = await AsyncQuizDetailView.as_view()(self.async_request("get", f"/api/quizzes/{pk}/"), pk=pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        request = self.async_request("get", f"/api/quizzes/{pk}/", headers={"If-None-Match": response["ETag"]})
+        response = await AsyncQuizDetailView.as_view()(request, pk=pk)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_retrieve_foreign_quiz(self):
+        pk = self.foreign_quiz.id
+        response = await AsyncQuizDetailView.as_view()(self.async_request("get", f"/api/quizzes/{pk}/"), pk=pk)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list(self):
+        response = await AsyncQuizListView.as_view()(self.async_request("get", "/api/quizzes/"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)["results"]), 3)
+
+    async def test_delete_is_delegated(self):
+        pk = self.quizzes[0].id
+        response = await AsyncQuizDetailView.as_view()(self.async_request("delete", f"/api/quizzes/{pk}/"), pk=pk)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Quiz.objects.filter(pk=pk).aexists())
+
+    async def test_unauthenticated(self):
+        request = AsyncRequestFactory().get("/api/quizzes/")
+        response = await AsyncQuizListView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(QUIZ_EVENTS_POLL_SECONDS=0)
+    async def test_job_events(self):
+        job = await QuizJob.objects.acreate(
+            owner=self.user,
+            video_url=self.quizzes[0].video_url,
+            status=QuizJob.Status.FAILED,
+            error="Video unavailable",
+        )
+        request = self.async_request("get", f"/api/jobs/{job.id}/events/")
+        response = await AsyncQuizJobEventsView.as_view()(request, pk=job.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = "".join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual(body, 'id: failed:pending:0.0\nevent: failed\ndata: {"error": "Video unavailable"}\n\n')